@@ -1,18 +1,65 @@
-import typer
 import importlib.metadata
-from freeds.cli.commands import dc, env, nb, selfcheck, stack
-from freeds.config import set_env
+import sys
+from typing import Any, Optional, Sequence
 
-set_env()
+# start profiling before anything else is imported, so the imports below are measured too
+from freeds.utils import profiling
 
+if profiling.profiling_requested():
+    profiling.start_profiling()
 
-app = typer.Typer()
+import typer  # noqa: E402
 
-app.add_typer(dc.app)  # <-- Add this line)
-app.command()(env.env)
-app.command()(selfcheck.selfcheck)
-app.add_typer(nb.nb_app, name="nb")
-app.add_typer(stack.cfg_app, name="stack")
+from freeds.cli import daemon  # noqa: E402
+from freeds.cli.lazy import LazyTyperGroup  # noqa: E402
+
+
+class FreedsGroup(LazyTyperGroup):
+    # Commands are imported when they are run, keep the help texts in sync with the command docstrings.
+    lazy_commands = {
+        "dc": (
+            "freeds.cli.commands.dc:app",
+            "Call docker compose with the supplied parameters for all freeds plugins in the current stack.",
+        ),
+        "env": (
+            "freeds.cli.commands.env:env",
+            "Print the export statements for freeds env values, allowing you to set the env values in a sceipt; "
+            "`source <(freeds env)`.",
+        ),
+        "selfcheck": ("freeds.cli.commands.selfcheck:selfcheck", "Perform all self checks."),
+        "nb": ("freeds.cli.commands.nb:nb_app", "Manage notebooks on S3."),
+        "stack": ("freeds.cli.commands.stack:cfg_app", "Manage freeds stacks."),
+        "config": ("freeds.cli.commands.config:config_app", "Manage freeds configs."),
+        "daemon": ("freeds.cli.commands.daemon:daemon_app", "Run a background daemon serving repeated cli calls."),
+        "s3": ("freeds.cli.commands.s3:s3_app", "Transfer data between local folders and S3."),
+    }
+
+    def main(self, args: Optional[Sequence[str]] = None, *pargs: Any, **kwargs: Any) -> Any:
+        # run read only commands in the freeds daemon when it's running, a command line call only
+        if args is None and kwargs.get("standalone_mode", True):
+            exit_code = daemon.forward(sys.argv[1:])
+            if exit_code is not None:
+                sys.exit(exit_code)
+        return super().main(args, *pargs, **kwargs)
+
+
+app = typer.Typer(cls=FreedsGroup)
+
+
+@app.callback()  # type: ignore[misc]
+def main(
+    profile_startup: bool = typer.Option(
+        False,
+        "--profile-startup",
+        help="Report time spent on imports, config loads and network calls (also FREEDS_PROFILE_STARTUP=1).",
+    )
+) -> None:
+    """The free data stack CLI."""
+    if profile_startup:
+        profiling.start_profiling()
+    profiler = profiling.get_profiler()
+    if profiler is not None:
+        profiler.mark_command_start()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,30 @@
+import typer
+
+from freeds.config.file.config_classes import ConfigSet
+from freeds.config.file.snapshot import compile_snapshot, remove_snapshot, snapshot_path
+from freeds.utils import RootConfig
+
+config_app = typer.Typer(help="Manage freeds configs.")
+
+
+@config_app.command()  # type: ignore
+def compile() -> None:
+    """Compile all configs and locals into a snapshot file for fast cli startup.
+    The snapshot is rebuilt automatically when a config file changes."""
+    root = RootConfig()
+    path = snapshot_path(root)
+    if path is None:
+        typer.echo("Error: no freeds root folder configured, can't place the snapshot.")
+        raise typer.Exit(1)
+    cfg_set = ConfigSet(configs_path=root.configs_path, locals_path=root.locals_path)
+    compile_snapshot(cfg_set, path)
+    typer.echo(f"Compiled {len(cfg_set.config_set)} configs into {path}.")
+
+
+@config_app.command()  # type: ignore
+def clear() -> None:
+    """Remove the compiled config snapshot, configs are read from the config files again."""
+    if remove_snapshot():
+        typer.echo("Config snapshot removed.")
+    else:
+        typer.echo("No config snapshot found.")
@@ -0,0 +1,68 @@
+import subprocess
+import sys
+import time
+
+import typer
+
+from freeds.cli.daemon import is_running, request, run_daemon, socket_path
+
+daemon_app = typer.Typer(help="Run a background daemon serving repeated cli calls.")
+
+
+@daemon_app.command()  # type: ignore
+def run() -> None:
+    """Run the daemon in the foreground, stop it with ctrl-c or `freeds daemon stop`."""
+    if is_running():
+        typer.echo(f"A freeds daemon is already running on {socket_path()}.")
+        raise typer.Exit(1)
+    typer.echo(f"freeds daemon listening on {socket_path()}")
+    try:
+        run_daemon()
+    except KeyboardInterrupt:
+        pass
+
+
+@daemon_app.command()  # type: ignore
+def start(
+    wait: float = typer.Option(10.0, "--wait", help="Seconds to wait for the daemon to answer."),
+) -> None:
+    """Start the daemon in the background, `freeds env`, `stack ls`, `nb ls` and `nb cfg` are then served by it."""
+    if is_running():
+        typer.echo(f"freeds daemon already running on {socket_path()}.")
+        return
+    subprocess.Popen(
+        [sys.executable, "-m", "freeds.cli.daemon"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if is_running():
+            typer.echo(f"freeds daemon started on {socket_path()}.")
+            return
+        time.sleep(0.1)
+    typer.echo("Error: the freeds daemon did not start, try `freeds daemon run` to see why.")
+    raise typer.Exit(1)
+
+
+@daemon_app.command()  # type: ignore
+def stop() -> None:
+    """Stop the daemon."""
+    if not is_running():
+        typer.echo("No freeds daemon running.")
+        return
+    request({"op": "stop"})
+    typer.echo("freeds daemon stopped.")
+
+
+@daemon_app.command()  # type: ignore
+def status() -> None:
+    """Show if the daemon is running."""
+    if not is_running():
+        typer.echo("No freeds daemon running.")
+        raise typer.Exit(1)
+    info = request({"op": "ping"})
+    uptime = time.time() - info["started"]
+    typer.echo(f"freeds daemon running on {socket_path()}, pid {info['pid']}, up {uptime:.0f}s, {info['requests']} requests.")
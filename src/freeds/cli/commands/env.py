@@ -1,6 +1,25 @@
-from freeds.config import get_env
+from pathlib import Path
+from typing import Optional
 
-def env()->None:
+import typer
+
+from freeds.config import get_env, write_env_file
+
+
+def env(
+    file: Optional[Path] = typer.Option(
+        None,
+        "--file",
+        "-f",
+        help="Write a docker compose env file (for `docker compose --env-file`) instead, "
+        "only rewritten when a config changed. Use `-f -` for the default path.",
+    ),
+    force: bool = typer.Option(False, "--force", help="Rewrite the env file even if no config changed."),
+) -> None:
     """Print the export statements for freeds env values, allowing you to set the env values in a sceipt; `source <(freeds env)`. """
+    if file is not None:
+        path, written = write_env_file(None if str(file) == "-" else file, force=force)
+        print(f"{'Wrote' if written else 'Up to date'}: {path}")
+        return
     for key, value in get_env().items():
         print(f'export {key}="{value}"')
@@ -2,7 +2,7 @@ import typer
 
 from freeds.cli.helpers import deploy_notebooks
 from freeds.config import get_config
-from freeds.s3 import delete_prefix, list_files
+from freeds.s3 import delete_keys, delete_prefix, list_files
 
 nb_app = typer.Typer(help="Manage notebooks on S3.")
 
@@ -54,13 +54,17 @@ def delprefix(prefix: str = typer.Argument(..., help="Delete all files under thi
     """Delete all files under an S3 prefix."""
     cfg = get_config("nbdeploy")
     bucket = cfg.get("bucket", "notebooks")
-    books = list_files(bucket_name="notebooks", prefix=prefix)
-    for book in books:
+    # list once, the dry run's keys are what gets deleted
+    listing = delete_prefix(bucket=bucket, prefix=prefix, dry_run=True)
+    for book in listing.keys:
         print(f"  - {book}")
-    if not typer.confirm(f"{len(books)} files under prefix {prefix} in bucket {bucket} will be deleted. Continue?"):
+    if not typer.confirm(f"{listing.listed} files under prefix {prefix} in bucket {bucket} will be deleted. Continue?"):
         print("Deletion cancelled.")
         return
-    delete_prefix(bucket=bucket, prefix=prefix)
+    report = delete_keys(bucket=bucket, keys=listing.keys, raise_on_error=False)
+    print(f"Deleted {report.deleted} files.")
+    for key, error in report.failed.items():
+        print(f"Error: could not delete {key}: {error}")
 
 
 # deploy("all")
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import typer
+
+from freeds.s3.sync import sync_from_s3, sync_to_s3
+
+s3_app = typer.Typer(help="Transfer data between local folders and S3.")
+
+
+@s3_app.callback()  # type: ignore
+def s3() -> None:
+    # a callback keeps s3 a command group while sync is its only command
+    pass
+
+
+def split_target(target: str) -> tuple[str, str]:
+    """Split bucket/prefix (optionally s3:// or s3a://) into bucket and prefix."""
+    for scheme in ("s3://", "s3a://"):
+        if target.startswith(scheme):
+            target = target[len(scheme) :]
+    bucket, _, prefix = target.partition("/")
+    if not bucket:
+        raise typer.BadParameter(f"'{target}' has no bucket, use bucket/prefix.")
+    return bucket, prefix.strip("/")
+
+
+@s3_app.command()  # type: ignore
+def sync(
+    local: Path = typer.Argument(..., help="The local folder."),
+    target: str = typer.Argument(..., help="The S3 location as bucket/prefix."),
+    download: bool = typer.Option(False, "--download", help="Download from S3 to the local folder."),
+    delete: bool = typer.Option(False, "--delete", help="Delete files missing from the source."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only show what would be transferred."),
+) -> None:
+    """Upload new and changed files in a local folder to bucket/prefix, or download them with --download.
+    Files with the same size and ETag (md5) are skipped."""
+    bucket, prefix = split_target(target)
+    if download:
+        report = sync_from_s3(bucket, prefix, local, delete=delete, dry_run=dry_run)
+    else:
+        report = sync_to_s3(local, bucket, prefix, delete=delete, dry_run=dry_run)
+    if dry_run:
+        for source, destination in report.to_transfer:
+            print(f"  {source} -> {destination}")
+        if delete:
+            for extra in report.extras:
+                print(f"  delete {extra}")
+    print(report)
+    if report.transfer is not None:
+        for result in report.transfer.failed:
+            print(f"Error: {result.local_path} <-> {result.key}: {result.error}")
+    for key in report.rejected:
+        print(f"Error: not downloading {key}, it would be written outside {local}.")
+    for extra, error in report.delete_failed.items():
+        print(f"Error: could not delete {extra}: {error}")
+    if not report.ok:
+        raise typer.Exit(1)
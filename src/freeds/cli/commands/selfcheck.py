@@ -1,7 +1,9 @@
+import logging
 from typing import List
 
 import typer
 
+from freeds.config import get_config, get_configs
 from freeds.selfcheck import (
     airflow_checks,
     directory_checks,
@@ -16,6 +18,23 @@ from freeds.selfcheck.check_classes import (
     ExceptionCheckResult,
 )
 
+logger = logging.getLogger(__name__)
+
+
+def warm_configs(config_names: List[str]) -> None:
+    """Load the configs the checks read over and over into the cache, in one round trip if they all load.
+    Otherwise they are loaded one at a time so the others are still cached, failures are left to the checks."""
+    try:
+        get_configs(config_names)
+        return
+    except Exception as e:
+        logger.warning(f"Could not load configs {config_names} in one go, loading them one at a time: {e}")
+    for name in config_names:
+        try:
+            get_config(name)
+        except Exception as e:
+            logger.warning(f"Could not load config {name}: {e}")
+
 
 def selfcheck(
     no_nb: bool = typer.Option(False, "--no-nb", help="Skip the notebook based checks(spark)."),
@@ -24,6 +43,7 @@ def selfcheck(
     """
     Perform all self checks.
     """
+    warm_configs(["plugins", "repos", "s3"] + ([] if no_airflow else ["airflow"]))
 
     checklists: List[CheckList] = [
         docker_checks.checks(),
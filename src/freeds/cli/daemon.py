@@ -0,0 +1,298 @@
+"""Optional freeds daemon, keeping configs, env and clients warm for repeated cli calls.
+The daemon listens on a unix socket (FREEDS_DAEMON_SOCKET, default daemon.sock in $XDG_RUNTIME_DIR/freeds
+or ~/.freeds, a folder only the user can access) and answers one json request per line.
+The client only talks to a socket owned by the user with a daemon process of the same user on the other end,
+`source <(freeds env)` runs whatever the daemon answers. The cli forwards read only commands to it when it is running
+and runs them in-process otherwise, also when the daemon doesn't answer within FREEDS_DAEMON_TIMEOUT seconds
+(default 5). Set FREEDS_DAEMON=0 to never forward.
+
+The client side only uses the standard library, so forwarding doesn't pay for importing the commands."""
+
+import contextlib
+import importlib
+import io
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 0.5
+DEFAULT_TIMEOUT = 5.0
+# client side settings, they don't have to match the daemon's environment
+CLIENT_SETTINGS = ("FREEDS_DAEMON", "FREEDS_DAEMON_TIMEOUT")
+
+# commands that only read configs and s3, safe to run inside the daemon
+FORWARDED_COMMANDS = {("env",), ("stack", "ls"), ("nb", "ls"), ("nb", "cfg")}
+
+
+def socket_dir() -> Path:
+    """Get the private folder for the default socket, $XDG_RUNTIME_DIR/freeds or ~/.freeds."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "freeds"
+    return Path.home() / ".freeds"
+
+
+def socket_path() -> Path:
+    """Get the daemon socket path, FREEDS_DAEMON_SOCKET or daemon.sock in the private socket folder."""
+    env_path = os.environ.get("FREEDS_DAEMON_SOCKET")
+    if env_path:
+        return Path(env_path)
+    return socket_dir() / "daemon.sock"
+
+
+def _make_private_dir(path: Path) -> None:
+    """Create a folder only the user can access, refusing an existing one that others can access."""
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    st = os.stat(path)
+    if st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"{path} must be owned by you and not accessible to others (mode 0700).")
+
+
+def _check_socket_owner(path: Path) -> None:
+    """Raise PermissionError unless path is a socket owned by the user (a symlink is not followed)."""
+    st = os.lstat(path)
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        raise PermissionError(f"{path} is not a socket owned by you, not talking to it.")
+
+
+def _peer_uid(sock: socket.socket) -> Optional[int]:
+    """The uid of the process on the other end of a unix socket, None where SO_PEERCRED isn't supported."""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    _, uid, _ = struct.unpack("3i", creds)
+    return int(uid)
+
+
+def request_timeout() -> float:
+    """Get the seconds to wait for the daemon to answer a forwarded command, FREEDS_DAEMON_TIMEOUT (default 5)."""
+    value = os.environ.get("FREEDS_DAEMON_TIMEOUT")
+    if value is None:
+        return DEFAULT_TIMEOUT
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"FREEDS_DAEMON_TIMEOUT must be a number, got '{value}'.")
+
+
+def environment_key() -> list[tuple[str, str]]:
+    """The FREEDS_* environment of a process, the daemon only serves clients with the same environment."""
+    return sorted((k, v) for k, v in os.environ.items() if k.startswith("FREEDS_") and k not in CLIENT_SETTINGS)
+
+
+def request(payload: dict[str, Any], timeout: Optional[float] = None, path: Optional[Path] = None) -> dict[str, Any]:
+    """Send a request to the daemon and return its response.
+    Raises OSError (ConnectionRefusedError, FileNotFoundError...) if no daemon is listening,
+    PermissionError if the socket or the process listening on it belongs to another user."""
+    path = path or socket_path()
+    _check_socket_owner(path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(str(path))
+        uid = _peer_uid(sock)
+        if uid is not None and uid != os.getuid():
+            raise PermissionError(f"The process listening on {path} runs as uid {uid}, not talking to it.")
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        with sock.makefile("rb") as stream:
+            line = stream.readline()
+    if not line:
+        raise ConnectionResetError("freeds daemon closed the connection without a response.")
+    response: dict[str, Any] = json.loads(line)
+    return response
+
+
+def is_running(path: Optional[Path] = None) -> bool:
+    """Check if a daemon answers on the socket."""
+    try:
+        return bool(request({"op": "ping"}, timeout=CONNECT_TIMEOUT, path=path).get("ok"))
+    except (OSError, ValueError):
+        return False
+
+
+def is_forwarded(argv: Sequence[str]) -> bool:
+    """Check if a command line is one of the commands run in the daemon."""
+    if os.environ.get("FREEDS_DAEMON", "").strip().lower() in ("0", "false", "no"):
+        return False
+    return any(tuple(argv[: len(command)]) == command for command in FORWARDED_COMMANDS)
+
+
+def forward(argv: Sequence[str]) -> Optional[int]:
+    """Run a command in the daemon, printing its output. Returns the exit code, or None if the command isn't
+    forwarded, no trusted daemon is running or it doesn't answer in time, then the caller runs it in-process."""
+    if not is_forwarded(argv):
+        return None
+    payload = {"op": "run", "argv": list(argv), "cwd": os.getcwd(), "environment": environment_key()}
+    try:
+        response = request(payload, timeout=request_timeout(), path=socket_path())
+    except PermissionError as e:
+        logger.warning("Not using the freeds daemon: %s", e)
+        return None
+    except socket.timeout:
+        logger.warning("The freeds daemon didn't answer %s in time, running it here.", list(argv))
+        return None
+    except (OSError, ValueError):
+        return None
+    if not response.get("ok"):
+        logger.debug("freeds daemon did not run %s: %s", argv, response.get("error"))
+        return None
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    sys.stdout.flush()
+    return int(response["exit_code"])
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """The daemon, serving config, env and cli command requests from a warm process."""
+
+    daemon_threads = True
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.started = time.time()
+        self.requests = 0
+        self.environment = environment_key()
+        # commands print to sys.stdout, so they run one at a time
+        self.run_lock = threading.Lock()
+        self.watcher: Any = None
+        # the socket is created user only, there's no window where others can connect
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(path), DaemonHandler)
+        finally:
+            os.umask(umask)
+
+    def warm_up(self) -> None:
+        """Pin the config set and watch the config folders, then load what the forwarded commands use."""
+        from freeds.config import get_env
+        from freeds.config.file.config_classes import freeds_config_set, pin_config_set
+        from freeds.config.file.watcher import ConfigWatcher
+
+        cfg_set = freeds_config_set()
+        pin_config_set(cfg_set)
+        self.watcher = ConfigWatcher(config_set=cfg_set).start()
+        get_env()
+        # import the forwarded command modules once, with their dependencies (boto3 and friends)
+        from freeds.cli.cli import FreedsGroup
+
+        for command in FORWARDED_COMMANDS:
+            importlib.import_module(FreedsGroup.lazy_commands[command[0]][0].split(":")[0])
+
+    def serve(self) -> None:
+        logger.info("freeds daemon listening on %s", self.path)
+        try:
+            self.serve_forever(poll_interval=0.2)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        from freeds.config.file.config_classes import pin_config_set
+
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        pin_config_set(None)
+        self.server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+    def dispatch(self, payload: dict[str, Any]) -> dict[str, Any]:
+        self.requests += 1
+        op = payload.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "started": self.started, "requests": self.requests}
+        if op == "stop":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"ok": True}
+        if payload.get("environment") is not None and payload["environment"] != [list(e) for e in self.environment]:
+            return {"ok": False, "error": "client FREEDS_* environment differs from the daemon's."}
+        if op == "config":
+            from freeds.config import get_config
+
+            return {"ok": True, "config": get_config(payload["name"])}
+        if op == "env":
+            from freeds.config import get_env
+
+            return {"ok": True, "env": get_env()}
+        if op == "run":
+            return self.run_command(payload["argv"], payload.get("cwd"))
+        return {"ok": False, "error": f"unknown op {op}"}
+
+    def run_command(self, argv: list[str], cwd: Optional[str]) -> dict[str, Any]:
+        """Run a cli command in the daemon process, capturing its output."""
+        if not is_forwarded(argv):
+            return {"ok": False, "error": f"command not served by the daemon: {argv}"}
+        from freeds.cli.cli import app
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with self.run_lock:
+            if self.watcher is not None:
+                # catch up with config files written just before the request, the watcher thread may not have yet
+                self.watcher.check()
+            start_dir = os.getcwd()
+            exit_code = 0
+            try:
+                if cwd:
+                    os.chdir(cwd)
+                with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                    try:
+                        app(argv, prog_name="freeds", standalone_mode=True)
+                    except SystemExit as e:
+                        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception as e:
+                stderr.write(f"Error: {e}\n")
+                exit_code = 1
+            finally:
+                os.chdir(start_dir)
+        return {"ok": True, "exit_code": exit_code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    server: DaemonServer
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            response = self.server.dispatch(json.loads(line))
+        except Exception as e:
+            logger.error(f"freeds daemon request failed: {e}")
+            response = {"ok": False, "error": str(e)}
+        self.wfile.write(json.dumps(response, default=str).encode() + b"\n")
+
+
+def make_server(path: Optional[Path] = None) -> DaemonServer:
+    """Create the daemon server on the socket, replacing a stale socket file left by a daemon that died."""
+    if path is None:
+        path = socket_path()
+        if "FREEDS_DAEMON_SOCKET" not in os.environ:
+            _make_private_dir(path.parent)
+    if path.exists() or path.is_symlink():
+        if is_running(path):
+            raise RuntimeError(f"A freeds daemon is already running on {path}.")
+        path.unlink()
+    return DaemonServer(path)
+
+
+def run_daemon(path: Optional[Path] = None) -> None:
+    """Run the daemon in the foreground until stopped."""
+    server = make_server(path)
+    server.warm_up()
+    server.serve()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_daemon()
@@ -1,11 +1,17 @@
-from .notebook import deploy_notebooks
-from .stackrunner import execute_docker_compose, get_plugins
-from .stackutils import (
-    get_current_stack_config,
-    get_current_stack_name,
-    get_stack_names,
-    set_current_stack,
-)
+import importlib
+from typing import Any
+
+# The helpers pull in git, nbformat and boto3, they are imported on first use (PEP 562),
+# so commands only pay for the helpers they actually use.
+_exports = {
+    "deploy_notebooks": ".notebook",
+    "execute_docker_compose": ".stackrunner",
+    "get_plugins": ".stackrunner",
+    "get_current_stack_config": ".stackutils",
+    "get_current_stack_name": ".stackutils",
+    "get_stack_names": ".stackutils",
+    "set_current_stack": ".stackutils",
+}
 
 __all__ = [
     "get_current_stack_config",
@@ -16,3 +22,9 @@ __all__ = [
     "get_plugins",
     "execute_docker_compose",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_exports[name], __name__), name)
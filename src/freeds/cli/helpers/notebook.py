@@ -1,6 +1,5 @@
 import datetime as dt
 import os
-import shutil
 import sys
 from pathlib import Path
 from typing import Any, Optional, cast
@@ -9,7 +8,7 @@ import git
 import nbformat
 
 from freeds.config import get_config
-from freeds.s3 import put_file
+from freeds.s3 import open_write, put_file
 
 
 def find_dir(dir_name: str) -> Path:
@@ -159,13 +158,14 @@ def list_files(repo: str, notebook_dir: str) -> list[NotebookFile]:
     return notebook_files
 
 
-def stamp_notebook(input_path: str, output_path: str) -> Optional[nbformat.NotebookNode]:
+def stamp_notebook(input_path: str, output_path: Optional[str]) -> Optional[nbformat.NotebookNode]:
     """
     Add Git revision information to notebook metadata and2
     insert/update a markdown cell at the top with revision info.
     Uses cell tags to identify the Git info cell.
+    With no output_path the stamped notebook is only returned, not written.
     """
-    if Path(input_path).resolve() == Path(output_path).resolve():
+    if output_path is not None and Path(input_path).resolve() == Path(output_path).resolve():
         raise ValueError("Input and output paths must be different to avoid overwriting the original notebook.")
     try:
         git_info = get_git_info()
@@ -187,6 +187,8 @@ def stamp_notebook(input_path: str, output_path: str) -> Optional[nbformat.Noteb
             revision_cell["metadata"]["tags"] = []
         revision_cell["metadata"]["tags"].append("gitinfo")
         revision_cell["source"] = format_md(git_info, input_path)
+        if output_path is None:
+            return notebook
 
         print(f"Writing a copy of the notebook to: {output_path}.")
         containing_dir = os.path.dirname(output_path)
@@ -220,16 +222,31 @@ def normalize(files: list[NotebookFile]) -> None:
             nbformat.write(nb, f)
 
 
+def upload_notebook(notebook: nbformat.NotebookNode, bucket: str, key: str) -> bool:
+    """Stream a notebook to S3, a failed upload is printed and False returned like put_file."""
+    text = f"notebook to bucket '{bucket}' as '{key}'"
+    print(f"Intitating upload: {text}.")
+    try:
+        with open_write(bucket, key, "w") as f:
+            nbformat.write(notebook, f)
+        print(f"Upload succeeded: {text}.")
+        return True
+    except Exception as e:
+        print(f"Upload failed {text}: {e}")
+        return False
+
+
 def deploy_dir(repo: str, notebook_dir: str, normalize_source: bool) -> None:
     """
     Process each notebook in the specified directory, stamp it with Git info,
-    and upload it to S3.
+    and upload it to S3. Stamped notebooks are streamed to S3 from memory,
+    unless preserve_temp is set and a copy is kept in temp_dir.
     """
     cfg = get_config("nbdeploy")
     temp_dir = cfg.get("temp_dir")
-    if temp_dir is None:
-        raise ValueError("nbdeploy config has no value for temp_dir")
     preserve_temp = cfg.get("preserve_temp", False)
+    if preserve_temp and temp_dir is None:
+        raise ValueError("nbdeploy config has preserve_temp but no value for temp_dir")
     bucket = cfg.get("bucket")
     if bucket is None:
         raise ValueError("nbdeploy config has no value for bucket")
@@ -241,13 +258,16 @@ def deploy_dir(repo: str, notebook_dir: str, normalize_source: bool) -> None:
         normalize(notebook_files)
     for nbfile in notebook_files:
         print(f"Stamping and uploading notebook: {nbfile.local_file_path()}.")
+        if not preserve_temp:
+            notebook = stamp_notebook(nbfile.local_file_path(), None)
+            if notebook is not None:
+                upload_notebook(notebook, bucket, nbfile.s3_file_path())
+            continue
         stamped_path = nbfile.temp_file_path(temp_dir)
         if not os.path.exists(os.path.dirname(stamped_path)):
             os.makedirs(os.path.dirname(stamped_path), exist_ok=True)
         stamp_notebook(nbfile.local_file_path(), stamped_path)
         put_file(local_path=stamped_path, bucket=bucket, file_name=nbfile.s3_file_path())
-        if not preserve_temp:
-            os.remove(stamped_path)  # Clean up local copy after upload
 
 
 def deploy_repo(repo_name: str, normalize_source: bool) -> None:
@@ -276,10 +296,9 @@ def deploy_notebooks(repo: str = "all", normalize_source: bool = False) -> None:
 
     cfg = get_config("nbdeploy")
     temp_dir = cfg.get("temp_dir")
-    if temp_dir is None:
-        raise ValueError("nbdeploy config has no value for temp_dir")
-    create_temp_dir = not os.path.exists(temp_dir)
     preserve_temp = bool(cfg.get("preserve_temp", False))
+    # the temp dir is only used to keep stamped copies, otherwise notebooks are streamed to S3
+    create_temp_dir = preserve_temp and temp_dir is not None and not os.path.exists(temp_dir)
     if create_temp_dir:
         os.makedirs(temp_dir, exist_ok=True)
 
@@ -291,10 +310,4 @@ def deploy_notebooks(repo: str = "all", normalize_source: bool = False) -> None:
 
     # cleanup
     os.chdir(start_dir)
-    if create_temp_dir and not preserve_temp:
-        for _, _, files in os.walk(temp_dir):
-            if files:
-                raise FileExistsError(f"{temp_dir} is not empty: {files}")
-        print(f"removing temp dir: {temp_dir}")
-        shutil.rmtree(temp_dir)
     print("Deployment complete!")
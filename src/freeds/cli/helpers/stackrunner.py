@@ -15,7 +15,6 @@ logger = log.setup_logging(__name__)
 
 
 def get_plugins() -> Optional[List[str]]:
-    set_env()
     current_stack = get_current_stack_name()
 
     if current_stack is None:
@@ -36,6 +35,7 @@ def get_plugins() -> Optional[List[str]]:
 
 
 def execute_docker_compose(params: List[str], plugins: List[str]) -> None:
+    # docker compose reads the freeds envs from the environment, get_env is cached until a config changes
     set_env()
     start_dir = Path.cwd()
 
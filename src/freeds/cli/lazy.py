@@ -0,0 +1,64 @@
+"""Lazy command registration for the freeds cli.
+Command modules are imported when their command is run, so startup and --help don't pay for
+boto3, docker, nbformat, git and friends."""
+
+import importlib
+from typing import Any, Optional
+
+import typer
+import typer.main
+from typer.core import TyperCommand, TyperGroup
+
+
+def load_command(spec: str, name: str) -> Any:
+    """Import 'module:attribute' and turn it into a click command named name.
+    The attribute can be a Typer app (single command or group) or a plain command function."""
+    module_name, attr = spec.split(":")
+    obj = getattr(importlib.import_module(module_name), attr)
+    if not isinstance(obj, typer.Typer):
+        wrapper = typer.Typer()
+        wrapper.command(name=name)(obj)
+        obj = wrapper
+
+    if obj.registered_callback or obj.info.callback or obj.registered_groups or len(obj.registered_commands) > 1:
+        command: Any = typer.main.get_group(obj)
+    else:
+        command = typer.main.get_command_from_info(
+            obj.registered_commands[0],
+            pretty_exceptions_short=obj.pretty_exceptions_short,
+            rich_markup_mode=obj.rich_markup_mode,
+        )
+    command.name = name
+    return command
+
+
+class LazyTyperGroup(TyperGroup):
+    """A typer group where subcommands are given as {name: ("module:attribute", "short help")}.
+    Listing commands (as --help does) uses the short help without importing anything,
+    a command's module is imported when the command is resolved for running."""
+
+    lazy_commands: dict[str, tuple[str, str]] = {}
+
+    def list_commands(self, ctx: Any) -> list[str]:
+        names = super().list_commands(ctx)
+        return names + [name for name in self.lazy_commands if name not in names]
+
+    def get_command(self, ctx: Any, cmd_name: str) -> Optional[Any]:
+        command = super().get_command(ctx, cmd_name)
+        if command is not None or cmd_name not in self.lazy_commands:
+            return command
+        # stand-in for help listings, replaced by the real command in resolve_command
+        return TyperCommand(name=cmd_name, help=self.lazy_commands[cmd_name][1])
+
+    def load(self, cmd_name: str) -> Any:
+        """Import and register a lazy command, returns the real command."""
+        command = self.commands.get(cmd_name)
+        if command is None and cmd_name in self.lazy_commands:
+            command = load_command(self.lazy_commands[cmd_name][0], cmd_name)
+            self.add_command(command, cmd_name)
+        return command
+
+    def resolve_command(self, ctx: Any, args: list[str]) -> Any:
+        if args:
+            self.load(args[0])
+        return super().resolve_command(ctx, args)
@@ -1,3 +1,14 @@
-from .config import get_config, get_env, set_env
+from .cache import ConfigCache, config_cache, invalidate_config
+from .config import clear_env_cache, get_config, get_configs, get_env, set_env, write_env_file
 
-__all__ = ["get_config", "set_env", "get_env"]
+__all__ = [
+    "get_config",
+    "get_configs",
+    "set_env",
+    "get_env",
+    "clear_env_cache",
+    "write_env_file",
+    "ConfigCache",
+    "config_cache",
+    "invalidate_config",
+]
@@ -1,15 +1,30 @@
+from .circuit_breaker import CircuitBreaker, CircuitState
 from .config_api import (
+    api_circuit,
+    clear_validated,
     get_config_from_api,
     get_config_url,
+    get_configs_from_api,
     get_full_config_response,
     get_meta,
     is_api_avaiable,
+    probe_api,
 )
+from .session import close_session, get_session, get_timeout
 
 __all__ = [
     "get_config_from_api",
+    "get_configs_from_api",
     "get_meta",
     "is_api_avaiable",
     "get_config_url",
     "get_full_config_response",
+    "probe_api",
+    "api_circuit",
+    "clear_validated",
+    "CircuitBreaker",
+    "CircuitState",
+    "get_session",
+    "close_session",
+    "get_timeout",
 ]
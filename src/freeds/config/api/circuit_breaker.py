@@ -0,0 +1,108 @@
+"""Circuit breaker remembering if the config api server is reachable."""
+
+import logging
+import os
+import threading
+import time
+from enum import Enum
+from typing import Callable, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 30.0
+
+
+def get_default_window() -> float:
+    """Get the probe window in seconds from FREEDS_CONFIG_PROBE_WINDOW, 0 probes on every call."""
+    value = os.environ.get("FREEDS_CONFIG_PROBE_WINDOW")
+    if value is None:
+        return DEFAULT_WINDOW
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        raise ValueError(f"FREEDS_CONFIG_PROBE_WINDOW must be a number of seconds, got '{value}'.")
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"  # server is available
+    OPEN = "open"  # server is unavailable, don't call it until the window has passed
+    HALF_OPEN = "half_open"  # window has passed, a single probe is checking the server again
+
+
+class CircuitBreaker:
+    """Remembers the outcome of an availability probe for a window of seconds.
+    While the result is fresh no probe is made. Once it is stale a single caller probes again,
+    concurrent callers get the last known result instead of piling up on an unreachable server."""
+
+    def __init__(self, window: Union[None, float] = None) -> None:
+        self._window = window
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self.state = CircuitState.CLOSED
+        self.checked_at: Union[None, float] = None
+        self.probes = 0
+
+    @property
+    def window(self) -> float:
+        """The window in seconds, read from the environment unless set explicitly."""
+        return get_default_window() if self._window is None else self._window
+
+    @window.setter
+    def window(self, value: Union[None, float]) -> None:
+        self._window = value
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.checked_at is not None and time.monotonic() - self.checked_at < self.window
+
+    def check(self, probe: Callable[[], bool]) -> bool:
+        """Return the remembered availability, calling probe only when the remembered result is stale."""
+        with self._lock:
+            if self.is_fresh:
+                return self.state == CircuitState.CLOSED
+            known = self.checked_at is not None
+
+        # With a known state, only one caller probes and the others use the last result.
+        # Without one, callers wait for the first probe to finish.
+        if not self._probe_lock.acquire(blocking=not known):
+            return self.state == CircuitState.CLOSED
+        try:
+            with self._lock:
+                if self.is_fresh:
+                    return self.state == CircuitState.CLOSED
+                if self.state == CircuitState.OPEN:
+                    self.state = CircuitState.HALF_OPEN
+            try:
+                available = probe()
+            except Exception as e:
+                logger.error(f"Availability probe failed: {e}")
+                available = False
+            self.probes += 1
+            if available:
+                self.record_success()
+            else:
+                self.record_failure()
+            return available
+        finally:
+            self._probe_lock.release()
+
+    def record_success(self) -> None:
+        """Close the circuit, the server is available."""
+        with self._lock:
+            self.state = CircuitState.CLOSED
+            self.checked_at = time.monotonic()
+
+    def record_failure(self) -> None:
+        """Open the circuit, the server will not be called again until the window has passed."""
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                logger.warning(f"Config API unavailable, not retrying for {self.window} seconds.")
+            self.state = CircuitState.OPEN
+            self.checked_at = time.monotonic()
+
+    def reset(self) -> None:
+        """Forget the remembered state, next check will probe."""
+        with self._lock:
+            self.state = CircuitState.CLOSED
+            self.checked_at = None
+            self.probes = 0
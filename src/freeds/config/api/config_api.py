@@ -1,11 +1,29 @@
+import copy
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Union, cast
 
 import requests
 
+from freeds.config.api.circuit_breaker import CircuitBreaker
+from freeds.config.api.session import get_session, get_timeout
+
 logger = logging.getLogger(__name__)
 
+# Remembers if the config api server is reachable, see FREEDS_CONFIG_PROBE_WINDOW.
+api_circuit = CircuitBreaker()
+
+DEFAULT_MAX_WORKERS = 8
+
+# None until we've asked the server for a batch of configs, then True/False.
+_batch_supported: Union[None, bool] = None
+
+# url -> (etag, last modified, json body) of responses carrying validators, used for conditional requests.
+_validated: dict[str, tuple[Union[None, str], Union[None, str], dict[str, Any]]] = {}
+_validated_lock = threading.Lock()
+
 
 def get_config_url(config_name: Union[None, str] = None) -> str:
     """Get the config api server url."""
@@ -17,12 +35,13 @@ def get_config_url(config_name: Union[None, str] = None) -> str:
     return f"{base_url}{config_name}" if config_name else base_url
 
 
-def is_api_avaiable() -> bool:
-    """Check if the config api server is available."""
+def probe_api() -> bool:
+    """Check if the config api server responds, always calling the server."""
     try:
         url = get_config_url()
 
-        response = requests.head(url)
+        # no retries, a down server must fail fast (the circuit breaker remembers it)
+        response = get_session(retry=False).head(url, timeout=get_timeout())
         if response.status_code != 200:
             logger.error(f"Config API server on {url} returned {response.status_code}, {response.text}")
         return response.status_code == 200
@@ -31,19 +50,68 @@ def is_api_avaiable() -> bool:
         return False
 
 
+def is_api_avaiable() -> bool:
+    """Check if the config api server is available, the result is remembered for FREEDS_CONFIG_PROBE_WINDOW seconds."""
+    return api_circuit.check(probe_api)
+
+
+def clear_validated() -> None:
+    """Forget all remembered responses, next requests are unconditional."""
+    with _validated_lock:
+        _validated.clear()
+
+
+def _conditional_headers(url: str) -> dict[str, str]:
+    with _validated_lock:
+        entry = _validated.get(url)
+    if entry is None:
+        return {}
+    etag, last_modified, _ = entry
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
 def get_full_config_response(config_name: str) -> dict[str, Any]:
-    """Get a config from the config api server."""
+    """Get a config from the config api server.
+    Responses with an ETag or Last-Modified header are remembered and revalidated with a conditional request,
+    a 304 Not Modified is served from the remembered response."""
     if config_name is None:
         raise ValueError("Config name cannot be None")
 
     config_url = get_config_url(config_name)
 
-    response = requests.get(config_url)
+    try:
+        response = get_session().get(config_url, headers=_conditional_headers(config_url), timeout=get_timeout())
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        api_circuit.record_failure()
+        raise
+    if response.status_code == 304:
+        with _validated_lock:
+            entry = _validated.get(config_url)
+        if entry is not None:
+            logger.debug("Config %s not modified, using remembered response.", config_name)
+            return copy.deepcopy(entry[2])
+        # we didn't send validators, so this is unexpected, ask again without them
+        response = get_session().get(config_url, timeout=get_timeout())
+
     response.raise_for_status()
-    if response.json() is None:
+    data = response.json()
+    if data is None:
         raise ValueError(f"Config '{config_name}' not found. config server response: {response.text}")
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    with _validated_lock:
+        if etag or last_modified:
+            _validated[config_url] = (etag, last_modified, copy.deepcopy(data))
+        else:
+            _validated.pop(config_url, None)
     # we're basically only checking for empty files, if there is a config element we assume it to be ok.
-    return cast(dict[str, Any], response.json())
+    return cast(dict[str, Any], data)
 
 
 def get_config_from_api(config_name: str) -> dict[str, Any]:
@@ -60,3 +128,49 @@ def get_meta(config_name: str) -> Union[None, dict[str, Any]]:
     """Get the meta data from the config api response."""
     meta = get_full_config_response(config_name=config_name).get("meta")
     return cast(dict[str, Any], meta) if meta else None
+
+
+def _get_configs_batch(config_names: list[str]) -> Union[None, dict[str, dict[str, Any]]]:
+    """Get many configs in one request: GET <config url>?names=a,b returning {"configs": {"a": {"config": ...}}}.
+    Returns None if the server doesn't support batch requests, which is remembered for the process."""
+    global _batch_supported
+    try:
+        response = get_session().get(get_config_url(), params={"names": ",".join(config_names)}, timeout=get_timeout())
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        api_circuit.record_failure()
+        raise
+    if response.status_code in (400, 404, 405, 501):
+        _batch_supported = False
+        return None
+    response.raise_for_status()
+    data = response.json()
+    configs = data.get("configs") if isinstance(data, dict) else None
+    if not isinstance(configs, dict):
+        _batch_supported = False
+        return None
+    _batch_supported = True
+
+    result: dict[str, dict[str, Any]] = {}
+    for name in config_names:
+        cfg = (configs.get(name) or {}).get("config")
+        if cfg is None:
+            raise FileNotFoundError(f"Config {name} not found in API.")
+        result[name] = cast(dict[str, Any], cfg)
+    return result
+
+
+def get_configs_from_api(config_names: list[str], max_workers: int = DEFAULT_MAX_WORKERS) -> dict[str, dict[str, Any]]:
+    """Get many configs from the api as a dict of config name to config.
+    Uses a single batch request if the server supports it, otherwise fetches the configs concurrently."""
+    names = list(dict.fromkeys(config_names))
+    if not names:
+        return {}
+    if _batch_supported is not False and len(names) > 1:
+        batch = _get_configs_batch(names)
+        if batch is not None:
+            return batch
+    if len(names) == 1:
+        return {names[0]: get_config_from_api(names[0])}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(names))) as executor:
+        cfgs = list(executor.map(get_config_from_api, names))
+    return dict(zip(names, cfgs))
@@ -0,0 +1,89 @@
+"""Shared, pooled http session for talking to the config api server."""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_CONNECT_TIMEOUT = 2.0
+DEFAULT_READ_TIMEOUT = 10.0
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.2
+DEFAULT_POOL_SIZE = 10
+
+# sessions by whether they retry, the availability probe uses one that doesn't
+_sessions: dict[bool, requests.Session] = {}
+_session_lock = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got '{value}'.")
+
+
+def get_timeout() -> tuple[float, float]:
+    """Get the (connect, read) timeout in seconds from FREEDS_CONFIG_CONNECT_TIMEOUT and FREEDS_CONFIG_READ_TIMEOUT.
+    FREEDS_CONFIG_TIMEOUT, if set, is used for both where the specific one isn't."""
+    connect, read = DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+    if "FREEDS_CONFIG_TIMEOUT" in os.environ:
+        connect = read = _env_float("FREEDS_CONFIG_TIMEOUT", DEFAULT_READ_TIMEOUT)
+    return (
+        _env_float("FREEDS_CONFIG_CONNECT_TIMEOUT", connect),
+        _env_float("FREEDS_CONFIG_READ_TIMEOUT", read),
+    )
+
+
+def make_session(retry: bool = True) -> requests.Session:
+    """Create a keep-alive session retrying connection errors and 502/503/504 with exponential backoff.
+    FREEDS_CONFIG_RETRIES and FREEDS_CONFIG_POOL_SIZE override the retry count and connection pool size.
+    With retry=False nothing is retried, for a probe that should fail fast."""
+    retries = Retry(
+        total=int(_env_float("FREEDS_CONFIG_RETRIES", DEFAULT_RETRIES)) if retry else 0,
+        backoff_factor=DEFAULT_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"HEAD", "GET"}),
+        raise_on_status=False,
+    )
+    pool_size = int(_env_float("FREEDS_CONFIG_POOL_SIZE", DEFAULT_POOL_SIZE))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept"] = "application/json"
+    return session
+
+
+def get_session(retry: bool = True) -> requests.Session:
+    """Get the process wide session, created on first use. retry=False gets the session that doesn't retry."""
+    session = _sessions.get(retry)
+    if session is None:
+        with _session_lock:
+            session = _sessions.get(retry)
+            if session is None:
+                session = _sessions[retry] = make_session(retry)
+    return session
+
+
+def close_session() -> None:
+    """Close the shared sessions, the next get_session() creates a new one."""
+    with _session_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _forget_session() -> None:
+    # pooled sockets must not be shared with a forked child (airflow workers fork), start over in the child.
+    global _session_lock
+    _sessions.clear()
+    _session_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_session)
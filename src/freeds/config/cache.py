@@ -0,0 +1,98 @@
+"""In-process cache for configs, sitting in front of the api and file backends."""
+
+import copy
+import os
+import threading
+import time
+from typing import Any, Optional, Union
+
+DEFAULT_TTL = 60.0
+
+
+def get_default_ttl() -> float:
+    """Get the cache ttl in seconds from FREEDS_CONFIG_CACHE_TTL, 0 disables caching."""
+    value = os.environ.get("FREEDS_CONFIG_CACHE_TTL")
+    if value is None:
+        return DEFAULT_TTL
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        raise ValueError(f"FREEDS_CONFIG_CACHE_TTL must be a number of seconds, got '{value}'.")
+
+
+class ConfigCache:
+    """Thread safe cache of config dicts keyed by config name, entries expire after ttl seconds.
+    Values are copied in and out, so callers can't modify the cached configs by accident."""
+
+    def __init__(self, ttl: Union[None, float] = None) -> None:
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[float, dict[str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self) -> float:
+        """The ttl in seconds, read from the environment unless set explicitly."""
+        return get_default_ttl() if self._ttl is None else self._ttl
+
+    @ttl.setter
+    def ttl(self, value: Union[None, float]) -> None:
+        self._ttl = value
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, config_name: str) -> Optional[dict[str, Any]]:
+        """Get a config from the cache, None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(config_name)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[config_name]
+                self.misses += 1
+                return None
+            self.hits += 1
+            cfg = entry[1]
+        return copy.deepcopy(cfg)
+
+    def put(self, config_name: str, cfg: dict[str, Any]) -> None:
+        """Store a config in the cache, does nothing if the cache is disabled."""
+        ttl = self.ttl
+        if ttl <= 0:
+            return
+        cfg = copy.deepcopy(cfg)
+        with self._lock:
+            self._entries[config_name] = (time.monotonic() + ttl, cfg)
+
+    def invalidate(self, config_name: Union[None, str] = None) -> None:
+        """Drop a single config from the cache, or all configs if no name is given."""
+        with self._lock:
+            if config_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(config_name, None)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Get hit/miss counters and the number of cached configs."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def __contains__(self, config_name: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(config_name)
+            return entry is not None and entry[0] > time.monotonic()
+
+
+config_cache = ConfigCache()
+
+
+def invalidate_config(config_name: Union[None, str] = None) -> None:
+    """Drop a config (or all configs) from the process wide config cache."""
+    config_cache.invalidate(config_name)
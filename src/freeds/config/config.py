@@ -1,47 +1,140 @@
+import hashlib
 import logging
 import os
-from typing import Any
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Optional, Union
 
-from freeds.config.api import get_config_from_api, is_api_avaiable
+import requests
+
+from freeds.config.api import get_config_from_api, get_configs_from_api, is_api_avaiable
+from freeds.config.cache import config_cache
 from freeds.config.file.config_classes import get_config as get_config_from_file
-from freeds.config.file.config_classes import get_current_config_set
+from freeds.config.file.config_classes import get_configs as get_configs_from_file
+from freeds.config.file.config_classes import ConfigSet, get_current_config_set
+from freeds.config.file.file_cache import StatKey
 from freeds.utils import RootConfig
+from freeds.utils.profiling import timed_config
 
 logger = logging.getLogger(__name__)
 
 
-def get_config(config_name: str) -> dict[str, Any]:
-    """Get a config, from api server if available or from file if avaiable."""
+def get_config(config_name: str, use_cache: bool = True) -> dict[str, Any]:
+    """Get a config, from the process cache, api server if available or from file if avaiable.
+    Set FREEDS_CONFIG_CACHE_TTL to control how long (seconds) configs are cached, 0 disables the cache."""
     if not config_name:
         raise ValueError("A config_name must be provided.")
 
+    if use_cache:
+        cached = config_cache.get(config_name)
+        if cached is not None:
+            return cached
+
+    with timed_config(config_name):
+        cfg = _load_config(config_name)
+    if use_cache:
+        config_cache.put(config_name, cfg)
+    return cfg
+
+
+def _load_config(config_name: str) -> dict[str, Any]:
+    """Load a config, from api server if available or from file if avaiable."""
     if is_api_avaiable():
         logger.debug("Using API to get config: %s", config_name)
-        cfg = get_config_from_api(config_name)
+        try:
+            cfg = get_config_from_api(config_name)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            # the api circuit is now open, so following calls go straight to file
+            logger.warning(f"Config API call failed, falling back to file for config {config_name}: {e}")
+            return _load_config_from_file(config_name)
         if cfg is None:
             raise FileNotFoundError(f"Config {config_name} not found in API.")
         return cfg
     else:
-        logger.debug("Reading config from file: %s", config_name)
-        cfg_file = get_config_from_file(config_name)
+        return _load_config_from_file(config_name)
+
+
+def _load_config_from_file(config_name: str) -> dict[str, Any]:
+    logger.debug("Reading config from file: %s", config_name)
+    cfg_file = get_config_from_file(config_name)
+    if cfg_file is None:
+        raise FileNotFoundError(f"Config {config_name} not found in files.")
+    return cfg_file.get_config()
+
+
+def get_configs(config_names: list[str], use_cache: bool = True) -> dict[str, dict[str, Any]]:
+    """Get many configs as a dict of config name to config, in one round trip to the api server or one file scan.
+    Configs in the process cache are not fetched again."""
+    if not all(config_names):
+        raise ValueError("A config_name must be provided.")
+
+    result: dict[str, dict[str, Any]] = {}
+    missing: list[str] = []
+    for name in dict.fromkeys(config_names):
+        cached = config_cache.get(name) if use_cache else None
+        if cached is None:
+            missing.append(name)
+        else:
+            result[name] = cached
+
+    if missing:
+        with timed_config(",".join(missing)):
+            loaded = _load_configs(missing)
+        for name, cfg in loaded.items():
+            if use_cache:
+                config_cache.put(name, cfg)
+            result[name] = cfg
+    return {name: result[name] for name in config_names}
+
+
+def _load_configs(config_names: list[str]) -> dict[str, dict[str, Any]]:
+    """Load configs, from api server if available or from file if avaiable."""
+    if is_api_avaiable():
+        logger.debug("Using API to get configs: %s", config_names)
+        try:
+            return get_configs_from_api(config_names)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            logger.warning(f"Config API call failed, falling back to file for configs {config_names}: {e}")
+    return _load_configs_from_file(config_names)
+
+
+def _load_configs_from_file(config_names: list[str]) -> dict[str, dict[str, Any]]:
+    logger.debug("Reading configs from file: %s", config_names)
+    result: dict[str, dict[str, Any]] = {}
+    for name, cfg_file in get_configs_from_file(config_names).items():
         if cfg_file is None:
-            raise FileNotFoundError(f"Config {config_name} not found in files.")
-        return cfg_file.get_config()
+            raise FileNotFoundError(f"Config {name} not found in files.")
+        result[name] = cfg_file.get_config()
+    return result
 
 
-def get_env() -> dict[str, str]:
-    """Get all envs as a dict.
-    Root path and config url are always envs.
-    Additionally all config values are converted to env values."""
-    rcfg = RootConfig()
+EnvFingerprint = tuple[Any, ...]
+
+_env_lock = threading.Lock()
+_env_cache: Optional[tuple[EnvFingerprint, dict[str, str]]] = None
+
+
+def config_set_fingerprint(cfg_set: ConfigSet) -> EnvFingerprint:
+    """Identify the state of a config set, the folders and the (mtime, size, inode) of every file in it.
+    Any change to a config file, or a file added or removed, gives a new fingerprint."""
+    files = []
+    for name, cfg_file in sorted(cfg_set.config_set.items()):
+        try:
+            key: Optional[StatKey] = cfg_file.stat_key()
+        except FileNotFoundError:
+            key = None
+        files.append((name, str(cfg_file.source_file_path), key))
+    return (str(cfg_set.configs_path), str(cfg_set.locals_path), tuple(files))
 
+
+def _build_env(rcfg: RootConfig, cfg_set: ConfigSet) -> dict[str, str]:
     envs = {
         "FREEDS_ROOT_PATH": str(rcfg.root_path),
         "FREEDS_CONFIGS_PATH": str(rcfg.configs_path),
         "FREEDS_LOCALS_PATH": str(rcfg.locals_path),
         "FREEDS_CONFIG_URL": "http://freeds-config:8005/api/configs/"
         }
-    cfg_set = get_current_config_set()
     for cfg_file in (f for f in cfg_set.config_set.values()):
         for key, value in cfg_file.get_config().items():
             if isinstance(value, list) or isinstance(value, dict):
@@ -51,10 +144,93 @@ def get_env() -> dict[str, str]:
     return envs
 
 
+def _get_env_with_fingerprint() -> tuple[str, dict[str, str]]:
+    global _env_cache
+    rcfg = RootConfig()
+    cfg_set = get_current_config_set()
+    fingerprint = (str(rcfg.root_path), config_set_fingerprint(cfg_set))
+    with _env_lock:
+        if _env_cache is not None and _env_cache[0] == fingerprint:
+            envs = _env_cache[1]
+        else:
+            envs = _build_env(rcfg, cfg_set)
+            _env_cache = (fingerprint, envs)
+    digest = hashlib.sha1(repr(fingerprint).encode()).hexdigest()
+    return digest, dict(envs)
+
+
+def get_env() -> dict[str, str]:
+    """Get all envs as a dict.
+    Root path and config url are always envs.
+    Additionally all config values are converted to env values.
+    The result is reused until a config file is changed, added or removed."""
+    return _get_env_with_fingerprint()[1]
+
+
+def clear_env_cache() -> None:
+    """Forget the computed envs, the next get_env reads all configs again."""
+    global _env_cache
+    with _env_lock:
+        _env_cache = None
+
+
 def set_env() -> None:
     """set all env values"""
     for key, value in get_env().items():
         os.environ[key] = value
 
+
+ENV_FILE_NAME = "freeds.env"
+ENV_FILE_HEADER = "# freeds env, generated by `freeds env --file`, fingerprint: "
+
+
+def env_file_path() -> Path:
+    """Get the env file path, FREEDS_ENV_FILE or freeds.env in the freeds root folder."""
+    env_path = os.environ.get("FREEDS_ENV_FILE")
+    if env_path:
+        return Path(env_path)
+    root_path = RootConfig().root_path
+    if root_path is None:
+        raise FileNotFoundError("No freeds root folder configured, can't place the env file.")
+    return Path(root_path) / ENV_FILE_NAME
+
+
+def _env_file_value(value: str) -> str:
+    # single quoted values are taken literally by docker compose, double quotes are needed for ' and newlines
+    if "'" not in value and "\n" not in value:
+        return f"'{value}'"
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("$", "$$")
+    return f'"{escaped}"'
+
+
+def write_env_file(path: Union[None, str, Path] = None, force: bool = False) -> tuple[Path, bool]:
+    """Write all envs to a docker compose env file, for `docker compose --env-file <path>`.
+    The file is only rewritten when the configs changed since it was written, unless force is set.
+    Returns the path and whether the file was written."""
+    path = Path(path) if path is not None else env_file_path()
+    digest, envs = _get_env_with_fingerprint()
+    header = f"{ENV_FILE_HEADER}{digest}\n"
+    if not force:
+        try:
+            with open(path, "r") as file:
+                if file.readline() == header:
+                    return path, False
+        except FileNotFoundError:
+            pass
+
+    lines = [header] + [f"{key}={_env_file_value(value)}\n" for key, value in envs.items()]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as file:
+            file.writelines(lines)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    logger.debug("Wrote %s envs to %s", len(envs), path)
+    return path, True
+
+
 if __name__ == '__main__':
     print(get_env())
@@ -1,8 +1,19 @@
 from .config_classes import (
 
     get_config,
+    get_configs,
     get_current_config_set,
 
 )
+from .file_cache import ParsedFileCache, parsed_cache
+from .watcher import ConfigWatcher, watch_configs
 
-__all__ = ["get_current_config_set", "get_config"]
+__all__ = [
+    "get_current_config_set",
+    "get_config",
+    "get_configs",
+    "ParsedFileCache",
+    "parsed_cache",
+    "ConfigWatcher",
+    "watch_configs",
+]
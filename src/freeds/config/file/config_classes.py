@@ -2,23 +2,21 @@ import os
 from pathlib import Path
 from typing import Any, Optional
 
-import yaml
-
 import freeds.utils.log as log
+from freeds.config.file.file_cache import parsed_cache, stat_key
 from freeds.utils import RootConfig
 
 logger = log.setup_logging(__name__)
 
 
 class ConfigFile:
-    """Class to facade single config file"""
+    """Class to facade single config file, the file is parsed the first time its data is used."""
 
     def __init__(self, file_path: Path, config_set: "ConfigSet", source:str) -> None:
         self.source = source
         self.config_set = config_set
         self.source_file_path = file_path
-        self.data: dict[str,Any] = None
-        self.load()
+        self._data: Optional[dict[str, Any]] = None
 
     @property
     def config_name(self):
@@ -28,34 +26,51 @@ class ConfigFile:
     def is_local(self)->bool:
         return self.source=='locals'
 
+    @property
+    def is_loaded(self) -> bool:
+        return self._data is not None
+
+    @property
+    def data(self) -> dict[str, Any]:
+        """The parsed file content, loaded on first access."""
+        if self._data is None:
+            self.load()
+        return self._data  # type: ignore[return-value]
+
+    @data.setter
+    def data(self, value: Optional[dict[str, Any]]) -> None:
+        self._data = value
+
     def load(self) -> None:
+        """(Re)read the file, it is only parsed again if it changed on disk since it was last parsed in this process."""
         if not self.source_file_path.exists():
             raise FileNotFoundError(f"Config file {self.source_file_path} does not exists.")
-        with open(self.source_file_path, "r") as file:
-            data: dict[str, Any] = yaml.safe_load(file)
-            self.data = data
+        data: dict[str, Any] = parsed_cache.load(self.source_file_path)
+        self._data = data
         self.validate()
-        if self.data is None:
+        if self._data is None:
             raise ValueError(f"Config file malformed or empty (data is None) {self.source_file_path}")
 
     def validate(self, raise_for_error: bool = True) -> bool:
         """Check that format is valid, returns true if data is None."""
         message = None
-        if self.data is None:
+        if self._data is None:
             return True
 
-        if message is None and not self.data.get("config"):
+        if message is None and not self._data.get("config"):
             message = "The config has no 'config' root key."
 
         if raise_for_error and message:
             raise (ValueError(message))
         return message is None
 
+    def stat_key(self) -> tuple[int, int, int]:
+        """Get (mtime_ns, size, inode) of the file."""
+        return stat_key(self.source_file_path)
+
     def get_config(self) -> dict[str, Any]:
         """Get the content of the "config" element in the data"""
-        if not self.data:
-            self.load()
-        data: dict[str, Any] = self.data["config"]  # type: ignore[index]
+        data: dict[str, Any] = self.data["config"]
         return data
     def __str__(self):
         return(f'{self.config_name} ({self.source})')
@@ -64,16 +79,19 @@ class ConfigFile:
 
 class ConfigSet:
     """Class for scanning a single set of config files.
-    locals override configs
+    locals override configs.
+    Scanning only lists the file names, files are parsed when their config is used.
     """
 
-    def __init__(self, configs_path: Path, locals_path: Path) -> None:
+    def __init__(self, configs_path: Path, locals_path: Path, scan: bool = True) -> None:
         self.configs_path = configs_path
         self.locals_path = locals_path
+        self.config_set: dict[str, ConfigFile] = {}
 
-        configs = self.list_files(path=configs_path, source='configs')
-        locals =  self.list_files(path=locals_path, source='locals')
-        self.config_set = configs | locals
+        if scan:
+            configs = self.list_files(path=configs_path, source='configs')
+            locals =  self.list_files(path=locals_path, source='locals')
+            self.config_set = configs | locals
 
     def list_files(self, path:Path, source:str) -> dict[str, ConfigFile]:
         result: dict[str, ConfigFile]= {}
@@ -86,27 +104,87 @@ class ConfigSet:
             result[cfg.config_name] = cfg
         return result
 
+    def file_changed(self, path: Path) -> None:
+        """Update the set for a single created, modified or deleted file, without rescanning the folders."""
+        path = Path(path)
+        if path.suffix not in {".yaml", ".yml"}:
+            return
+        if path.parent.resolve() == Path(self.locals_path).resolve():
+            source = 'locals'
+        elif path.parent.resolve() == Path(self.configs_path).resolve():
+            source = 'configs'
+        else:
+            return
+        name = path.stem
+        current = self.config_set.get(name)
+
+        if path.is_file():
+            if current is not None and current.source_file_path == path:
+                current.data = None  # parsed again on next use
+            elif current is None or source == 'locals' or not current.is_local:
+                self.config_set[name] = ConfigFile(file_path=path, config_set=self, source=source)
+            return
+
+        # deleted, a config file takes over when the local file it was overridden by is deleted
+        if current is not None and current.source_file_path == path:
+            del self.config_set[name]
+            if source == 'locals':
+                fallback = [f for f in Path(self.configs_path).glob(f"{name}.y*ml") if f.is_file()]
+                if fallback:
+                    self.config_set[name] = ConfigFile(file_path=fallback[0], config_set=self, source='configs')
+
 
 
 def freeds_config_set() -> ConfigSet:
-    """Get the freeds config set (from config folder in the root freeds folder)."""
+    """Get the freeds config set (from config folder in the root freeds folder).
+    If a config snapshot has been compiled (freeds config compile) it is used while it's fresh
+    and rebuilt when any config file has changed."""
+    from freeds.config.file.snapshot import compile_snapshot, load_snapshot, snapshot_path
+
     cfg = RootConfig()
+    path = snapshot_path(cfg)
+    if path is not None and path.exists():
+        cfg_set = load_snapshot(configs_path=cfg.configs_path, locals_path=cfg.locals_path, path=path)
+        if cfg_set is not None:
+            return cfg_set
+        cfg_set = ConfigSet(configs_path=cfg.configs_path, locals_path=cfg.locals_path)
+        try:
+            compile_snapshot(cfg_set, path)
+        except Exception as e:
+            logger.warning(f"Could not rebuild config snapshot {path}: {e}")
+        return cfg_set
+
     cfg_set = ConfigSet(configs_path=cfg.configs_path, locals_path=cfg.locals_path)
     return cfg_set
 
 
+_pinned_config_set: Optional[ConfigSet] = None
+
+
+def pin_config_set(cfg_set: Optional[ConfigSet]) -> None:
+    """Use this config set instead of scanning the config folders on every call, None goes back to scanning.
+    Long running processes (the freeds daemon) pin a set and keep it current with a ConfigWatcher."""
+    global _pinned_config_set
+    _pinned_config_set = cfg_set
+
+
 def get_current_config_set() -> ConfigSet:
     """get all configured configs, which for now is only freeds"""
+    if _pinned_config_set is not None:
+        return _pinned_config_set
     return freeds_config_set()
 
 
 def get_config(config_name: str) -> Optional[ConfigFile]:
-    """Get config object for the config_name"""
+    """Get config object for the config_name, the file is parsed when its config is used."""
+    cfg_set = get_current_config_set().config_set
+    return cfg_set.get(config_name)
+
+
+def get_configs(config_names: list[str]) -> dict[str, Optional[ConfigFile]]:
+    """Get config objects for many config names, scanning the config folders once."""
     cfg_set = get_current_config_set().config_set
-    cfg = cfg_set.get(config_name)
-    if cfg:
-        cfg.load()
-    return cfg
+    return {name: cfg_set.get(name) for name in config_names}
 
 
 if __name__ == '__main__':
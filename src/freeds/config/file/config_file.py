@@ -4,9 +4,8 @@ import fcntl
 from pathlib import Path
 from typing import Any, Union, cast
 
-import yaml
-
 from freeds.config.file import freeds_root
+from freeds.utils.yaml_io import dump_yaml, load_yaml_file
 
 
 def strip_yaml(config_name: Union[str, Path]) -> str:
@@ -46,8 +45,7 @@ def read_config(config_name: str) -> dict[str, Any]:
     if not file_path.is_file():
         raise ValueError(f"Config '{config_name}' not found in config nor secrets. Looked in {file_path}.")
 
-    with open(file_path, "r") as file:
-        config: dict[str, str] = yaml.safe_load(file)
+    config: dict[str, str] = load_yaml_file(file_path)
     if not config:
         raise ValueError(f"Config '{config_name}' in {file_path} is empty or invalid.")
     if config.get("config") is None:
@@ -63,7 +61,7 @@ def write_config_to_file(config_name: str, config: dict[str, Any]) -> None:
     with open(file_path, "w") as file:
         # Lock the file to prevent race conditions
         fcntl.flock(file, fcntl.LOCK_EX)
-        yaml.dump(config, file, default_flow_style=False)
+        dump_yaml(config, file)
         fcntl.flock(file, fcntl.LOCK_UN)
 
 
@@ -0,0 +1,65 @@
+"""Process wide cache of parsed config files, validated against the file's stat."""
+
+import copy
+import os
+import threading
+from pathlib import Path
+from typing import Any, Union
+
+import freeds.utils.yaml_io as yaml_io
+
+StatKey = tuple[int, int, int]
+
+
+def stat_key(path: Union[str, Path]) -> StatKey:
+    """Get (mtime_ns, size, inode) for a file, a change in any of them means the file changed."""
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class ParsedFileCache:
+    """Thread safe cache of parsed yaml files keyed by path.
+    An entry is used only while the file's (mtime_ns, size, inode) is unchanged, otherwise the file is parsed again.
+    Values are copied out, so callers can't modify the cached data."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[Path, tuple[StatKey, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path: Union[str, Path]) -> Any:
+        """Get the parsed content of a yaml file, parsing it only if it changed since last time."""
+        path = Path(path).absolute()
+        key = stat_key(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+
+        data = yaml_io.load_yaml_file(path)
+        with self._lock:
+            self._entries[path] = (key, data)
+        return copy.deepcopy(data)
+
+    def invalidate(self, path: Union[None, str, Path] = None) -> None:
+        """Drop a single file from the cache, or all files if no path is given."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(Path(path).absolute(), None)
+
+    def stats(self) -> dict[str, int]:
+        """Get hit/miss counters and the number of cached files."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def __contains__(self, path: Union[str, Path]) -> bool:
+        with self._lock:
+            return Path(path).absolute() in self._entries
+
+
+parsed_cache = ParsedFileCache()
@@ -0,0 +1,127 @@
+"""Compiled config snapshot: all configs and locals parsed and merged into a single file.
+Loading it is one read and a stat per config file instead of parsing dozens of yaml files."""
+
+import logging
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from freeds.config.file.config_classes import ConfigFile, ConfigSet
+from freeds.config.file.file_cache import stat_key
+from freeds.utils import RootConfig
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FILE_NAME = ".config-snapshot.pickle"
+
+
+def snapshot_path(root_config: Optional[RootConfig] = None) -> Optional[Path]:
+    """Get the snapshot file path, FREEDS_CONFIG_SNAPSHOT or a file in the freeds root folder."""
+    env_path = os.environ.get("FREEDS_CONFIG_SNAPSHOT")
+    if env_path:
+        return Path(env_path)
+    root_config = root_config or RootConfig()
+    if root_config.root_path is None:
+        return None
+    return Path(root_config.root_path) / SNAPSHOT_FILE_NAME
+
+
+def _dir_mtime(path: Union[str, Path]) -> Optional[int]:
+    # files added, removed or renamed (editors saving by rename) change the folder mtime
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def compile_snapshot(cfg_set: ConfigSet, path: Union[str, Path]) -> Path:
+    """Parse all configs in the set and write them to a snapshot file, along with the stats used to check freshness."""
+    path = Path(path)
+    configs: dict[str, dict[str, Any]] = {}
+    for name, cfg_file in cfg_set.config_set.items():
+        key = cfg_file.stat_key()
+        configs[name] = {
+            "path": str(cfg_file.source_file_path),
+            "source": cfg_file.source,
+            "stat": key,
+            "data": cfg_file.data,
+        }
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "configs_path": str(cfg_set.configs_path),
+        "locals_path": str(cfg_set.locals_path),
+        "dirs": {
+            str(cfg_set.configs_path): _dir_mtime(cfg_set.configs_path),
+            str(cfg_set.locals_path): _dir_mtime(cfg_set.locals_path),
+        },
+        "configs": configs,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # write and rename, so readers never see a half written snapshot
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    logger.debug("Compiled %s configs into %s", len(configs), path)
+    return path
+
+
+def _read_snapshot(path: Path) -> Optional[dict[str, Any]]:
+    try:
+        with open(path, "rb") as file:
+            snapshot = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable config snapshot {path}: {e}")
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    return snapshot
+
+
+def is_fresh(snapshot: dict[str, Any], configs_path: Union[str, Path], locals_path: Union[str, Path]) -> bool:
+    """Check that the snapshot was compiled from these folders and no config file has changed since."""
+    if snapshot["configs_path"] != str(configs_path) or snapshot["locals_path"] != str(locals_path):
+        return False
+    for folder, mtime in snapshot["dirs"].items():
+        if _dir_mtime(folder) != mtime:
+            return False
+    for entry in snapshot["configs"].values():
+        try:
+            if tuple(entry["stat"]) != stat_key(entry["path"]):
+                return False
+        except FileNotFoundError:
+            return False
+    return True
+
+
+def load_snapshot(
+    configs_path: Union[str, Path], locals_path: Union[str, Path], path: Union[str, Path]
+) -> Optional[ConfigSet]:
+    """Load a ConfigSet from the snapshot, with all configs already parsed. Returns None if it is missing or stale."""
+    snapshot = _read_snapshot(Path(path))
+    if snapshot is None or not is_fresh(snapshot, configs_path, locals_path):
+        return None
+    cfg_set = ConfigSet(configs_path=Path(configs_path), locals_path=Path(locals_path), scan=False)
+    for name, entry in snapshot["configs"].items():
+        cfg_file = ConfigFile(file_path=Path(entry["path"]), config_set=cfg_set, source=entry["source"])
+        cfg_file.data = entry["data"]
+        cfg_set.config_set[name] = cfg_file
+    return cfg_set
+
+
+def remove_snapshot(path: Optional[Path] = None) -> bool:
+    """Delete the snapshot file, config sets are scanned from the folders again. Returns False if there was none."""
+    path = path or snapshot_path()
+    if path is None or not path.exists():
+        return False
+    path.unlink()
+    return True
@@ -0,0 +1,265 @@
+"""Watch the config folders and invalidate cached configs when files change.
+Uses inotify on linux and falls back to polling file stats elsewhere."""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from freeds.config.cache import config_cache
+from freeds.config.file.config_classes import ConfigSet
+from freeds.config.file.file_cache import StatKey, parsed_cache, stat_key
+from freeds.utils import RootConfig
+
+logger = logging.getLogger(__name__)
+
+ConfigCallback = Callable[[str, Path], None]
+
+YAML_SUFFIXES = {".yaml", ".yml"}
+
+# from <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """Minimal ctypes binding to linux inotify, reporting the paths of changed files in watched directories."""
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.watches: dict[int, Path] = {}
+
+    @staticmethod
+    def is_available() -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            return hasattr(ctypes.CDLL(ctypes.util.find_library("c")), "inotify_init1")
+        except OSError:
+            return False
+
+    def add_watch(self, path: Path) -> None:
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), str(path))
+        self.watches[wd] = path
+
+    def read(self, timeout: float, wake_fd: Optional[int] = None) -> Optional[set[Path]]:
+        """Wait up to timeout seconds for events, returns changed paths or None if the event queue overflowed.
+        Returns early, with no changes, when wake_fd becomes readable."""
+        fds = [self.fd] if wake_fd is None else [self.fd, wake_fd]
+        ready, _, _ = select.select(fds, [], [], timeout)
+        if self.fd not in ready:
+            return set()
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed: set[Path] = set()
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if name and wd in self.watches:
+                changed.add(self.watches[wd] / os.fsdecode(name))
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class ConfigWatcher:
+    """Watches the configs and locals folders, on a change to a yaml file the file is dropped from
+    the parsed file cache and the config cache, the watched ConfigSet (if any) is updated and callbacks are
+    called with (config_name, path). Only changed files are touched, nothing is rescanned.
+
+    Use start()/stop() (or a with block) to watch in a background thread, or call check() to poll on demand."""
+
+    def __init__(
+        self,
+        config_set: Optional[ConfigSet] = None,
+        paths: Optional[list[Path]] = None,
+        poll_interval: float = 1.0,
+        use_inotify: Optional[bool] = None,
+    ) -> None:
+        self.config_set = config_set
+        if paths is None:
+            if config_set is not None:
+                paths = [Path(config_set.configs_path), Path(config_set.locals_path)]
+            else:
+                root = RootConfig()
+                paths = [root.configs_path, root.locals_path]
+        self.paths = [Path(p) for p in paths if p is not None]
+        self.poll_interval = poll_interval
+        self.use_inotify = Inotify.is_available() if use_inotify is None else use_inotify
+        self._callbacks: list[ConfigCallback] = []
+        self._stats: Optional[dict[Path, StatKey]] = None
+        self._inotify: Optional[Inotify] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake: Optional[tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def register(self, callback: ConfigCallback) -> None:
+        """Call callback(config_name, path) when a config file changes."""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def unregister(self, callback: ConfigCallback) -> None:
+        with self._lock:
+            self._callbacks.remove(callback)
+
+    def _scan(self) -> dict[Path, StatKey]:
+        stats: dict[Path, StatKey] = {}
+        for folder in self.paths:
+            try:
+                entries = list(os.scandir(folder))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                path = folder / entry.name
+                if path.suffix not in YAML_SUFFIXES:
+                    continue
+                try:
+                    stats[path] = stat_key(path)
+                except FileNotFoundError:
+                    continue
+        return stats
+
+    def check(self) -> list[Path]:
+        """Compare file stats with the previous check and handle the changed files, returns the changed paths.
+        The first call only records the current state."""
+        stats = self._scan()
+        with self._lock:
+            previous = self._stats
+            self._stats = stats
+        if previous is None:
+            return []
+        changed = sorted(p for p in stats.keys() | previous.keys() if stats.get(p) != previous.get(p))
+        self.handle_changes(changed)
+        return changed
+
+    def handle_changes(self, paths: list[Path]) -> None:
+        """Invalidate caches for the changed paths and notify callbacks."""
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for path in paths:
+            if path.suffix not in YAML_SUFFIXES:
+                continue
+            logger.debug("Config file changed: %s", path)
+            parsed_cache.invalidate(path)
+            config_cache.invalidate(path.stem)
+            if self.config_set is not None:
+                self.config_set.file_changed(path)
+            for callback in callbacks:
+                try:
+                    callback(path.stem, path)
+                except Exception as e:
+                    logger.error(f"Config watcher callback {callback} failed for {path}: {e}")
+
+    def start(self) -> "ConfigWatcher":
+        """Start watching in a daemon thread."""
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+        if self.use_inotify:
+            try:
+                self._inotify = Inotify()
+                for folder in self.paths:
+                    if folder.is_dir():
+                        self._inotify.add_watch(folder)
+                self._wake = os.pipe()
+            except OSError as e:
+                logger.warning(f"inotify not usable, falling back to polling: {e}")
+                self._close_inotify()
+        self._stats = self._scan()
+        self._thread = threading.Thread(target=self._run, name="freeds-config-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the watcher thread."""
+        self._stop.set()
+        if self._wake is not None:
+            os.write(self._wake[1], b"x")
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._close_inotify()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def _close_inotify(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        if self._wake is not None:
+            for fd in self._wake:
+                os.close(fd)
+            self._wake = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self._inotify is None:
+                    self._stop.wait(self.poll_interval)
+                    self.check()
+                    continue
+                wake_fd = self._wake[0] if self._wake is not None else None
+                changed = self._inotify.read(timeout=self.poll_interval, wake_fd=wake_fd)
+                if changed is None:
+                    logger.warning("inotify queue overflowed, comparing file stats instead.")
+                    self.check()
+                elif changed:
+                    self.handle_changes(sorted(changed))
+            except Exception as e:
+                logger.error(f"Config watcher failed: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def __enter__(self) -> "ConfigWatcher":
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+
+def watch_configs(
+    callback: Union[None, ConfigCallback] = None, config_set: Optional[ConfigSet] = None
+) -> ConfigWatcher:
+    """Start watching the freeds config folders, optionally calling callback(config_name, path) on changes."""
+    watcher = ConfigWatcher(config_set=config_set)
+    if callback is not None:
+        watcher.register(callback)
+    return watcher.start()
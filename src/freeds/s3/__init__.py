@@ -1,22 +1,32 @@
 from .s3 import (
+    S3Object,
     as_urls,
     bucket_exists,
+    clear_s3_client_cache,
     create_bucket,
     delete_bucket,
-    delete_prefix,
     file_exists,
+    files_exist,
     get_file,
     get_s3_client,
     is_s3_service_available,
+    iter_objects,
     list_files,
     list_files_for_dates,
     make_date_prefix,
     put_file,
 )
+from .delete import DeleteError, DeleteReport, delete_keys, delete_prefix
+from .listing_cache import ListingCache
+from .streaming import open_read, open_write
+from .sync import SyncReport, sync_from_s3, sync_to_s3
+from .transfer import TransferReport, TransferResult, get_files, make_transfer_config, put_files
 
 __all__ = [
     "bucket_exists",
+    "clear_s3_client_cache",
     "file_exists",
+    "files_exist",
     "create_bucket",
     "delete_bucket",
     "delete_prefix",
@@ -24,8 +34,24 @@ __all__ = [
     "get_s3_client",
     "is_s3_service_available",
     "list_files",
+    "iter_objects",
+    "S3Object",
     "list_files_for_dates",
     "make_date_prefix",
     "put_file",
     "as_urls",
+    "ListingCache",
+    "delete_keys",
+    "DeleteReport",
+    "DeleteError",
+    "put_files",
+    "get_files",
+    "make_transfer_config",
+    "TransferReport",
+    "TransferResult",
+    "open_read",
+    "open_write",
+    "sync_to_s3",
+    "sync_from_s3",
+    "SyncReport",
 ]
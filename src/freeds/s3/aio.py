@@ -0,0 +1,379 @@
+"""Asyncio variants of the freeds.s3 functions, for coordinating many S3 operations from one event loop.
+
+With the aio extra (pip install freeds[aio], aiobotocore) the calls are native async I/O: each event loop gets one
+aiobotocore client with a connection pool of max_pool_connections (see freeds.s3.get_client_config) and at most
+FREEDS_S3_ASYNC_CONCURRENCY requests (default: the client's max_pool_connections) are in flight, a waiting call
+holds no thread. Close the loop's client with `await aio.close()` before the loop ends.
+
+Without aiobotocore each call runs the blocking freeds.s3 function on the shared boto3 client in a thread of a
+dedicated pool of FREEDS_S3_ASYNC_CONCURRENCY threads and holds that thread until it returns.
+
+    files, ok = await asyncio.gather(aio.list_files("2024/2024-05", "raw"), aio.put_file(path, "raw", "x.parquet"))
+    await aio.close()
+"""
+
+import asyncio
+import contextlib
+import datetime as dt
+import functools
+import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, TypeVar, Union
+
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
+from freeds.config import get_config
+from freeds.s3 import delete, s3
+from freeds.s3.listing_cache import invalidate_cached_listings
+from freeds.s3.transfer import make_transfer_config
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session
+
+    HAS_AIOBOTOCORE = True
+except ImportError:  # the aio extra isn't installed, calls run on a thread pool
+    HAS_AIOBOTOCORE = False
+
+if TYPE_CHECKING:
+    from freeds.s3.delete import DeleteReport
+    from freeds.s3.listing_cache import ListingCache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+_executor: Union[None, ThreadPoolExecutor] = None
+_executor_size = 0
+_executor_lock = threading.Lock()
+
+
+def max_concurrency() -> int:
+    """Get the number of S3 requests allowed in flight, the size of the thread pool without aiobotocore."""
+    value = os.environ.get("FREEDS_S3_ASYNC_CONCURRENCY")
+    if value is None:
+        return s3.DEFAULT_MAX_POOL_CONNECTIONS
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"FREEDS_S3_ASYNC_CONCURRENCY must be a whole number, got '{value}'.")
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """The thread pool for the calls, created again when FREEDS_S3_ASYNC_CONCURRENCY changes."""
+    global _executor, _executor_size
+    size = max_concurrency()
+    with _executor_lock:
+        if _executor is None or _executor_size != size:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="freeds-s3-aio")
+            _executor_size = size
+        return _executor
+
+
+async def _call(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+class _LoopClient:
+    """The aiobotocore client of an event loop and the semaphore limiting its requests in flight."""
+
+    def __init__(self, key: tuple[Any, ...], client: Any, stack: contextlib.AsyncExitStack, limit: int) -> None:
+        self.key = key
+        self.client = client
+        self.stack = stack
+        self.limit = asyncio.Semaphore(limit)
+
+
+# clients are bound to the loop they were created on
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClient]" = weakref.WeakKeyDictionary()
+_client_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+
+def _forget_pools() -> None:
+    # the pool's threads and the clients' connections don't exist in a forked child
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+    _clients.clear()
+    _client_locks.clear()
+
+
+os.register_at_fork(after_in_child=_forget_pools)
+
+
+async def _get_client() -> _LoopClient:
+    """The running loop's client, created on first use and again when the s3 config or client settings change."""
+    loop = asyncio.get_running_loop()
+    lock = _client_locks.setdefault(loop, asyncio.Lock())
+    async with lock:
+        cfg = get_config("s3")
+        if cfg is None or cfg.get("url") is None:
+            raise ValueError("s3 config not found")
+        client_config = s3.get_client_config(cfg, AioConfig)
+        key = (
+            cfg["url"],
+            cfg["access_key"],
+            cfg["secret_key"],
+            client_config.max_pool_connections,
+            client_config.retries["max_attempts"],
+            client_config.connect_timeout,
+            client_config.read_timeout,
+            max_concurrency(),
+        )
+        current = _clients.get(loop)
+        if current is None or current.key != key:
+            if current is not None:
+                await current.stack.aclose()
+            stack = contextlib.AsyncExitStack()
+            client = await stack.enter_async_context(
+                get_session().create_client(
+                    "s3",
+                    aws_access_key_id=cfg["access_key"],
+                    aws_secret_access_key=cfg["secret_key"],
+                    endpoint_url=cfg["url"],
+                    config=client_config,
+                )
+            )
+            current = _LoopClient(key, client, stack, max_concurrency())
+            _clients[loop] = current
+        return current
+
+
+async def close() -> None:
+    """Close the running loop's client and its connections, the next call creates a new one."""
+    current = _clients.pop(asyncio.get_running_loop(), None)
+    if current is not None:
+        await current.stack.aclose()
+
+
+async def _key_pages(prefix: str, bucket_name: str) -> AsyncIterator[list[str]]:
+    """Yield the keys under a prefix a listing page (up to 1000 keys) at a time."""
+    loop_client = await _get_client()
+    kwargs: dict[str, Any] = {"Bucket": bucket_name, "Prefix": prefix}
+    while True:
+        async with loop_client.limit:
+            page = await loop_client.client.list_objects_v2(**kwargs)
+        yield [obj["Key"] for obj in page.get("Contents", [])]
+        if not page.get("IsTruncated"):
+            return
+        kwargs["ContinuationToken"] = page["NextContinuationToken"]
+
+
+async def list_files(prefix: str, bucket_name: str) -> list[str]:
+    """List all files with the given prefix, see freeds.s3.list_files."""
+    if not HAS_AIOBOTOCORE:
+        return await _call(s3.list_files, prefix, bucket_name)
+    return [key async for page in _key_pages(prefix, bucket_name) for key in page]
+
+
+async def _multipart_upload(
+    loop_client: _LoopClient, local_path: Union[str, Path], bucket: str, key: str, size: int, config: TransferConfig
+) -> None:
+    """Upload a file in parts of config.multipart_chunksize, config.max_concurrency parts at a time."""
+    client = loop_client.client
+    part_size = config.multipart_chunksize
+    file_limit = asyncio.Semaphore(config.max_concurrency)
+    async with loop_client.limit:
+        upload_id = (await client.create_multipart_upload(Bucket=bucket, Key=key))["UploadId"]
+
+    async def upload_part(number: int) -> dict[str, Any]:
+        # read the part once a request slot is free, only the parts in flight are held in memory
+        async with file_limit, loop_client.limit:
+            with open(local_path, "rb") as f:
+                f.seek((number - 1) * part_size)
+                body = f.read(part_size)
+            response = await client.upload_part(
+                Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=body
+            )
+        return {"PartNumber": number, "ETag": response["ETag"]}
+
+    try:
+        parts = await asyncio.gather(*(upload_part(n) for n in range(1, -(-size // part_size) + 1)))
+        async with loop_client.limit:
+            await client.complete_multipart_upload(
+                Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": list(parts)}
+            )
+    except BaseException:
+        try:
+            await client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        except Exception as e:
+            logger.error(f"Could not abort multipart upload of s3://{bucket}/{key}: {e}")
+        raise
+
+
+async def put_file(
+    local_path: Union[str, Path],
+    bucket: str,
+    file_name: str,
+    prefix: Union[str, None] = None,
+    config: Union[None, TransferConfig] = None,
+) -> bool:
+    """Upload a file to S3, see freeds.s3.put_file. Files from config.multipart_threshold on are uploaded in parts."""
+    if not HAS_AIOBOTOCORE:
+        return await _call(s3.put_file, local_path, bucket, file_name, prefix=prefix, config=config)
+    if prefix and not prefix.endswith("/"):
+        prefix = prefix + "/"
+    s3_key = prefix + file_name if prefix else file_name
+    text = f"{local_path} to bucket '{bucket}' as '{s3_key}'"
+    print(f"Intitating upload: {text}.")
+    try:
+        loop_client = await _get_client()
+        config = config or make_transfer_config()
+        size = os.path.getsize(local_path)
+        if size < config.multipart_threshold:
+            with open(local_path, "rb") as f:
+                body = f.read()
+            async with loop_client.limit:
+                await loop_client.client.put_object(Bucket=bucket, Key=s3_key, Body=body)
+        else:
+            await _multipart_upload(loop_client, local_path, bucket, s3_key, size, config)
+    except Exception as e:
+        print(f"Upload failed {text}: {e}")
+        return False
+    print(f"Upload succeeded: {text}.")
+    invalidate_cached_listings(bucket, [s3_key])
+    return True
+
+
+async def get_file(
+    local_path: Union[str, Path],
+    bucket: str,
+    file_name: str,
+    prefix: Union[str, None] = None,
+    config: Union[None, TransferConfig] = None,
+) -> bool:
+    """Download a file from S3, see freeds.s3.get_file. With aiobotocore the object is streamed to the file
+    with one GET (config isn't used), the file only appears when the download is complete."""
+    if not HAS_AIOBOTOCORE:
+        return await _call(s3.get_file, local_path, bucket, file_name, prefix=prefix, config=config)
+    source_object_name = f"{prefix}/{file_name}" if prefix else file_name
+    text = f"{source_object_name} to {local_path}"
+    print(f"Intitating download: {text}.")
+    partial = Path(f"{local_path}.part")
+    try:
+        loop_client = await _get_client()
+        async with loop_client.limit:
+            response = await loop_client.client.get_object(Bucket=bucket, Key=source_object_name)
+            async with response["Body"] as body:
+                with open(partial, "wb") as f:
+                    async for chunk in body.iter_chunks(DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+        os.replace(partial, local_path)
+    except ClientError as e:
+        partial.unlink(missing_ok=True)
+        print(f"Download failed {source_object_name} from s3: {e}")
+        return False
+    print(f"Download completed: {text}.")
+    return True
+
+
+async def _delete_batch(
+    loop_client: _LoopClient, bucket: str, keys: list[str], retries: int
+) -> tuple[int, dict[str, str], int]:
+    """Delete up to 1000 keys like freeds.s3.delete, retrying throttled or failed keys."""
+    failed: dict[str, str] = {}
+    pending = keys
+    attempt = 0
+    while pending:
+        try:
+            async with loop_client.limit:
+                response = await loop_client.client.delete_objects(
+                    Bucket=bucket, Delete=delete._delete_request(pending)
+                )
+            errors, retryable = delete._response_errors(response)
+        except ClientError as e:
+            errors, retryable = delete._call_errors(e, pending)
+        if attempt >= retries:
+            failed.update(errors)
+            break
+        failed.update({k: v for k, v in errors.items() if k not in retryable})
+        pending = [k for k in pending if k in retryable]
+        if pending:
+            attempt += 1
+            await asyncio.sleep(delete.RETRY_BACKOFF * 2 ** (attempt - 1))
+    return len(keys) - len(failed), failed, attempt
+
+
+async def delete_prefix(
+    bucket: str,
+    prefix: str,
+    dry_run: bool = False,
+    raise_on_error: bool = True,
+    retries: int = delete.DEFAULT_RETRIES,
+) -> "DeleteReport":
+    """Delete all files with a given prefix, see freeds.s3.delete_prefix.
+    Each listing page is deleted as one batch while the listing goes on."""
+    if not HAS_AIOBOTOCORE:
+        return await _call(
+            delete.delete_prefix, bucket, prefix, dry_run=dry_run, retries=retries, raise_on_error=raise_on_error
+        )
+    report = delete.DeleteReport(bucket, dry_run=dry_run)
+    start = time.perf_counter()
+    loop_client = await _get_client()
+    # bound the batches waiting for a request slot, so a long listing doesn't pile up in memory
+    in_flight = asyncio.Semaphore(max_concurrency() * 2)
+
+    async def run(batch: list[str]) -> None:
+        try:
+            report._add_batch(*await _delete_batch(loop_client, bucket, batch, retries))
+        except Exception as e:
+            logger.error(f"Deleting {len(batch)} keys from {bucket} failed: {e}")
+            report._add_batch(0, {k: str(e) for k in batch}, 0)
+        finally:
+            in_flight.release()
+        invalidate_cached_listings(bucket, batch)
+
+    tasks = []
+    async for keys in _key_pages(prefix, bucket):
+        report.listed += len(keys)
+        if dry_run:
+            report.keys.extend(keys)
+        elif keys:
+            await in_flight.acquire()
+            tasks.append(asyncio.create_task(run(keys)))
+    await asyncio.gather(*tasks)
+    report.seconds = time.perf_counter() - start
+    logger.info("S3 delete: %s", report)
+    if raise_on_error and report.failed:
+        raise delete.DeleteError(report)
+    return report
+
+
+async def _list_prefix(
+    prefix: str, bucket_name: str, cache: Union[None, "ListingCache"], last_day: Union[dt.datetime, dt.date]
+) -> list[str]:
+    """List a prefix like freeds.s3 does for list_files_for_dates, through the cache when given one."""
+    keys = cache.get(bucket_name, prefix) if cache is not None else None
+    if keys is None:
+        keys = await list_files(prefix, bucket_name)
+        if cache is not None:
+            # an empty partition may still be backfilled, only settle listings with files
+            cache.put(bucket_name, prefix, keys, immutable=bool(keys) and cache.is_immutable(last_day))
+    return keys
+
+
+async def list_files_for_dates(
+    dates: list[Union[dt.datetime, dt.date]],
+    root_prefix: str,
+    bucket_name: str,
+    collapse_months: bool = False,
+    cache: Union[None, "ListingCache"] = None,
+) -> list[str]:
+    """List all files in the freeds standard date paths for the dates, see freeds.s3.list_files_for_dates.
+    The prefixes are listed concurrently."""
+    prefixes, last_days, listing_of_date = s3._plan_date_listings(dates, root_prefix, collapse_months)
+    listings = await asyncio.gather(
+        *(_list_prefix(prefix, bucket_name, cache, last_day) for prefix, last_day in zip(prefixes, last_days))
+    )
+    return s3._merge_date_listings(list(listings), listing_of_date)
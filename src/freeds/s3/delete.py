@@ -0,0 +1,200 @@
+"""Bulk S3 deletes: keys are deleted in batches of up to 1000 on a thread pool while listing continues."""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Optional
+
+from botocore.exceptions import ClientError
+
+from freeds.s3.listing_cache import invalidate_cached_listings
+from freeds.s3.s3 import get_s3_client, iter_objects
+
+logger = logging.getLogger(__name__)
+
+MAX_DELETE_BATCH = 1000  # the DeleteObjects limit
+DEFAULT_DELETE_WORKERS = 4
+DEFAULT_RETRIES = 3
+RETRY_BACKOFF = 0.2
+RETRYABLE_CODES = {
+    "SlowDown",
+    "Throttling",
+    "ThrottlingException",
+    "RequestTimeout",
+    "InternalError",
+    "ServiceUnavailable",
+}
+
+
+class DeleteError(Exception):
+    """Some keys could not be deleted, the report has the failures."""
+
+    def __init__(self, report: "DeleteReport") -> None:
+        self.report = report
+        first_key, first_error = next(iter(report.failed.items()))
+        super().__init__(
+            f"Could not delete {len(report.failed)} of {report.listed} keys from {report.bucket}, "
+            f"first: {first_key}: {first_error}"
+        )
+
+
+class DeleteReport:
+    """Counts and failures of a bulk delete. In a dry run nothing is deleted and keys holds the listed keys,
+    pass them to delete_keys to delete without listing again."""
+
+    def __init__(self, bucket: str, dry_run: bool = False) -> None:
+        self.bucket = bucket
+        self.dry_run = dry_run
+        self.keys: list[str] = []
+        self.listed = 0
+        self.deleted = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed: dict[str, str] = {}
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    @property
+    def throughput(self) -> float:
+        """Deleted keys per second."""
+        return self.deleted / self.seconds if self.seconds > 0 else 0.0
+
+    def _add_batch(self, deleted: int, failed: dict[str, str], retries: int) -> None:
+        with self._lock:
+            self.batches += 1
+            self.deleted += deleted
+            self.failed.update(failed)
+            self.retries += retries
+
+    def __str__(self) -> str:
+        if self.dry_run:
+            return f"dry run, {self.listed} keys would be deleted from {self.bucket}"
+        return (
+            f"deleted {self.deleted}/{self.listed} keys from {self.bucket} in {self.batches} batches, "
+            f"{len(self.failed)} failed, {self.seconds:.2f}s ({self.throughput:.0f} keys/s)"
+        )
+
+
+def _delete_request(keys: list[str]) -> dict[str, Any]:
+    return {"Objects": [{"Key": k} for k in keys], "Quiet": True}
+
+
+def _call_errors(e: ClientError, keys: list[str]) -> tuple[dict[str, str], set[str]]:
+    """The errors by key of a failed DeleteObjects call and the keys worth retrying."""
+    code = e.response.get("Error", {}).get("Code", "")
+    return {k: f"{code}: {e}" for k in keys}, set(keys) if code in RETRYABLE_CODES else set()
+
+
+def _response_errors(response: dict[str, Any]) -> tuple[dict[str, str], set[str]]:
+    """The errors by key in a DeleteObjects response and the keys worth retrying."""
+    errors: dict[str, str] = {}
+    retryable: set[str] = set()
+    for error in response.get("Errors", []):
+        errors[error["Key"]] = f"{error.get('Code')}: {error.get('Message')}"
+        if error.get("Code") in RETRYABLE_CODES:
+            retryable.add(error["Key"])
+    return errors, retryable
+
+
+def _delete_attempt(s3_client: Any, bucket: str, keys: list[str]) -> tuple[dict[str, str], set[str]]:
+    """One DeleteObjects call, returns the errors by key and the keys worth retrying."""
+    try:
+        response = s3_client.delete_objects(Bucket=bucket, Delete=_delete_request(keys))
+    except ClientError as e:
+        return _call_errors(e, keys)
+    return _response_errors(response)
+
+
+def _delete_batch(s3_client: Any, bucket: str, keys: list[str], retries: int) -> tuple[int, dict[str, str], int]:
+    """Delete up to 1000 keys, retrying throttled or failed keys. Returns (deleted, {key: error}, retries used)."""
+    failed: dict[str, str] = {}
+    pending = keys
+    attempt = 0
+    while pending:
+        errors, retryable = _delete_attempt(s3_client, bucket, pending)
+        if attempt >= retries:
+            failed.update(errors)
+            break
+        failed.update({k: v for k, v in errors.items() if k not in retryable})
+        pending = [k for k in pending if k in retryable]
+        if pending:
+            attempt += 1
+            time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+    return len(keys) - len(failed), failed, attempt
+
+
+def delete_keys(
+    bucket: str,
+    keys: Iterable[str],
+    dry_run: bool = False,
+    max_workers: Optional[int] = None,
+    retries: int = DEFAULT_RETRIES,
+    raise_on_error: bool = True,
+) -> DeleteReport:
+    """Delete keys in batches of 1000, max_workers batches at a time (FREEDS_S3_DELETE_WORKERS, default 4).
+    keys can be a lazy iterable (a listing), batches are deleted while it is still being consumed.
+    Keys failing with throttling or server errors are retried up to retries times. When keys still fail a
+    DeleteError is raised after all batches have run, with raise_on_error=False they are only reported
+    in report.failed. A dry run only collects the keys."""
+    report = DeleteReport(bucket, dry_run=dry_run)
+    start = time.perf_counter()
+    if dry_run:
+        report.keys = list(keys)
+        report.listed = len(report.keys)
+        report.seconds = time.perf_counter() - start
+        return report
+
+    s3_client = get_s3_client()
+    workers = max_workers or int(os.environ.get("FREEDS_S3_DELETE_WORKERS", DEFAULT_DELETE_WORKERS))
+    # bound the batches waiting for a worker, so a long listing doesn't pile up in memory
+    in_flight = threading.BoundedSemaphore(workers * 2)
+
+    def run(batch: list[str]) -> None:
+        try:
+            report._add_batch(*_delete_batch(s3_client, bucket, batch, retries))
+        except Exception as e:
+            logger.error(f"Deleting {len(batch)} keys from {bucket} failed: {e}")
+            report._add_batch(0, {k: str(e) for k in batch}, 0)
+        finally:
+            in_flight.release()
+        invalidate_cached_listings(bucket, batch)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        batch: list[str] = []
+        for key in keys:
+            batch.append(key)
+            report.listed += 1
+            if len(batch) == MAX_DELETE_BATCH:
+                in_flight.acquire()
+                pool.submit(run, batch)
+                batch = []
+        if batch:
+            in_flight.acquire()
+            pool.submit(run, batch)
+    report.seconds = time.perf_counter() - start
+    logger.info("S3 delete: %s", report)
+    if raise_on_error and report.failed:
+        raise DeleteError(report)
+    return report
+
+
+def delete_prefix(
+    bucket: str,
+    prefix: str,
+    dry_run: bool = False,
+    max_workers: Optional[int] = None,
+    retries: int = DEFAULT_RETRIES,
+    raise_on_error: bool = True,
+) -> DeleteReport:
+    """Delete all files with a given prefix in a bucket, listing and deleting at the same time.
+    With dry_run the keys are only listed, see delete_keys."""
+    keys = (obj.key for obj in iter_objects(prefix, bucket))
+    return delete_keys(
+        bucket, keys, dry_run=dry_run, max_workers=max_workers, retries=retries, raise_on_error=raise_on_error
+    )
@@ -0,0 +1,160 @@
+"""Local cache of S3 prefix listings, so daily jobs over a sliding date window only list the new partitions.
+Listings are kept in a sqlite file (FREEDS_S3_LISTING_CACHE, default .cache/s3-listing.sqlite in the freeds root).
+A listing expires after ttl seconds, or after immutable_ttl if it is marked immutable: a past date partition
+that isn't expected to change. The freeds.s3 uploads and deletes drop the listings they change from the default cache,
+writes made some other way are picked up when the listing expires."""
+
+import contextlib
+import datetime as dt
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+from freeds.utils import RootConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 3600.0
+DEFAULT_IMMUTABLE_TTL = 7 * 24 * 3600.0
+DEFAULT_SETTLE_DAYS = 2
+CACHE_FILE_NAME = "s3-listing.sqlite"
+
+SCHEMA = """
+create table if not exists listings (
+    bucket text not null,
+    prefix text not null,
+    listed_at real not null,
+    immutable integer not null,
+    keys text not null,
+    primary key (bucket, prefix)
+)
+"""
+
+
+def listing_cache_path() -> Path:
+    """Get the cache file path, FREEDS_S3_LISTING_CACHE or .cache/s3-listing.sqlite in the freeds root folder."""
+    env_path = os.environ.get("FREEDS_S3_LISTING_CACHE")
+    if env_path:
+        return Path(env_path)
+    root_path = RootConfig().root_path
+    if root_path is None:
+        raise FileNotFoundError("No freeds root folder configured, can't place the s3 listing cache.")
+    return Path(root_path) / ".cache" / CACHE_FILE_NAME
+
+
+class ListingCache:
+    """Cached key listings by bucket and prefix.
+    ttl (FREEDS_S3_LISTING_CACHE_TTL, default one hour) applies to mutable listings, immutable_ttl
+    (FREEDS_S3_LISTING_IMMUTABLE_TTL, default a week) to immutable ones.
+    A date partition is immutable once it is settle_days (FREEDS_S3_LISTING_SETTLE_DAYS, default 2) in the past,
+    allowing for late data. Use invalidate() after backfilling a past partition.
+    Safe to use from many threads and processes, each call uses its own sqlite connection."""
+
+    def __init__(
+        self,
+        path: Union[None, str, Path] = None,
+        ttl: Optional[float] = None,
+        settle_days: Optional[int] = None,
+        immutable_ttl: Optional[float] = None,
+    ) -> None:
+        self.path = Path(path) if path is not None else listing_cache_path()
+        self.ttl = ttl if ttl is not None else float(os.environ.get("FREEDS_S3_LISTING_CACHE_TTL", DEFAULT_TTL))
+        self.immutable_ttl = (
+            immutable_ttl
+            if immutable_ttl is not None
+            else float(os.environ.get("FREEDS_S3_LISTING_IMMUTABLE_TTL", DEFAULT_IMMUTABLE_TTL))
+        )
+        self.settle_days = (
+            settle_days
+            if settle_days is not None
+            else int(os.environ.get("FREEDS_S3_LISTING_SETTLE_DAYS", DEFAULT_SETTLE_DAYS))
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            # wal lets parallel tasks read while one writes
+            conn.execute("pragma journal_mode=wal")
+            conn.execute(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # commits, or rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def is_immutable(self, last_day: Union[dt.datetime, dt.date]) -> bool:
+        """Check if a partition ending on last_day is settled, it won't get new files."""
+        if isinstance(last_day, dt.datetime):
+            last_day = last_day.date()
+        return last_day < dt.date.today() - dt.timedelta(days=self.settle_days)
+
+    def get(self, bucket: str, prefix: str) -> Optional[list[str]]:
+        """Get a cached listing, None if it isn't cached or has expired."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "select listed_at, immutable, keys from listings where bucket = ? and prefix = ?", (bucket, prefix)
+            ).fetchone()
+        if row is None:
+            return None
+        listed_at, immutable, keys = row
+        if listed_at + (self.immutable_ttl if immutable else self.ttl) <= time.time():
+            return None
+        result: list[str] = json.loads(keys)
+        return result
+
+    def put(self, bucket: str, prefix: str, keys: list[str], immutable: bool = False) -> None:
+        """Store a listing."""
+        with self._connect() as conn:
+            conn.execute(
+                "insert or replace into listings (bucket, prefix, listed_at, immutable, keys) values (?, ?, ?, ?, ?)",
+                (bucket, prefix, time.time(), int(immutable), json.dumps(keys)),
+            )
+
+    def invalidate(self, bucket: Optional[str] = None, prefix: str = "") -> int:
+        """Drop cached listings overlapping prefix (in one or all buckets), returns the number dropped.
+        A listing overlaps if either prefix starts with the other, so writing a file under a listed prefix
+        and writing a whole month both drop the right day listings."""
+        with self._connect() as conn:
+            rows = conn.execute("select bucket, prefix from listings").fetchall()
+            dropped = [
+                (b, p)
+                for b, p in rows
+                if (bucket is None or b == bucket) and (p.startswith(prefix) or prefix.startswith(p))
+            ]
+            conn.executemany("delete from listings where bucket = ? and prefix = ?", dropped)
+        return len(dropped)
+
+    def invalidate_keys(self, bucket: str, keys: Iterable[str]) -> int:
+        """Drop the listings in bucket that hold any of keys (written or deleted), returns the number dropped."""
+        keys = list(keys)
+        with self._connect() as conn:
+            prefixes = [p for (p,) in conn.execute("select prefix from listings where bucket = ?", (bucket,))]
+            dropped = [(bucket, p) for p in prefixes if any(k.startswith(p) for k in keys)]
+            conn.executemany("delete from listings where bucket = ? and prefix = ?", dropped)
+        return len(dropped)
+
+    def stats(self) -> dict[str, int]:
+        """Get the number of cached listings, and how many of them are immutable."""
+        with self._connect() as conn:
+            total, immutable = conn.execute("select count(*), coalesce(sum(immutable), 0) from listings").fetchone()
+        return {"listings": total, "immutable": immutable}
+
+
+def invalidate_cached_listings(bucket: str, keys: Iterable[str]) -> None:
+    """Drop the listings holding keys from the default cache, the freeds.s3 uploads and deletes call this.
+    Does nothing when there is no cache file, it never raises: a cache problem is logged, it doesn't fail the write."""
+    try:
+        path = listing_cache_path()
+    except Exception:  # no freeds root configured, so no default cache either
+        return
+    try:
+        if path.exists():
+            ListingCache(path).invalidate_keys(bucket, keys)
+    except Exception as e:
+        logger.warning(f"Could not invalidate the s3 listing cache {path}: {e}")
@@ -2,27 +2,111 @@
 Let's see how we refactor this to transparently use config from file or api server."""
 
 import datetime as dt
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Union
+from typing import TYPE_CHECKING, Any, Iterator, Union
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from freeds.config import get_config
+from freeds.s3.listing_cache import invalidate_cached_listings
+
+if TYPE_CHECKING:
+    from freeds.s3.listing_cache import ListingCache
+
+DEFAULT_MAX_POOL_CONNECTIONS = 32
+DEFAULT_RETRIES = 3
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_LIST_WORKERS = 8
+
+_client: Any = None
+_client_key: Union[None, tuple[Any, ...]] = None
+_client_lock = threading.Lock()
+# buckets known to exist for the current client
+_known_buckets: set[str] = set()
+
+
+def _setting(cfg: dict[str, Any], name: str, default: float) -> float:
+    # a key in the s3 config wins over the FREEDS_S3_<NAME> env value
+    value = cfg.get(name, os.environ.get(f"FREEDS_S3_{name.upper()}"))
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"s3 setting {name} must be a number, got '{value}'.")
+
+
+def get_client_config(cfg: dict[str, Any], config_class: type[Config] = Config) -> Config:
+    """Get the botocore client config: connection pool size, retries and timeouts.
+    Set with max_pool_connections, retries, connect_timeout and read_timeout in the s3 config
+    or FREEDS_S3_MAX_POOL_CONNECTIONS, FREEDS_S3_RETRIES, FREEDS_S3_CONNECT_TIMEOUT and FREEDS_S3_READ_TIMEOUT.
+    config_class is a Config subclass to make, like aiobotocore's AioConfig."""
+    return config_class(
+        max_pool_connections=int(_setting(cfg, "max_pool_connections", DEFAULT_MAX_POOL_CONNECTIONS)),
+        retries={"max_attempts": int(_setting(cfg, "retries", DEFAULT_RETRIES)), "mode": "standard"},
+        connect_timeout=_setting(cfg, "connect_timeout", DEFAULT_CONNECT_TIMEOUT),
+        read_timeout=_setting(cfg, "read_timeout", DEFAULT_READ_TIMEOUT),
+    )
 
 
 def get_s3_client() -> boto3.client:
-    """Get an S3 client using config from the config api"""
+    """Get an S3 client using config from the config api.
+    The client is created once per process and shared (boto3 clients are thread safe),
+    it is only created again when the endpoint, credentials or client settings change."""
+    global _client, _client_key
     cfg = get_config("s3")
     if cfg is None or cfg.get("url") is None:
         raise ValueError("s3 config not found")
-    s3_client = boto3.client(
-        service_name="s3",
-        aws_access_key_id=cfg["access_key"],
-        aws_secret_access_key=cfg["secret_key"],
-        endpoint_url=cfg["url"],
+    client_config = get_client_config(cfg)
+    key = (
+        cfg["url"],
+        cfg["access_key"],
+        cfg["secret_key"],
+        client_config.max_pool_connections,
+        client_config.retries["max_attempts"],
+        client_config.connect_timeout,
+        client_config.read_timeout,
     )
-    return s3_client
+    with _client_lock:
+        if _client is None or _client_key != key:
+            _client = boto3.client(
+                service_name="s3",
+                aws_access_key_id=cfg["access_key"],
+                aws_secret_access_key=cfg["secret_key"],
+                endpoint_url=cfg["url"],
+                config=client_config,
+            )
+            _client_key = key
+            _known_buckets.clear()
+        return _client
+
+
+def clear_s3_client_cache() -> None:
+    """Drop the shared client, the next get_s3_client() creates a new one."""
+    global _client, _client_key
+    with _client_lock:
+        _client = None
+        _client_key = None
+        _known_buckets.clear()
+
+
+def _forget_client() -> None:
+    # pooled connections must not be shared with a forked child (airflow workers fork), start over in the child.
+    global _client, _client_key, _client_lock
+    _client = None
+    _client_key = None
+    _client_lock = threading.Lock()
+    _known_buckets.clear()
+
+
+os.register_at_fork(after_in_child=_forget_client)
 
 
 def is_s3_service_available() -> bool:
@@ -38,13 +122,20 @@ def is_s3_service_available() -> bool:
 
 
 def bucket_exists(bucket_name: str) -> bool:
-    """Check if an S3 bucket exists."""
-    response = get_s3_client().list_buckets()
-    for bucket in response.get("Buckets", []):
-        if bucket["Name"] == bucket_name:
+    """Check if an S3 bucket exists, with a HeadBucket call.
+    Buckets found (or created through freeds.s3) are remembered for the process, so they are only checked once."""
+    with _client_lock:
+        if bucket_name in _known_buckets:
             return True
-
-    return False
+    try:
+        get_s3_client().head_bucket(Bucket=bucket_name)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchBucket", "NotFound"):
+            return False
+        raise
+    with _client_lock:
+        _known_buckets.add(bucket_name)
+    return True
 
 
 def file_exists(bucket_name: str, file_name: str, prefix: Union[str, None] = None) -> bool:
@@ -61,6 +152,79 @@ def file_exists(bucket_name: str, file_name: str, prefix: Union[str, None] = Non
             raise
 
 
+# list a folder instead of heading each key when at least this many keys are in it
+FILES_EXIST_LIST_MIN_KEYS = 4
+LIST_PAGE_SIZE = 1000  # objects per ListObjectsV2 page
+
+
+def _head_exists(s3_client: Any, bucket_name: str, key: str) -> bool:
+    try:
+        s3_client.head_object(Bucket=bucket_name, Key=key)
+        return True
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+
+def _listed_keys(bucket_name: str, folder: str, keys: list[str], max_pages: int) -> tuple[set[str], list[str]]:
+    """List the part of a folder holding keys, stopping after the last of them or after max_pages pages.
+    Returns the keys found and the keys the listing didn't get to, to be checked with HEADs."""
+    names = [k[len(folder) :] for k in keys]
+    prefix = folder + os.path.commonprefix(names)
+    last = max(keys)
+    found = set()
+    last_listed = None
+    for count, obj in enumerate(iter_objects(prefix, bucket_name, delimiter="/")):
+        if obj.key > last:
+            return found, []
+        if count >= max_pages * LIST_PAGE_SIZE:
+            # sparse keys in a big folder, the rest is cheaper to head
+            return found, [k for k in keys if last_listed is None or k > last_listed]
+        found.add(obj.key)
+        last_listed = obj.key
+    return found, []
+
+
+def files_exist(
+    bucket_name: str,
+    keys: list[str],
+    max_workers: Union[None, int] = None,
+    list_min_keys: int = FILES_EXIST_LIST_MIN_KEYS,
+) -> dict[str, bool]:
+    """Check if many files exist, returns {key: exists} in the order of keys.
+    Keys are grouped by folder, a folder with at least list_min_keys keys is listed (one request per
+    1000 objects, narrowed to the keys' common name prefix), the others are checked with HeadObject calls.
+    A listing stops after one page more than the keys would fill, keys it didn't reach are headed instead,
+    so a few keys spread over a huge folder don't list all of it.
+    Listings and HEADs run concurrently, max_workers at a time (FREEDS_S3_LIST_WORKERS, default 8)."""
+    folders: dict[str, list[str]] = {}
+    for key in dict.fromkeys(keys):
+        folder = key.rsplit("/", 1)[0] + "/" if "/" in key else ""
+        folders.setdefault(folder, []).append(key)
+
+    s3_client = get_s3_client()
+    listed = {folder: group for folder, group in folders.items() if len(group) >= list_min_keys}
+    headed = [key for folder, group in folders.items() if folder not in listed for key in group]
+
+    workers = max_workers or int(os.environ.get("FREEDS_S3_LIST_WORKERS", DEFAULT_LIST_WORKERS))
+    result: dict[str, bool] = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        listings = {
+            folder: pool.submit(_listed_keys, bucket_name, folder, group, -(-len(group) // LIST_PAGE_SIZE) + 1)
+            for folder, group in listed.items()
+        }
+        heads = {key: pool.submit(_head_exists, s3_client, bucket_name, key) for key in headed}
+        for folder, future in listings.items():
+            found, unlisted = future.result()
+            for key in listed[folder]:
+                result[key] = key in found
+            heads.update({key: pool.submit(_head_exists, s3_client, bucket_name, key) for key in unlisted})
+        for key, head in heads.items():
+            result[key] = head.result()
+    return {key: result[key] for key in keys}
+
+
 def create_bucket(bucket_name: str) -> bool:
     """Create an S3 bucket if does not exist."""
 
@@ -68,8 +232,9 @@ def create_bucket(bucket_name: str) -> bool:
         if bucket_exists(bucket_name):
             print(f"S3 bucket {bucket_name} already exists.")
             return True
-        s3_client = get_s3_client()
-        s3_client.create_bucket(Bucket=bucket_name)
+        get_s3_client().create_bucket(Bucket=bucket_name)
+        with _client_lock:
+            _known_buckets.add(bucket_name)
         print(f"Bucket {bucket_name} created.")
         return True
     except ClientError as e:
@@ -81,22 +246,20 @@ def delete_bucket(bucket_name: str) -> None:
     """Delete S3 bucket if it exists."""
     if not bucket_exists(bucket_name):
         return
+    with _client_lock:
+        _known_buckets.discard(bucket_name)
     s3_client = get_s3_client()
     s3_client.delete_bucket(Bucket=bucket_name)
 
 
-def delete_prefix(bucket: str, prefix: str) -> None:
-    """Delete all files with a given prefix in a bucket."""
-    s3 = get_s3_client()
-    paginator = s3.get_paginator("list_objects_v2")
-    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
-        if "Contents" in page:
-            objects = [{"Key": obj["Key"]} for obj in page["Contents"]]
-            s3.delete_objects(Bucket=bucket, Delete={"Objects": objects})
-
-
-def put_file(local_path: Union[str, Path], bucket: str, file_name: str, prefix: Union[str, None] = None) -> bool:
-    """Upload a file to S3."""
+def put_file(
+    local_path: Union[str, Path],
+    bucket: str,
+    file_name: str,
+    prefix: Union[str, None] = None,
+    config: Union[None, TransferConfig] = None,
+) -> bool:
+    """Upload a file to S3, config sets the multipart threshold, chunk size and concurrency (see transfer.py)."""
 
     s3_client = get_s3_client()
     if prefix and not prefix.endswith("/"):
@@ -106,22 +269,35 @@ def put_file(local_path: Union[str, Path], bucket: str, file_name: str, prefix:
     try:
         text = f"{local_path} to bucket '{bucket}' as '{s3_key}'"
         print(f"Intitating upload: {text}.")
-        s3_client.upload_file(local_path, bucket, s3_key)
-        print(f"Upload succeeded: {text}.")
-        return True
+        if config is None:
+            s3_client.upload_file(local_path, bucket, s3_key)
+        else:
+            s3_client.upload_file(local_path, bucket, s3_key, Config=config)
     except Exception as e:
         print(f"Upload failed {text}: {e}")
         return False
-
-
-def get_file(local_path: Union[str, Path], bucket: str, file_name: str, prefix: Union[str, None] = None) -> bool:
-    """Download a file from S3."""
+    print(f"Upload succeeded: {text}.")
+    invalidate_cached_listings(bucket, [s3_key])
+    return True
+
+
+def get_file(
+    local_path: Union[str, Path],
+    bucket: str,
+    file_name: str,
+    prefix: Union[str, None] = None,
+    config: Union[None, TransferConfig] = None,
+) -> bool:
+    """Download a file from S3, config sets the multipart threshold, chunk size and concurrency (see transfer.py)."""
     source_object_name = f"{prefix}/{file_name}" if prefix else file_name
     text = f"{source_object_name} to {local_path}"
     print(f"Intitating download: {text}.")
     try:
         s3_client = get_s3_client()
-        s3_client.download_file(bucket, source_object_name, local_path)
+        if config is None:
+            s3_client.download_file(bucket, source_object_name, local_path)
+        else:
+            s3_client.download_file(bucket, source_object_name, local_path, Config=config)
         print(f"Download completed: {text}.")
         return True
     except ClientError as e:
@@ -141,27 +317,165 @@ def as_urls(files: list[str], bucket_name: str) -> list[str]:
     return [f"s3a://{bucket_name}/{f}" for f in files]
 
 
+class S3Object:
+    """A listed object: key, size in bytes, etag (without quotes) and last modified time.
+    With a delimiter, common prefixes ("folders") are listed too, with is_prefix set and no size, etag or time."""
+
+    __slots__ = ("key", "size", "etag", "last_modified", "is_prefix")
+
+    def __init__(
+        self,
+        key: str,
+        size: int = 0,
+        etag: Union[None, str] = None,
+        last_modified: Union[None, dt.datetime] = None,
+        is_prefix: bool = False,
+    ) -> None:
+        self.key = key
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.is_prefix = is_prefix
+
+    def __repr__(self) -> str:
+        if self.is_prefix:
+            return f"<S3Object prefix {self.key}>"
+        return f"<S3Object {self.key} {self.size} bytes>"
+
+
+def iter_objects(
+    prefix: str,
+    bucket_name: str,
+    delimiter: Union[None, str] = None,
+    start_after: Union[None, str] = None,
+    page_size: Union[None, int] = None,
+) -> Iterator[S3Object]:
+    """Yield the objects under a prefix one page at a time, without holding the whole listing in memory.
+    With a delimiter (usually "/") only the objects directly under the prefix are listed and the common prefixes
+    below it are yielded as is_prefix objects. start_after skips keys up to and including the given key."""
+    kwargs: dict[str, Any] = {"Bucket": bucket_name, "Prefix": prefix}
+    if delimiter:
+        kwargs["Delimiter"] = delimiter
+    if start_after:
+        kwargs["StartAfter"] = start_after
+    if page_size:
+        kwargs["PaginationConfig"] = {"PageSize": page_size}
+    paginator = get_s3_client().get_paginator("list_objects_v2")
+    for page in paginator.paginate(**kwargs):
+        for obj in page.get("Contents", []):
+            etag = obj.get("ETag")
+            yield S3Object(
+                key=obj["Key"],
+                size=obj.get("Size", 0),
+                etag=etag.strip('"') if etag else None,
+                last_modified=obj.get("LastModified"),
+            )
+        for common in page.get("CommonPrefixes", []):
+            yield S3Object(key=common["Prefix"], is_prefix=True)
+
+
 def list_files(prefix: str, bucket_name: str) -> list[str]:
     """Expand s3 path and return all files under the given prefix, prefix should not contain any part of the filename or wildcards."""
-    s3 = get_s3_client()
-    paginator = s3.get_paginator("list_objects_v2")
-    pages = paginator.paginate(Bucket=bucket_name, Prefix=prefix)
-    all_files = []
-    for page in pages:
-        for obj in page.get("Contents", []):
-            all_files.append(obj["Key"])
-    return all_files
+    return [obj.key for obj in iter_objects(prefix, bucket_name)]
+
+
+# list the whole month when at least this share of its days is asked for
+COLLAPSE_MIN_FRACTION = 0.5
+
+
+def _month_prefix(date: Union[dt.datetime, dt.date]) -> str:
+    return date.strftime("%Y/%Y-%m/")
 
 
-def list_files_for_dates(dates: list[Union[dt.datetime, dt.date]], root_prefix: str, bucket_name: str) -> list[str]:
+def _days_in_month(date: Union[dt.datetime, dt.date]) -> int:
+    next_month = (date.replace(day=28) + dt.timedelta(days=4)).replace(day=1)
+    return (next_month - dt.timedelta(days=1)).day
+
+
+def list_files_for_dates(
+    dates: list[Union[dt.datetime, dt.date]],
+    root_prefix: str,
+    bucket_name: str,
+    max_workers: Union[None, int] = None,
+    collapse_months: bool = False,
+    cache: Union[None, "ListingCache"] = None,
+) -> list[str]:
     """List all files in the s3 freeds standard date paths for the given dates.
     Spark doesn't resolve wildcards so we need to list the files individually.
-    Filenames are returned as haddoop compatible uri:s 's3a://bucket/prefix/filename'."""
-    all_files = []
+    Filenames are returned as haddoop compatible uri:s 's3a://bucket/prefix/filename'.
+
+    Prefixes are listed concurrently, max_workers at a time (FREEDS_S3_LIST_WORKERS, default 8),
+    files are returned in the order of the dates. With collapse_months a month where at least half the days
+    are asked for is listed once (YYYY/YYYY-MM/) and filtered on the dates, fewer calls for long date ranges.
+    With a ListingCache only uncached or expired prefixes are listed, settled past dates are cached for good."""
+    prefixes, last_days, listing_of_date = _plan_date_listings(dates, root_prefix, collapse_months)
+
+    def list_prefix(index: int) -> list[str]:
+        return _list_prefix(prefixes[index], bucket_name, cache, last_days[index])
+
+    workers = max_workers or int(os.environ.get("FREEDS_S3_LIST_WORKERS", DEFAULT_LIST_WORKERS))
+    if workers <= 1 or len(prefixes) <= 1:
+        listings = [list_prefix(i) for i in range(len(prefixes))]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(prefixes))) as pool:
+            listings = list(pool.map(list_prefix, range(len(prefixes))))
+    return _merge_date_listings(listings, listing_of_date)
+
+
+def _plan_date_listings(
+    dates: list[Union[dt.datetime, dt.date]], root_prefix: str, collapse_months: bool
+) -> tuple[list[str], list[Union[dt.datetime, dt.date]], list[tuple[int, Union[None, str]]]]:
+    """Work out the prefixes to list for the dates. Returns the prefixes, the last day in each prefix
+    (to tell if the partition is settled) and for each date: the index of the listing holding its files and,
+    for a month listing, the date prefix to keep."""
+    month_days: dict[str, set[int]] = {}
+    if collapse_months:
+        for date in dates:
+            month_days.setdefault(_month_prefix(date), set()).add(date.day)
+
+    prefixes: list[str] = []
+    last_days: list[Union[dt.datetime, dt.date]] = []
+    listing_of_date: list[tuple[int, Union[None, str]]] = []
+    month_listing: dict[str, int] = {}
     for date in dates:
-        prefix = make_date_prefix(date)
-        files = list_files(f"{root_prefix}/{prefix}", bucket_name)
-        all_files.extend(files)
+        date_prefix = f"{root_prefix}/{make_date_prefix(date)}"
+        month = _month_prefix(date)
+        if collapse_months and len(month_days[month]) >= COLLAPSE_MIN_FRACTION * _days_in_month(date):
+            if month not in month_listing:
+                month_listing[month] = len(prefixes)
+                prefixes.append(f"{root_prefix}/{month}")
+                last_days.append(date.replace(day=_days_in_month(date)))
+            listing_of_date.append((month_listing[month], date_prefix))
+        else:
+            listing_of_date.append((len(prefixes), None))
+            prefixes.append(date_prefix)
+            last_days.append(date)
+    return prefixes, last_days, listing_of_date
+
+
+def _list_prefix(
+    prefix: str,
+    bucket_name: str,
+    cache: Union[None, "ListingCache"],
+    last_day: Union[dt.datetime, dt.date],
+) -> list[str]:
+    if cache is None:
+        return list_files(prefix, bucket_name)
+    keys = cache.get(bucket_name, prefix)
+    if keys is None:
+        keys = list_files(prefix, bucket_name)
+        # an empty partition may still be backfilled, only settle listings with files
+        cache.put(bucket_name, prefix, keys, immutable=bool(keys) and cache.is_immutable(last_day))
+    return keys
+
+
+def _merge_date_listings(listings: list[list[str]], listing_of_date: list[tuple[int, Union[None, str]]]) -> list[str]:
+    all_files = []
+    for index, date_prefix in listing_of_date:
+        if date_prefix is None:
+            all_files.extend(listings[index])
+        else:
+            all_files.extend(f for f in listings[index] if f.startswith(date_prefix))
     return all_files
 
 if __name__ == '__main__':
@@ -0,0 +1,235 @@
+"""File like streaming of S3 objects, reading with ranged GETs and writing with multipart uploads.
+Memory use is bounded by the buffer/part size, nothing is staged on disk.
+
+    with open_write("notebooks", "repo/nb.ipynb", "w") as f:
+        nbformat.write(notebook, f)
+    with open_read("notebooks", "repo/nb.ipynb", "r") as f:
+        notebook = nbformat.read(f, as_version=4)
+"""
+
+import io
+import logging
+from typing import IO, Any, Optional, Union
+
+from freeds.s3.listing_cache import invalidate_cached_listings
+from freeds.s3.s3 import get_s3_client
+from freeds.s3.transfer import _env_int
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+MIN_PART_SIZE = 5 * MB  # the S3 minimum for all but the last part
+DEFAULT_PART_SIZE = 8 * MB
+DEFAULT_READ_BUFFER = 8 * MB
+
+
+class S3RawReader(io.RawIOBase):
+    """Seekable raw reader of an S3 object, each read is a ranged GET. Wrap in a BufferedReader."""
+
+    def __init__(self, bucket: str, key: str, s3_client: Any = None) -> None:
+        self.bucket = bucket
+        self.key = key
+        self._client = s3_client or get_s3_client()
+        head = self._client.head_object(Bucket=bucket, Key=key)
+        self.size: int = head["ContentLength"]
+        self.etag: Optional[str] = head.get("ETag")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"invalid whence {whence}")
+        if pos < 0:
+            raise ValueError("negative seek position")
+        self._pos = pos
+        return pos
+
+    def _get(self, byte_range: str) -> bytes:
+        kwargs: dict[str, Any] = {"Bucket": self.bucket, "Key": self.key, "Range": f"bytes={byte_range}"}
+        if self.etag:
+            # fail rather than mix parts of two versions if the object is replaced while reading
+            kwargs["IfMatch"] = self.etag
+        data: bytes = self._client.get_object(**kwargs)["Body"].read()
+        return data
+
+    def readinto(self, buffer: Any) -> int:
+        if self._pos >= self.size:
+            return 0
+        end = min(self._pos + len(buffer), self.size) - 1
+        data = self._get(f"{self._pos}-{end}")
+        n = len(data)
+        buffer[:n] = data
+        self._pos += n
+        return n
+
+    def readall(self) -> bytes:
+        """Read the rest of the object in one GET, read() with no size ends up here."""
+        if self._pos >= self.size:
+            return b""
+        data = self._get(f"{self._pos}-")
+        self._pos += len(data)
+        return data
+
+
+class S3Writer(io.BufferedIOBase):
+    """Writes an S3 object as a multipart upload, holding at most one part in memory.
+    Small objects (under one part) are written with a single PUT. Closing completes the upload,
+    abort() (or leaving a with block on an exception) cancels it and no object is written.
+    A writer that is garbage collected without being closed is aborted, not completed."""
+
+    def __init__(self, bucket: str, key: str, part_size: int = DEFAULT_PART_SIZE, s3_client: Any = None) -> None:
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes, got {part_size}.")
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self._client = s3_client or get_s3_client()
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._parts: list[dict[str, Any]] = []
+        self.bytes_written = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        if self.closed:
+            raise ValueError("write to closed file")
+        view = memoryview(data).cast("B")
+        offset = 0
+        # fill the buffer a part at a time, a large write never holds more than one part
+        while offset < len(view):
+            take = min(self.part_size - len(self._buffer), len(view) - offset)
+            self._buffer += view[offset : offset + take]
+            offset += take
+            if len(self._buffer) >= self.part_size:
+                body = bytes(self._buffer)
+                self._buffer = bytearray()
+                self._upload_part(body)
+        self.bytes_written += len(view)
+        return len(view)
+
+    def _upload_part(self, body: bytes) -> None:
+        try:
+            if self._upload_id is None:
+                response = self._client.create_multipart_upload(Bucket=self.bucket, Key=self.key)
+                self._upload_id = response["UploadId"]
+            number = len(self._parts) + 1
+            response = self._client.upload_part(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=number, Body=body
+            )
+            self._parts.append({"PartNumber": number, "ETag": response["ETag"]})
+        except Exception:
+            self.abort()
+            raise
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._upload_id is None:
+                self._client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer))
+            else:
+                if self._buffer or not self._parts:
+                    self._upload_part(bytes(self._buffer))
+                self._client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": self._parts},
+                )
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self._buffer = bytearray()
+            super().close()
+        invalidate_cached_listings(self.bucket, [self.key])
+
+    def abort(self) -> None:
+        """Cancel the upload, parts already sent are discarded."""
+        if self._upload_id is not None:
+            try:
+                self._client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            except Exception as e:
+                logger.error(f"Could not abort multipart upload of s3://{self.bucket}/{self.key}: {e}")
+            self._upload_id = None
+        self._buffer = bytearray()
+        if not self.closed:
+            super().close()
+
+    def __exit__(self, exc_type: Any, *args: Any) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def __del__(self) -> None:
+        # IOBase.__del__ would close(), publishing whatever was written before the writer was dropped
+        if not self.closed and hasattr(self, "_upload_id"):
+            self.abort()
+
+
+class _S3TextWriter(io.TextIOWrapper):
+    """Text mode S3Writer, an exception in a with block or dropping it unclosed aborts the upload."""
+
+    def __exit__(self, exc_type: Any, *args: Any) -> None:
+        if exc_type is not None:
+            self.buffer.abort()
+        else:
+            self.close()
+
+    def __del__(self) -> None:
+        if not self.closed:
+            self.buffer.abort()
+
+
+def open_read(
+    bucket: str,
+    key: str,
+    mode: str = "rb",
+    buffer_size: Optional[int] = None,
+    encoding: Optional[str] = None,
+) -> IO[Any]:
+    """Open an S3 object for reading, mode "rb" or "r" (text, utf-8 unless encoding is given).
+    Data is fetched with ranged GETs of buffer_size bytes (FREEDS_S3_READ_BUFFER, default 8 MB),
+    seeking is supported."""
+    if mode not in ("rb", "r"):
+        raise ValueError(f"open_read mode must be 'rb' or 'r', got '{mode}'.")
+    buffer_size = buffer_size or _env_int("FREEDS_S3_READ_BUFFER", DEFAULT_READ_BUFFER)
+    reader = io.BufferedReader(S3RawReader(bucket, key), buffer_size=buffer_size)
+    if mode == "r":
+        return io.TextIOWrapper(reader, encoding=encoding or "utf-8")
+    return reader
+
+
+def open_write(
+    bucket: str,
+    key: str,
+    mode: str = "wb",
+    part_size: Optional[int] = None,
+    encoding: Optional[str] = None,
+) -> Union[S3Writer, io.TextIOWrapper]:
+    """Open an S3 object for writing, mode "wb" or "w" (text, utf-8 unless encoding is given).
+    Data is uploaded in parts of part_size bytes (FREEDS_S3_PART_SIZE, default 8 MB, at least 5 MB) as it is written,
+    the object appears when the file is closed. Use it in a with block, an exception aborts the upload."""
+    if mode not in ("wb", "w"):
+        raise ValueError(f"open_write mode must be 'wb' or 'w', got '{mode}'.")
+    writer = S3Writer(bucket, key, part_size=part_size or _env_int("FREEDS_S3_PART_SIZE", DEFAULT_PART_SIZE))
+    if mode == "w":
+        return _S3TextWriter(writer, encoding=encoding or "utf-8", write_through=True)
+    return writer
@@ -0,0 +1,233 @@
+"""Incremental sync between a local folder and an S3 prefix, only new or changed files are transferred.
+
+A file is unchanged when its size and ETag match: the md5 of the file, or for multipart uploads the md5 of the
+part md5s followed by "-<parts>". Local files are only hashed when the sizes match."""
+
+import hashlib
+import logging
+import os
+from pathlib import Path, PurePosixPath
+from typing import Any, Iterator, Optional, Union
+
+from boto3.s3.transfer import TransferConfig
+
+from freeds.s3.delete import delete_keys
+from freeds.s3.s3 import S3Object, iter_objects
+from freeds.s3.transfer import MB, TransferReport, get_files, make_transfer_config, put_files
+
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_SIZE = 1 * MB
+# the aws cli and boto3 default part size, tried when the configured chunk size doesn't match an ETag
+DEFAULT_BOTO_CHUNKSIZE = 8 * MB
+
+
+class SyncReport:
+    """What a sync transferred, skipped and deleted. In a dry run only the plan is filled in."""
+
+    def __init__(self, direction: str, local_dir: Path, bucket: str, prefix: str, dry_run: bool = False) -> None:
+        self.direction = direction
+        self.local_dir = local_dir
+        self.bucket = bucket
+        self.prefix = prefix
+        self.dry_run = dry_run
+        # (local_path, key) pairs to upload, or (key, local_path) pairs to download
+        self.to_transfer: list[tuple[Any, Any]] = []
+        self.bytes_to_transfer = 0
+        self.skipped = 0
+        self.bytes_skipped = 0
+        # keys (upload) or local paths (download) missing from the source
+        self.extras: list[str] = []
+        self.deleted: list[str] = []
+        self.delete_failed: dict[str, str] = {}
+        # keys not downloaded because their path would end up outside local_dir
+        self.rejected: list[str] = []
+        self.transfer: Optional[TransferReport] = None
+
+    @property
+    def ok(self) -> bool:
+        return (self.transfer is None or self.transfer.ok) and not self.delete_failed and not self.rejected
+
+    @property
+    def bytes_transferred(self) -> int:
+        return self.transfer.bytes if self.transfer is not None else 0
+
+    def __str__(self) -> str:
+        verb = "uploaded" if self.direction == "upload" else "downloaded"
+        if self.dry_run:
+            return (
+                f"dry run, {len(self.to_transfer)} files ({self.bytes_to_transfer / MB:.1f} MB) would be {verb}, "
+                f"{self.skipped} unchanged ({self.bytes_skipped / MB:.1f} MB), {len(self.extras)} extra"
+            )
+        transferred = str(self.transfer) if self.transfer is not None else "0 files"
+        return (
+            f"{verb} {transferred}, skipped {self.skipped} unchanged files ({self.bytes_skipped / MB:.1f} MB), "
+            f"deleted {len(self.deleted)}, {len(self.delete_failed)} deletes failed"
+        )
+
+
+def _md5_etag(path: Path, size: int, parts: int, chunk_size: int) -> Optional[str]:
+    """The ETag S3 gives the file: its md5 or, uploaded in parts of chunk_size, the multipart ETag."""
+    if parts == 0:
+        digest = hashlib.md5(usedforsecurity=False)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    if -(-size // chunk_size) != parts:
+        return None
+    part_digests = b""
+    with open(path, "rb") as f:
+        for _ in range(parts):
+            part = hashlib.md5(usedforsecurity=False)
+            remaining = chunk_size
+            while remaining > 0:
+                block = f.read(min(HASH_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                part.update(block)
+                remaining -= len(block)
+            part_digests += part.digest()
+    return f"{hashlib.md5(part_digests, usedforsecurity=False).hexdigest()}-{parts}"
+
+
+def is_unchanged(path: Path, obj: S3Object, chunk_size: int) -> bool:
+    """Check if a local file matches an S3 object by size and ETag. Multipart ETags are checked for
+    chunk_size and for the aws default part size, an ETag of an unknown part size counts as changed."""
+    size = path.stat().st_size
+    if size != obj.size or not obj.etag:
+        return False
+    etag = obj.etag
+    parts = int(etag.rsplit("-", 1)[1]) if "-" in etag else 0
+    for candidate in dict.fromkeys([chunk_size, DEFAULT_BOTO_CHUNKSIZE]):
+        if _md5_etag(path, size, parts, candidate) == etag:
+            return True
+        if parts == 0:
+            break
+    return False
+
+
+def _key(prefix: str, relative: str) -> str:
+    return f"{prefix}/{relative}" if prefix else relative
+
+
+def _local_files(local_dir: Path) -> Iterator[tuple[Path, str]]:
+    """Yield the files under local_dir with their relative posix paths."""
+    for root, dirs, files in os.walk(local_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = Path(root) / name
+            yield path, path.relative_to(local_dir).as_posix()
+
+
+def _remote_objects(bucket: str, prefix: str) -> dict[str, S3Object]:
+    """The objects under prefix by their key relative to it, folder markers are left out."""
+    listing_prefix = f"{prefix}/" if prefix else ""
+    return {
+        obj.key[len(listing_prefix) :]: obj
+        for obj in iter_objects(listing_prefix, bucket)
+        if not obj.key.endswith("/")
+    }
+
+
+def _safe_local_path(root: Path, relative: str) -> Optional[Path]:
+    """The download path of a key relative to the prefix, None if it is absolute, has .. parts
+    or otherwise resolves outside root (a resolved folder)."""
+    parts = PurePosixPath(relative).parts
+    if not parts or PurePosixPath(relative).is_absolute() or ".." in parts:
+        return None
+    path = root.joinpath(*parts).resolve()
+    if not path.is_relative_to(root):
+        return None
+    return path
+
+
+def sync_to_s3(
+    local_dir: Union[str, Path],
+    bucket: str,
+    prefix: str = "",
+    delete: bool = False,
+    dry_run: bool = False,
+    config: Optional[TransferConfig] = None,
+    max_files: Optional[int] = None,
+) -> SyncReport:
+    """Upload new and changed files in local_dir to bucket/prefix, files are uploaded in parallel (see put_files).
+    With delete, objects under the prefix with no local file are deleted. A dry run only makes the plan."""
+    local_dir = Path(local_dir)
+    if not local_dir.is_dir():
+        raise FileNotFoundError(f"Local folder {local_dir} not found.")
+    prefix = prefix.strip("/")
+    config = config or make_transfer_config()
+    report = SyncReport("upload", local_dir, bucket, prefix, dry_run=dry_run)
+
+    remote = _remote_objects(bucket, prefix)
+    for path, relative in _local_files(local_dir):
+        obj = remote.pop(relative, None)
+        size = path.stat().st_size
+        if obj is not None and is_unchanged(path, obj, config.multipart_chunksize):
+            report.skipped += 1
+            report.bytes_skipped += size
+        else:
+            report.to_transfer.append((path, _key(prefix, relative)))
+            report.bytes_to_transfer += size
+    report.extras = sorted(_key(prefix, relative) for relative in remote)
+
+    if dry_run:
+        return report
+    if report.to_transfer:
+        report.transfer = put_files(report.to_transfer, bucket, config=config, max_files=max_files)
+    if delete and report.extras:
+        deleted = delete_keys(bucket, report.extras, raise_on_error=False)
+        report.delete_failed = deleted.failed
+        report.deleted = [key for key in report.extras if key not in deleted.failed]
+    logger.info("S3 sync %s -> s3://%s/%s: %s", local_dir, bucket, prefix, report)
+    return report
+
+
+def sync_from_s3(
+    bucket: str,
+    prefix: str,
+    local_dir: Union[str, Path],
+    delete: bool = False,
+    dry_run: bool = False,
+    config: Optional[TransferConfig] = None,
+    max_files: Optional[int] = None,
+) -> SyncReport:
+    """Download new and changed objects under bucket/prefix to local_dir, like sync_to_s3.
+    With delete, local files with no object under the prefix are removed. Keys that would be written outside
+    local_dir (absolute or with .. parts) are not downloaded, they are listed in report.rejected."""
+    local_dir = Path(local_dir)
+    prefix = prefix.strip("/")
+    config = config or make_transfer_config()
+    report = SyncReport("download", local_dir, bucket, prefix, dry_run=dry_run)
+
+    root = local_dir.resolve()
+    local = {relative: path for path, relative in _local_files(local_dir)} if local_dir.is_dir() else {}
+    for relative, obj in sorted(_remote_objects(bucket, prefix).items()):
+        target = _safe_local_path(root, relative)
+        if target is None:
+            logger.warning("Not downloading s3://%s/%s, it would be written outside %s.", bucket, obj.key, local_dir)
+            report.rejected.append(obj.key)
+            continue
+        path = local.pop(relative, None)
+        if path is not None and is_unchanged(path, obj, config.multipart_chunksize):
+            report.skipped += 1
+            report.bytes_skipped += obj.size
+        else:
+            report.to_transfer.append((obj.key, target))
+            report.bytes_to_transfer += obj.size
+    report.extras = sorted(str(path) for path in local.values())
+
+    if dry_run:
+        return report
+    if report.to_transfer:
+        report.transfer = get_files(report.to_transfer, bucket, config=config, max_files=max_files)
+    if delete:
+        for extra in report.extras:
+            try:
+                os.remove(extra)
+                report.deleted.append(extra)
+            except OSError as e:
+                report.delete_failed[extra] = str(e)
+    logger.info("S3 sync s3://%s/%s -> %s: %s", bucket, prefix, local_dir, report)
+    return report
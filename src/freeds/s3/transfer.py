@@ -0,0 +1,166 @@
+"""Bulk S3 uploads and downloads, many files in parallel with multipart transfers for the large ones."""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Union
+
+from boto3.s3.transfer import TransferConfig
+
+from freeds.s3.listing_cache import invalidate_cached_listings
+from freeds.s3.s3 import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+DEFAULT_MULTIPART_THRESHOLD = 16 * MB
+DEFAULT_MULTIPART_CHUNKSIZE = 16 * MB
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_FILES = 8
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a whole number, got '{value}'.")
+
+
+def make_transfer_config(
+    multipart_threshold: Optional[int] = None,
+    multipart_chunksize: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+) -> TransferConfig:
+    """Make a TransferConfig, arguments not given are read from FREEDS_S3_MULTIPART_THRESHOLD,
+    FREEDS_S3_MULTIPART_CHUNKSIZE and FREEDS_S3_MAX_CONCURRENCY (bytes, bytes, threads per file)."""
+    return TransferConfig(
+        multipart_threshold=multipart_threshold
+        or _env_int("FREEDS_S3_MULTIPART_THRESHOLD", DEFAULT_MULTIPART_THRESHOLD),
+        multipart_chunksize=multipart_chunksize
+        or _env_int("FREEDS_S3_MULTIPART_CHUNKSIZE", DEFAULT_MULTIPART_CHUNKSIZE),
+        max_concurrency=max_concurrency or _env_int("FREEDS_S3_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY),
+        use_threads=True,
+    )
+
+
+class TransferResult:
+    """The outcome of transferring a single file."""
+
+    def __init__(self, local_path: Path, bucket: str, key: str) -> None:
+        self.local_path = local_path
+        self.bucket = bucket
+        self.key = key
+        self.size = 0
+        self.seconds = 0.0
+        self.error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        status = "ok" if self.ok else f"failed: {self.error}"
+        return f"<TransferResult {self.local_path} <-> s3://{self.bucket}/{self.key} {self.size} bytes, {status}>"
+
+
+class TransferReport:
+    """Per file results and totals for a bulk transfer, throughput is total bytes over wall time."""
+
+    def __init__(self, results: list[TransferResult], seconds: float) -> None:
+        self.results = results
+        self.seconds = seconds
+
+    @property
+    def ok(self) -> bool:
+        return all(r.ok for r in self.results)
+
+    @property
+    def failed(self) -> list[TransferResult]:
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def bytes(self) -> int:
+        return sum(r.size for r in self.results if r.ok)
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second."""
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self.results) - len(self.failed)}/{len(self.results)} files, {self.bytes / MB:.1f} MB "
+            f"in {self.seconds:.2f}s ({self.throughput / MB:.1f} MB/s)"
+        )
+
+
+def _run(
+    jobs: list[TransferResult], transfer: Callable[[Any, TransferResult], None], max_files: Optional[int]
+) -> TransferReport:
+    s3_client = get_s3_client()
+
+    def run_one(result: TransferResult) -> TransferResult:
+        start = time.perf_counter()
+        try:
+            transfer(s3_client, result)
+        except Exception as e:
+            logger.error(f"Transfer failed {result.local_path} <-> s3://{result.bucket}/{result.key}: {e}")
+            result.error = e
+        result.seconds = time.perf_counter() - start
+        return result
+
+    workers = max_files or _env_int("FREEDS_S3_MAX_FILES", DEFAULT_MAX_FILES)
+    start = time.perf_counter()
+    if workers <= 1 or len(jobs) <= 1:
+        results = [run_one(job) for job in jobs]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(run_one, jobs))
+    report = TransferReport(results, time.perf_counter() - start)
+    logger.info("S3 transfer: %s", report)
+    return report
+
+
+def put_files(
+    files: Iterable[tuple[Union[str, Path], str]],
+    bucket: str,
+    config: Optional[TransferConfig] = None,
+    max_files: Optional[int] = None,
+) -> TransferReport:
+    """Upload (local_path, key) pairs to the bucket, max_files (FREEDS_S3_MAX_FILES, default 8) files at a time.
+    Files over the multipart threshold are uploaded in parts, config.max_concurrency parts at a time per file.
+    Keep max_files * max_concurrency within the client's max_pool_connections. A failed file doesn't stop the others,
+    check report.failed."""
+    config = config or make_transfer_config()
+    jobs = [TransferResult(Path(local_path), bucket, key) for local_path, key in files]
+
+    def upload(s3_client: Any, result: TransferResult) -> None:
+        result.size = os.path.getsize(result.local_path)
+        s3_client.upload_file(str(result.local_path), bucket, result.key, Config=config)
+
+    report = _run(jobs, upload, max_files)
+    invalidate_cached_listings(bucket, [r.key for r in report.results if r.ok])
+    return report
+
+
+def get_files(
+    files: Iterable[tuple[str, Union[str, Path]]],
+    bucket: str,
+    config: Optional[TransferConfig] = None,
+    max_files: Optional[int] = None,
+) -> TransferReport:
+    """Download (key, local_path) pairs from the bucket, like put_files. Missing local folders are created."""
+    config = config or make_transfer_config()
+    jobs = [TransferResult(Path(local_path), bucket, key) for key, local_path in files]
+
+    def download(s3_client: Any, result: TransferResult) -> None:
+        result.local_path.parent.mkdir(parents=True, exist_ok=True)
+        s3_client.download_file(bucket, result.key, str(result.local_path), Config=config)
+        result.size = os.path.getsize(result.local_path)
+
+    return _run(jobs, download, max_files)
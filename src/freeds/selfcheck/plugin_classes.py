@@ -3,6 +3,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from freeds.config import get_config
+from freeds.utils.yaml_io import load_yaml12_file
 
 
 class PluginError(Exception):
@@ -157,7 +158,7 @@ class DockerComposeService:
         self.name = name
         self.config = config
         self.docker_compose_info = docker_compose_info
-        self.ports: List[PortMapping] = [PortMapping(port_mapping) for port_mapping in self.config.get("ports", [])]
+        self.ports: List[PortMapping] = [PortMapping(str(port_mapping)) for port_mapping in self.config.get("ports", [])]
 
     def host_name(self) -> Optional[str]:
         """Get the host name for this service."""
@@ -184,18 +185,13 @@ class DockerComposeInfo:
 
     def load_config(self) -> None:
         """Load the docker compose configuration from the file."""
-        from ruamel.yaml import YAML
-
-        yaml = YAML(typ="safe")
-        with open(self.path, "r") as file:
-            self.config = yaml.load(file)
-            srv = self.config.get("services", {})
-            if srv is None:
-                raise PluginError(
-                    f"No services found in docker compose file {self.path} for plugin {self.plugin.name}."
-                )
-            for name, service_config in srv.items():
-                self.services[name] = DockerComposeService(docker_compose_info=self, name=name, config=service_config)
+        # docker compose reads yaml 1.2, port mappings like 22:22 must not load as yaml 1.1 base 60 ints
+        self.config = load_yaml12_file(self.path)
+        srv = self.config.get("services", {})
+        if srv is None:
+            raise PluginError(f"No services found in docker compose file {self.path} for plugin {self.plugin.name}.")
+        for name, service_config in srv.items():
+            self.services[name] = DockerComposeService(docker_compose_info=self, name=name, config=service_config)
 
 
 def get_repos() -> List[Repo]:
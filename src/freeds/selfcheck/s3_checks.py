@@ -74,7 +74,9 @@ def s3_check() -> CheckResult:
             )
 
         current_command = "delete_prefix"
-        delete_prefix(bucket=bucket, prefix=root_prefix)
+        report = delete_prefix(bucket=bucket, prefix=root_prefix)
+        if not report.ok or report.deleted != report.listed:
+            return CheckResult(passed=False, message=f"Error in delete_prefix: {report}.")
         files = list_files(bucket_name=bucket, prefix=root_prefix)
         if files != []:
             return CheckResult(passed=False, message=f"Error in list_files, expected an empty list, got: {files}.")
@@ -1,5 +1,17 @@
-from .setup_credentials import setup_credentials
-from .setup_directory import setup_root_dir
-from .setup_docker import setup_docker
+import importlib
+from typing import Any
+
+# imported on first use (PEP 562), the setup steps pull in git and docker.
+_exports = {
+    "setup_credentials": ".setup_credentials",
+    "setup_root_dir": ".setup_directory",
+    "setup_docker": ".setup_docker",
+}
 
 __all__ = ["setup_root_dir", "setup_docker", "setup_credentials"]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_exports[name], __name__), name)
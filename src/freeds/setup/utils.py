@@ -4,8 +4,9 @@ import shutil
 import string
 from pathlib import Path
 from typing import Any, Optional
+from freeds.config.cache import invalidate_config
 from freeds.utils.root_config import RootConfig
-import yaml
+from freeds.utils.yaml_io import dump_yaml_file, load_yaml_file
 
 import freeds.utils.log as log
 
@@ -82,16 +83,15 @@ def read_local_config(config_name: str) -> Optional[dict[str, Any]]:
     file_path = root_config.locals_path / (config_name + ".yaml")
     if not file_path.exists():
         return None
-    with open(file_path, "r") as file:
-        config: dict[str, str] = yaml.safe_load(file)
+    config: dict[str, str] = load_yaml_file(file_path)
     return config
 
 
 def write_local_config(config_name: str, data: dict[str, Any]) -> None:
     root_config = RootConfig()
     file_path = root_config.locals_path / (config_name + ".yaml")
-    with open(file_path, "w") as file:
-        yaml.dump(data, file, default_flow_style=False)
+    dump_yaml_file(data, file_path)
+    invalidate_config(config_name)
 
 
 # if __name__ == '__main__':
@@ -1,15 +1,16 @@
 import pyspark
 from pyspark.sql import SparkSession
 
-from freeds.config import get_config
+from freeds.config import get_config, get_configs
 from importlib.metadata import version
 
 
 def get_spark_session(app_name: str, use_local: bool = False) -> SparkSession:
     """Get spark client for s3."""
     print(f'Running on freeds version: {version("freeds")}')
-    s3_cfg = get_config("s3")
-    jdbc_cfg= get_config("jdbc")
+    cfgs = get_configs(["s3", "jdbc"])
+    s3_cfg = cfgs["s3"]
+    jdbc_cfg = cfgs["jdbc"]
     conf = (
         pyspark.conf.SparkConf()
         .setAppName(app_name)
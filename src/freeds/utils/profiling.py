@@ -0,0 +1,262 @@
+"""Startup profiling for the freeds cli: time spent importing modules, loading configs and on network calls.
+Enable with `freeds --profile-startup ...` or FREEDS_PROFILE_STARTUP=1, the report is printed as a table on stderr
+and written as json to FREEDS_PROFILE_STARTUP_FILE (default freeds-startup-profile.json in the temp folder).
+Only uses the standard library, so it can be started before anything else is imported."""
+
+import atexit
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from importlib.abc import Loader, MetaPathFinder
+from importlib.machinery import ModuleSpec
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Iterator, Optional, Sequence, TextIO
+
+PROFILE_FLAG = "--profile-startup"
+DEFAULT_REPORT_FILE_NAME = "freeds-startup-profile.json"
+
+
+def profiling_requested(argv: Optional[Sequence[str]] = None) -> bool:
+    """Check the command line and FREEDS_PROFILE_STARTUP for a request to profile."""
+    argv = sys.argv[1:] if argv is None else argv
+    env = os.environ.get("FREEDS_PROFILE_STARTUP", "").strip().lower()
+    return PROFILE_FLAG in argv or env not in ("", "0", "false", "no")
+
+
+def report_path() -> Path:
+    """Get the json report path, FREEDS_PROFILE_STARTUP_FILE or a file in the temp folder."""
+    env_path = os.environ.get("FREEDS_PROFILE_STARTUP_FILE")
+    if env_path:
+        return Path(env_path)
+    return Path(tempfile.gettempdir()) / DEFAULT_REPORT_FILE_NAME
+
+
+class _TimedLoader(Loader):
+    """Wraps a module loader to time exec_module, everything else is passed on to the real loader."""
+
+    def __init__(self, loader: Any, finder: "ImportTimer") -> None:
+        self._loader = loader
+        self._finder = finder
+
+    def create_module(self, spec: ModuleSpec) -> Optional[ModuleType]:
+        return self._loader.create_module(spec)  # type: ignore[no-any-return]
+
+    def exec_module(self, module: ModuleType) -> None:
+        self._finder.exec_timed(self._loader, module)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+
+class ImportTimer(MetaPathFinder):
+    """Meta path finder timing each module import, cumulative (including nested imports) and self time."""
+
+    def __init__(self, on_loaded: Optional[Callable[[ModuleType], None]] = None) -> None:
+        self.imports: list[dict[str, Any]] = []
+        self.on_loaded = on_loaded
+        self._local = threading.local()
+
+    def find_spec(self, fullname: str, path: Any, target: Optional[ModuleType] = None) -> Optional[ModuleSpec]:
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def exec_timed(self, loader: Any, module: ModuleType) -> None:
+        stack: list[float] = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.imports.append({"module": module.__name__, "self": elapsed - nested, "cumulative": elapsed})
+        if self.on_loaded is not None:
+            self.on_loaded(module)
+
+    def install(self) -> None:
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+
+class StartupProfiler:
+    """Collects import, config load and network call timings from start() until the report."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.command_started: Optional[float] = None
+        self.import_timer = ImportTimer(on_loaded=self._module_loaded)
+        self.configs: list[dict[str, Any]] = []
+        self.network: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> "StartupProfiler":
+        self.started = time.perf_counter()
+        self.import_timer.install()
+        # network calls go through urllib3, both for requests (config api) and botocore (s3)
+        if "urllib3.connectionpool" in sys.modules:
+            _patch_urllib3(sys.modules["urllib3.connectionpool"])
+        return self
+
+    def stop(self) -> None:
+        self.import_timer.uninstall()
+
+    def mark_command_start(self) -> None:
+        """Mark the end of startup, the time until here is reported as startup time."""
+        if self.command_started is None:
+            self.command_started = time.perf_counter()
+
+    def _module_loaded(self, module: ModuleType) -> None:
+        if module.__name__ == "urllib3.connectionpool":
+            _patch_urllib3(module)
+
+    def record_config(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.configs.append({"config": name, "seconds": seconds})
+
+    def record_network(self, method: str, url: str, status: Optional[int], seconds: float) -> None:
+        with self._lock:
+            self.network.append({"method": method, "url": url, "status": status, "seconds": seconds})
+
+    def report(self) -> dict[str, Any]:
+        """Get the collected timings, slowest first."""
+        now = time.perf_counter()
+        startup_end = self.command_started if self.command_started is not None else now
+        imports = sorted(self.import_timer.imports, key=lambda i: i["cumulative"], reverse=True)
+        return {
+            "argv": sys.argv,
+            "startup_seconds": startup_end - self.started,
+            "total_seconds": now - self.started,
+            "import_seconds": sum(i["self"] for i in imports),
+            "config_seconds": sum(c["seconds"] for c in self.configs),
+            "network_seconds": sum(n["seconds"] for n in self.network),
+            "imports": imports,
+            "configs": list(self.configs),
+            "network": list(self.network),
+        }
+
+    def write_report(self, stream: Optional[TextIO] = None, path: Optional[Path] = None, top: int = 25) -> Path:
+        """Print the report as a table (stderr by default) and write it as json."""
+        stream = stream or sys.stderr
+        data = self.report()
+        path = path or report_path()
+        with open(path, "w") as file:
+            json.dump(data, file, indent=2)
+
+        def line(label: str, seconds: float, extra: str = "") -> None:
+            stream.write(f"{seconds * 1000:10.1f} ms  {label}{extra}\n")
+
+        stream.write(f"\nfreeds startup profile, full report in {path}\n")
+        line("startup (until the command runs)", data["startup_seconds"])
+        line("total", data["total_seconds"])
+        stream.write(f"\nimports ({len(data['imports'])} modules, top {top} by cumulative time)\n")
+        stream.write(f"{'cumulative':>13}  {'self':>10}  module\n")
+        for entry in data["imports"][:top]:
+            stream.write(f"{entry['cumulative'] * 1000:10.1f} ms {entry['self'] * 1000:8.1f} ms  {entry['module']}\n")
+        stream.write(f"\nconfig loads ({len(data['configs'])})\n")
+        for entry in data["configs"]:
+            line(entry["config"], entry["seconds"])
+        stream.write(f"\nnetwork calls ({len(data['network'])})\n")
+        for entry in data["network"]:
+            line(f"{entry['method']} {entry['url']}", entry["seconds"], f" -> {entry['status']}")
+        return path
+
+
+_profiler: Optional[StartupProfiler] = None
+_urllib3_patched = False
+
+
+def _patch_urllib3(module: ModuleType) -> None:
+    """Time urllib3 requests for the running profiler, patched once and a pass through when not profiling."""
+    global _urllib3_patched
+    if _urllib3_patched:
+        return
+    _urllib3_patched = True
+    pool_class = module.HTTPConnectionPool
+    urlopen = pool_class.urlopen
+
+    def timed_urlopen(pool: Any, method: str, url: str, *args: Any, **kwargs: Any) -> Any:
+        profiler = _profiler
+        if profiler is None:
+            return urlopen(pool, method, url, *args, **kwargs)
+        start = time.perf_counter()
+        status: Optional[int] = None
+        try:
+            response = urlopen(pool, method, url, *args, **kwargs)
+            status = getattr(response, "status", None)
+            return response
+        finally:
+            profiler.record_network(
+                method, f"{pool.scheme}://{pool.host}:{pool.port}{url}", status, time.perf_counter() - start
+            )
+
+    pool_class.urlopen = timed_urlopen
+
+
+def get_profiler() -> Optional[StartupProfiler]:
+    """Get the running profiler, None if profiling is not enabled."""
+    return _profiler
+
+
+def start_profiling(write_at_exit: bool = True) -> StartupProfiler:
+    """Start profiling the process, the report is written at exit unless write_at_exit is False."""
+    global _profiler
+    if _profiler is None:
+        _profiler = StartupProfiler().start()
+        if write_at_exit:
+            atexit.register(_write_at_exit)
+    return _profiler
+
+
+def stop_profiling() -> Optional[StartupProfiler]:
+    """Stop profiling, returns the stopped profiler to report on."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+def _write_at_exit() -> None:
+    profiler = stop_profiling()
+    if profiler is not None:
+        profiler.write_report()
+
+
+@contextlib.contextmanager
+def timed_config(config_name: str) -> Iterator[None]:
+    """Time loading a config when profiling, a no-op otherwise."""
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.record_config(config_name, time.perf_counter() - start)
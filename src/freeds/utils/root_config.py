@@ -1,6 +1,8 @@
 from pathlib import Path
-import yaml
 import os
+
+from freeds.utils.yaml_io import dump_yaml_file, load_yaml_file
+
 class RootConfig:
     def freeds_file_path(self) -> Path:
         return Path.home() / ".freeds"
@@ -24,10 +26,9 @@ class RootConfig:
         if p:
             self.root_path = Path(p)
         else:
-            with open(self.freeds_file_path(), "r") as file:
-                self.data  = yaml.safe_load(file)
-                cfg = self.data.get('config',{})
-                self.root_path = Path(cfg.get('root_path'))
+            self.data = load_yaml_file(self.freeds_file_path())
+            cfg = self.data.get('config',{})
+            self.root_path = Path(cfg.get('root_path'))
 
         self.configs_path = Path(
             os.environ.get(
@@ -48,6 +49,5 @@ class RootConfig:
                 "root_path": str(root_path)
             }
         }
-        with open(self.freeds_file_path() , "w") as f:
-            yaml.dump(cfg, f, default_flow_style=False)
+        dump_yaml_file(cfg, self.freeds_file_path())
         self.load()
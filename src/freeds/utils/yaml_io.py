@@ -0,0 +1,94 @@
+"""Yaml reading and writing for freeds, using the libyaml C loader and dumper when PyYAML is built with it.
+
+Freeds configs are read as yaml 1.1 (PyYAML). Files read by other tools that follow yaml 1.2, like docker compose
+files, are read with load_yaml12_file so their values come out the same as those tools see them."""
+
+import time
+from pathlib import Path
+from typing import IO, Any, Union
+
+import yaml
+
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+
+    HAS_LIBYAML = True
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper, SafeLoader  # type: ignore[assignment]
+
+    HAS_LIBYAML = False
+
+
+def load_yaml(stream: Union[str, bytes, IO[str], IO[bytes]]) -> Any:
+    """Parse a yaml string or stream, like yaml.safe_load but faster."""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def load_yaml_file(path: Union[str, Path]) -> Any:
+    """Parse a yaml file."""
+    with open(path, "r") as file:
+        return load_yaml(file)
+
+
+def load_yaml12_file(path: Union[str, Path]) -> Any:
+    """Parse a yaml file as yaml 1.2 (ruamel.yaml), where an unquoted 22:22 is a string, not the base 60 int 1342."""
+    from ruamel.yaml import YAML
+
+    with open(path, "r") as file:
+        return YAML(typ="safe").load(file)
+
+
+def dump_yaml(data: Any, stream: Union[None, IO[str]] = None, **kwargs: Any) -> Union[None, str]:
+    """Write data as yaml to stream, or return it as a string if no stream is given. Like yaml.safe_dump but faster."""
+    kwargs.setdefault("default_flow_style", False)
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwargs)  # type: ignore[no-any-return]
+
+
+def dump_yaml_file(data: Any, path: Union[str, Path], **kwargs: Any) -> None:
+    """Write data as yaml to a file."""
+    with open(path, "w") as file:
+        dump_yaml(data, file, **kwargs)
+
+
+def _sample_config(plugins: int) -> dict[str, Any]:
+    """A stacks/plugins like config with the given number of plugins."""
+    plugin_list = [
+        {
+            "name": f"plugin-{i}",
+            "repo": "the-free-data-stack",
+            "containers": [f"container-{i}-{j}" for j in range(3)],
+            "ports": [{"number": 8000 + i * 10 + j, "description": f"web ui {j}", "url": True} for j in range(4)],
+            "env": {f"KEY_{j}": f"value {j}" for j in range(5)},
+        }
+        for i in range(plugins)
+    ]
+    stacks = {f"stack-{i}": {"plugins": [p["name"] for p in plugin_list[: i + 1]]} for i in range(plugins)}
+    return {"config": {"plugins": plugin_list, "stacks": stacks}}
+
+
+def benchmark(plugins: int = 200, repeat: int = 5) -> dict[str, float]:
+    """Time parsing a large plugins/stacks config with the pure python and the libyaml loader, best of repeat."""
+    text = yaml.dump(_sample_config(plugins), Dumper=yaml.SafeDumper, default_flow_style=False)
+    loaders: dict[str, Any] = {"pure python": yaml.SafeLoader}
+    if HAS_LIBYAML:
+        loaders["libyaml"] = yaml.CSafeLoader
+    timings = {}
+    for name, loader in loaders.items():
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            yaml.load(text, Loader=loader)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+    return timings
+
+
+if __name__ == "__main__":
+    kb = len(yaml.dump(_sample_config(200), Dumper=yaml.SafeDumper)) / 1024
+    print(f"Parsing a {kb:.0f} KB plugins/stacks config, libyaml available: {HAS_LIBYAML}")
+    results = benchmark()
+    for name, seconds in results.items():
+        print(f"{name:>12}: {seconds * 1000:8.1f} ms")
+    if len(results) == 2:
+        print(f"{'speedup':>12}: {results['pure python'] / results['libyaml']:8.1f}x")
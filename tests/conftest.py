@@ -0,0 +1,13 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.fixture
+def mock_s3_client(monkeypatch):
+    """A MagicMock S3 client returned by get_s3_client in all the freeds.s3 modules."""
+    client = MagicMock()
+    client.delete_objects.return_value = {}
+    for module in ("s3", "transfer", "delete"):
+        monkeypatch.setattr(f"freeds.s3.{module}.get_s3_client", lambda: client)
+    return client
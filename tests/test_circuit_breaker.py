@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from freeds.config.api.circuit_breaker import CircuitBreaker, CircuitState
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("freeds.config.api.circuit_breaker.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_closed_result_remembered(clock):
+    breaker = CircuitBreaker(window=10)
+    calls = []
+    probe = lambda: calls.append(1) or True  # noqa: E731
+    assert breaker.check(probe)
+    clock[0] += 5
+    assert breaker.check(probe)
+    assert len(calls) == 1
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_open_then_half_open_then_closed(clock):
+    breaker = CircuitBreaker(window=10)
+    assert not breaker.check(lambda: False)
+    assert breaker.state == CircuitState.OPEN
+    # within the window no probe is made
+    assert not breaker.check(lambda: pytest.fail("should not probe"))
+
+    clock[0] += 11
+    states = []
+
+    def probe() -> bool:
+        states.append(breaker.state)
+        return True
+
+    assert breaker.check(probe)
+    assert states == [CircuitState.HALF_OPEN]
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_probe_exception_opens(clock):
+    breaker = CircuitBreaker(window=10)
+
+    def probe() -> bool:
+        raise RuntimeError("boom")
+
+    assert not breaker.check(probe)
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_record_failure_opens_circuit(clock):
+    breaker = CircuitBreaker(window=10)
+    breaker.check(lambda: True)
+    breaker.record_failure()
+    assert not breaker.check(lambda: pytest.fail("should not probe"))
+
+
+def test_single_probe_while_half_open(clock):
+    breaker = CircuitBreaker(window=10)
+    breaker.check(lambda: False)
+    clock[0] += 11
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_probe() -> bool:
+        started.set()
+        release.wait(5)
+        return True
+
+    results = []
+    t = threading.Thread(target=lambda: results.append(breaker.check(slow_probe)))
+    t.start()
+    started.wait(5)
+    # a concurrent caller doesn't wait for the slow probe, it gets the last known state
+    assert not breaker.check(lambda: pytest.fail("should not probe"))
+    release.set()
+    t.join()
+    assert results == [True]
+    assert breaker.probes == 2
+
+
+def test_reset(clock):
+    breaker = CircuitBreaker(window=10)
+    breaker.check(lambda: False)
+    breaker.reset()
+    assert breaker.check(lambda: True)
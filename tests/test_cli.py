@@ -0,0 +1,95 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from typer.testing import CliRunner
+
+from freeds.cli.cli import FreedsGroup, app
+from freeds.cli.lazy import load_command
+
+HEAVY_MODULES = ["boto3", "docker", "nbformat", "git", "airflow_client", "papermill"]
+
+# generous, a bare `import freeds.cli.cli` takes well under 100 ms, eager imports took 600+ ms.
+IMPORT_BUDGET_SECONDS = 0.5
+
+
+def run_python(code: str) -> dict:
+    env = {k: v for k, v in os.environ.items() if not k.startswith("FREEDS_")}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_budget():
+    result = run_python(
+        "import json, os, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import freeds.cli.cli\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "env = [k for k in os.environ if k.startswith('FREEDS_')]\n"
+        "print(json.dumps({'elapsed': elapsed, 'heavy': heavy, 'env': env}))\n"
+    )
+    assert result["heavy"] == []
+    assert result["env"] == [], "importing the cli must not populate the environment"
+    assert result["elapsed"] < IMPORT_BUDGET_SECONDS
+
+
+@pytest.mark.parametrize("argv", [["--help"], ["stack", "--help"], ["config", "--help"]])
+def test_help_does_not_import_heavy_modules(argv):
+    result = run_python(
+        "import json, sys\n"
+        "from freeds.cli.cli import app\n"
+        "try:\n"
+        f"    app({argv!r})\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print(json.dumps({{'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    assert result["heavy"] == []
+
+
+def test_help_lists_all_commands():
+    result = CliRunner().invoke(app, ["--help"])
+    assert result.exit_code == 0
+    for name in FreedsGroup.lazy_commands:
+        assert name in result.output
+
+
+def test_lazy_command_runs():
+    result = CliRunner().invoke(app, ["dc"])
+    assert "docker compose command must be given" in result.output
+
+
+def test_unknown_command():
+    result = CliRunner().invoke(app, ["nope"])
+    assert result.exit_code != 0
+
+
+@pytest.mark.parametrize("name", list(FreedsGroup.lazy_commands))
+def test_lazy_help_matches_command(name):
+    spec, short_help = FreedsGroup.lazy_commands[name]
+    command = load_command(spec, name)
+    assert command.name == name
+    assert " ".join(command.help.split()).startswith(short_help)
+
+
+def test_selfcheck_warm_configs_falls_back(monkeypatch, caplog):
+    from freeds.cli.commands import selfcheck
+
+    def get_configs(names):
+        raise FileNotFoundError("airflow")
+
+    loaded = []
+
+    def get_config(name):
+        if name == "airflow":
+            raise FileNotFoundError("airflow")
+        loaded.append(name)
+
+    monkeypatch.setattr(selfcheck, "get_configs", get_configs)
+    monkeypatch.setattr(selfcheck, "get_config", get_config)
+    selfcheck.warm_configs(["plugins", "s3", "airflow"])
+    assert loaded == ["plugins", "s3"]
+    assert "Could not load config airflow" in caplog.text
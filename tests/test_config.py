@@ -1,11 +1,21 @@
 from unittest.mock import patch
 
 import pytest
+import requests
 
-from freeds.config.config import get_config
+from freeds.config.cache import config_cache
+from freeds.config.config import get_config, get_configs
 from freeds.config.file.config_classes import ConfigFile
 
 
+@pytest.fixture(autouse=True)
+def clear_config_cache():
+    config_cache.invalidate()
+    config_cache.reset_stats()
+    yield
+    config_cache.invalidate()
+
+
 @pytest.fixture
 def mock_api_config():
     return {"foo": "bar"}
@@ -42,3 +52,87 @@ def test_get_config_raises_on_none():
 def test_get_config_raises_on_empty():
     with pytest.raises(ValueError, match="A config_name must be provided."):
         get_config("")
+
+
+def test_get_config_cached(monkeypatch, mock_api_config):
+    with (
+        patch("freeds.config.config.is_api_avaiable", return_value=True) as mock_available,
+        patch("freeds.config.config.get_config_from_api", return_value=mock_api_config) as mock_get,
+    ):
+        assert get_config("myconfig") == mock_api_config
+        assert get_config("myconfig") == mock_api_config
+        assert mock_get.call_count == 1
+        assert mock_available.call_count == 1
+    assert config_cache.stats()["hits"] == 1
+
+
+def test_get_config_bypass_cache(monkeypatch, mock_api_config):
+    with (
+        patch("freeds.config.config.is_api_avaiable", return_value=True),
+        patch("freeds.config.config.get_config_from_api", return_value=mock_api_config) as mock_get,
+    ):
+        get_config("myconfig")
+        get_config("myconfig", use_cache=False)
+        assert mock_get.call_count == 2
+
+
+def test_get_config_cache_disabled(monkeypatch, mock_api_config):
+    monkeypatch.setenv("FREEDS_CONFIG_CACHE_TTL", "0")
+    with (
+        patch("freeds.config.config.is_api_avaiable", return_value=True),
+        patch("freeds.config.config.get_config_from_api", return_value=mock_api_config) as mock_get,
+    ):
+        get_config("myconfig")
+        get_config("myconfig")
+        assert mock_get.call_count == 2
+
+
+def test_get_config_api_connection_error_falls_back_to_file(monkeypatch, mock_file_config):
+    cfg_file = ConfigFile.__new__(ConfigFile)
+    cfg_file.data = {"config": mock_file_config}
+    with (
+        patch("freeds.config.config.is_api_avaiable", return_value=True),
+        patch("freeds.config.config.get_config_from_api", side_effect=requests.exceptions.ConnectionError),
+        patch("freeds.config.config.get_config_from_file", return_value=cfg_file),
+    ):
+        assert get_config("myconfig") == mock_file_config
+
+
+def test_get_configs_api(monkeypatch):
+    cfgs = {"a": {"x": 1}, "b": {"x": 2}}
+    with (
+        patch("freeds.config.config.is_api_avaiable", return_value=True),
+        patch("freeds.config.config.get_configs_from_api", return_value=cfgs) as mock_get,
+    ):
+        assert get_configs(["b", "a"]) == {"b": {"x": 2}, "a": {"x": 1}}
+        mock_get.assert_called_once_with(["b", "a"])
+        # now both are cached
+        assert get_configs(["a", "b"]) == cfgs
+        assert mock_get.call_count == 1
+
+
+def test_get_configs_only_fetches_missing(monkeypatch):
+    with (
+        patch("freeds.config.config.is_api_avaiable", return_value=True),
+        patch("freeds.config.config.get_config_from_api", return_value={"x": 1}),
+        patch("freeds.config.config.get_configs_from_api", return_value={"b": {"x": 2}}) as mock_get,
+    ):
+        get_config("a")
+        assert get_configs(["a", "b"]) == {"a": {"x": 1}, "b": {"x": 2}}
+        mock_get.assert_called_once_with(["b"])
+
+
+def test_get_configs_file(monkeypatch):
+    cfg_file = ConfigFile.__new__(ConfigFile)
+    cfg_file.data = {"config": {"x": 1}}
+    with (
+        patch("freeds.config.config.is_api_avaiable", return_value=False),
+        patch("freeds.config.config.get_configs_from_file", return_value={"a": cfg_file, "b": None}),
+    ):
+        with pytest.raises(FileNotFoundError, match="Config b not found"):
+            get_configs(["a", "b"])
+
+
+def test_get_configs_raises_on_empty_name():
+    with pytest.raises(ValueError, match="A config_name must be provided."):
+        get_configs(["a", ""])
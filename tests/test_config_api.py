@@ -1,3 +1,4 @@
+import copy
 from unittest import mock
 
 import pytest
@@ -12,19 +13,36 @@ def patch_env(monkeypatch):
     monkeypatch.delenv("FREEDS_CONFIG_URL", raising=False)
 
 
+@pytest.fixture(autouse=True)
+def reset_circuit(monkeypatch):
+    config_api.api_circuit.reset()
+    monkeypatch.setattr(config_api, "_batch_supported", None)
+    config_api.clear_validated()
+    yield
+    config_api.api_circuit.reset()
+
+
 MOCK_CONFIG = {"config": {"foo": "bar"}, "meta": {"baz": "qux"}}
 
 
 @pytest.fixture
-def mock_requests_get_valid_config():
+def mock_session():
+    """Mock the shared config api session."""
+    session = mock.Mock()
+    with mock.patch("freeds.config.api.config_api.get_session", return_value=session):
+        yield session
+
+
+@pytest.fixture
+def mock_requests_get_valid_config(mock_session):
     """Mock config api server returning a valid config."""
-    with mock.patch("requests.get") as mock_get:
-        mock_response = mock.Mock()
-        mock_response.json.return_value = MOCK_CONFIG
-        mock_response.status_code = 200
-        mock_response.raise_for_status = mock.Mock()
-        mock_get.return_value = mock_response
-        yield
+    mock_response = mock.Mock()
+    mock_response.json.return_value = MOCK_CONFIG
+    mock_response.status_code = 200
+    mock_response.raise_for_status = mock.Mock()
+    mock_response.headers = {}
+    mock_session.get.return_value = mock_response
+    yield mock_session.get
 
 
 def test_get_config_url_default():
@@ -36,20 +54,20 @@ def test_get_config_url_env(monkeypatch):
     assert config_api.get_config_url() == "http://custom-url/"
 
 
-def test_is_api_avaiable_true(monkeypatch):
-    with mock.patch("requests.head") as mock_head:
+def test_is_api_avaiable_true(monkeypatch, mock_session):
+    with mock.patch.object(mock_session, "head") as mock_head:
         mock_head.return_value.status_code = 200
         assert config_api.is_api_avaiable() is True
 
 
-def test_is_api_avaiable_false(monkeypatch):
-    with mock.patch("requests.head") as mock_head:
+def test_is_api_avaiable_false(monkeypatch, mock_session):
+    with mock.patch.object(mock_session, "head") as mock_head:
         mock_head.return_value.status_code = 404
         assert config_api.is_api_avaiable() is False
 
 
-def test_is_api_avaiable_exception(monkeypatch):
-    with mock.patch("requests.head", side_effect=requests.exceptions.RequestException):
+def test_is_api_avaiable_exception(monkeypatch, mock_session):
+    with mock.patch.object(mock_session, "head", side_effect=requests.exceptions.RequestException):
         assert config_api.is_api_avaiable() is False
 
 
@@ -58,12 +76,18 @@ def test_get_full_config_response_success(monkeypatch, mock_requests_get_valid_c
     assert result == MOCK_CONFIG
 
 
-def test_get_full_config_response_none(monkeypatch):
-    with mock.patch("requests.get") as mock_get:
+def test_get_full_config_response_decodes_json_once(monkeypatch, mock_requests_get_valid_config):
+    config_api.get_full_config_response("myconfig")
+    assert mock_requests_get_valid_config.return_value.json.call_count == 1
+
+
+def test_get_full_config_response_none(monkeypatch, mock_session):
+    with mock.patch.object(mock_session, "get") as mock_get:
         mock_response = mock.Mock()
         mock_response.json.return_value = None
         mock_response.text = "not found"
         mock_response.raise_for_status = mock.Mock()
+        mock_response.headers = {}
         mock_get.return_value = mock_response
         with pytest.raises(ValueError, match="Config 'myconfig' not found"):
             config_api.get_full_config_response("myconfig")
@@ -90,3 +114,132 @@ def test_get_config_no_config_key(monkeypatch):
 def test_get_meta_success(monkeypatch, mock_requests_get_valid_config):
     result = config_api.get_meta("myconfig.yaml")
     assert result == MOCK_CONFIG["meta"]
+
+
+def test_is_api_avaiable_remembered(monkeypatch, mock_session):
+    with mock.patch.object(mock_session, "head") as mock_head:
+        mock_head.return_value.status_code = 200
+        assert config_api.is_api_avaiable() is True
+        assert config_api.is_api_avaiable() is True
+        assert mock_head.call_count == 1
+
+
+def test_is_api_avaiable_unavailable_remembered(monkeypatch, mock_session):
+    with mock.patch.object(mock_session, "head", side_effect=requests.exceptions.ConnectionError) as mock_head:
+        assert config_api.is_api_avaiable() is False
+        assert config_api.is_api_avaiable() is False
+        assert mock_head.call_count == 1
+    assert config_api.api_circuit.state == "open"
+
+
+def test_is_api_avaiable_probe_window_zero(monkeypatch, mock_session):
+    monkeypatch.setenv("FREEDS_CONFIG_PROBE_WINDOW", "0")
+    with mock.patch.object(mock_session, "head") as mock_head:
+        mock_head.return_value.status_code = 200
+        config_api.is_api_avaiable()
+        config_api.is_api_avaiable()
+        assert mock_head.call_count == 2
+
+
+def test_head_uses_timeout(monkeypatch, mock_session):
+    monkeypatch.setenv("FREEDS_CONFIG_CONNECT_TIMEOUT", "1.5")
+    monkeypatch.setenv("FREEDS_CONFIG_READ_TIMEOUT", "4")
+    with mock.patch.object(mock_session, "head") as mock_head:
+        mock_head.return_value.status_code = 200
+        config_api.is_api_avaiable()
+        assert mock_head.call_args.kwargs["timeout"] == (1.5, 4.0)
+
+
+def test_get_connection_error_opens_circuit(monkeypatch, mock_session):
+    config_api.api_circuit.record_success()
+    with mock.patch.object(mock_session, "get", side_effect=requests.exceptions.ConnectionError):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            config_api.get_full_config_response("myconfig")
+    with mock.patch.object(mock_session, "head") as mock_head:
+        assert config_api.is_api_avaiable() is False
+        mock_head.assert_not_called()
+
+
+def _response(status_code, json_data, headers=None):
+    response = mock.Mock()
+    response.status_code = status_code
+    response.json.return_value = json_data
+    response.raise_for_status = mock.Mock()
+    response.headers = headers or {}
+    return response
+
+
+def test_get_configs_from_api_batch(monkeypatch, mock_session):
+    mock_session.get.return_value = _response(
+        200, {"configs": {"a": {"config": {"x": 1}}, "b": {"config": {"x": 2}, "meta": {}}}}
+    )
+    result = config_api.get_configs_from_api(["a", "b"])
+    assert result == {"a": {"x": 1}, "b": {"x": 2}}
+    assert mock_session.get.call_count == 1
+    assert mock_session.get.call_args.kwargs["params"] == {"names": "a,b"}
+
+
+def test_get_configs_from_api_batch_missing(monkeypatch, mock_session):
+    mock_session.get.return_value = _response(200, {"configs": {"a": {"config": {"x": 1}}}})
+    with pytest.raises(FileNotFoundError, match="Config b not found"):
+        config_api.get_configs_from_api(["a", "b"])
+
+
+def test_get_configs_from_api_concurrent_fallback(monkeypatch, mock_session):
+    def get(url, params=None, headers=None, timeout=None):
+        if params:
+            return _response(404, None)
+        name = url.rsplit("/", 1)[-1]
+        return _response(200, {"config": {"name": name}})
+
+    mock_session.get.side_effect = get
+    result = config_api.get_configs_from_api(["a", "b", "c"])
+    assert result == {"a": {"name": "a"}, "b": {"name": "b"}, "c": {"name": "c"}}
+    assert config_api._batch_supported is False
+    # batch is not tried again once we know it's unsupported
+    mock_session.get.reset_mock()
+    config_api.get_configs_from_api(["a", "b"])
+    assert mock_session.get.call_count == 2
+
+
+def test_conditional_get_not_modified(monkeypatch, mock_session):
+    mock_session.get.side_effect = [
+        _response(200, copy.deepcopy(MOCK_CONFIG), {"ETag": '"v1"', "Last-Modified": "Wed, 21 Oct 2026 07:28:00 GMT"}),
+        _response(304, None),
+    ]
+    first = config_api.get_full_config_response("myconfig")
+    assert "If-None-Match" not in mock_session.get.call_args.kwargs["headers"]
+    first["config"]["foo"] = "changed"
+
+    second = config_api.get_full_config_response("myconfig")
+    assert second == MOCK_CONFIG
+    headers = mock_session.get.call_args.kwargs["headers"]
+    assert headers == {"If-None-Match": '"v1"', "If-Modified-Since": "Wed, 21 Oct 2026 07:28:00 GMT"}
+
+
+def test_conditional_get_modified(monkeypatch, mock_session):
+    new_config = {"config": {"foo": "new"}}
+    mock_session.get.side_effect = [
+        _response(200, MOCK_CONFIG, {"ETag": '"v1"'}),
+        _response(200, new_config, {"ETag": '"v2"'}),
+        _response(304, None),
+    ]
+    config_api.get_full_config_response("myconfig")
+    assert config_api.get_full_config_response("myconfig") == new_config
+    assert config_api.get_full_config_response("myconfig") == new_config
+    assert mock_session.get.call_args.kwargs["headers"] == {"If-None-Match": '"v2"'}
+
+
+def test_no_validators_no_conditional_get(monkeypatch, mock_session):
+    mock_session.get.return_value = _response(200, MOCK_CONFIG)
+    config_api.get_full_config_response("myconfig")
+    config_api.get_full_config_response("myconfig")
+    assert mock_session.get.call_args.kwargs["headers"] == {}
+
+
+def test_probe_does_not_retry():
+    session = mock.Mock()
+    session.head.return_value.status_code = 200
+    with mock.patch("freeds.config.api.config_api.get_session", return_value=session) as get_session:
+        assert config_api.probe_api()
+    get_session.assert_called_once_with(retry=False)
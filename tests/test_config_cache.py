@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from freeds.config.cache import ConfigCache, get_default_ttl
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("freeds.config.cache.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_get_missing():
+    cache = ConfigCache(ttl=10)
+    assert cache.get("nope") is None
+    assert cache.stats() == {"hits": 0, "misses": 1, "size": 0}
+
+
+def test_put_and_get():
+    cache = ConfigCache(ttl=10)
+    cache.put("s3", {"url": "http://minio"})
+    assert cache.get("s3") == {"url": "http://minio"}
+    assert cache.stats() == {"hits": 1, "misses": 0, "size": 1}
+    assert "s3" in cache
+
+
+def test_values_are_copied():
+    cache = ConfigCache(ttl=10)
+    cfg = {"nested": {"a": 1}}
+    cache.put("cfg", cfg)
+    cfg["nested"]["a"] = 2
+    got = cache.get("cfg")
+    assert got == {"nested": {"a": 1}}
+    got["nested"]["a"] = 3  # type: ignore[index]
+    assert cache.get("cfg") == {"nested": {"a": 1}}
+
+
+def test_expiry(clock):
+    cache = ConfigCache(ttl=10)
+    cache.put("s3", {"url": "x"})
+    clock[0] += 9.9
+    assert cache.get("s3") == {"url": "x"}
+    clock[0] += 0.2
+    assert cache.get("s3") is None
+    assert "s3" not in cache
+    assert cache.stats()["size"] == 0
+
+
+def test_invalidate_single_and_all():
+    cache = ConfigCache(ttl=10)
+    cache.put("a", {"x": 1})
+    cache.put("b", {"x": 2})
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert cache.get("b") == {"x": 2}
+    cache.invalidate()
+    assert cache.get("b") is None
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ConfigCache(ttl=0)
+    assert not cache.enabled
+    cache.put("a", {"x": 1})
+    assert cache.get("a") is None
+
+
+def test_ttl_from_env(monkeypatch):
+    monkeypatch.setenv("FREEDS_CONFIG_CACHE_TTL", "5")
+    assert get_default_ttl() == 5.0
+    assert ConfigCache().ttl == 5.0
+    monkeypatch.setenv("FREEDS_CONFIG_CACHE_TTL", "not a number")
+    with pytest.raises(ValueError):
+        get_default_ttl()
+
+
+def test_thread_safe_counters():
+    cache = ConfigCache(ttl=10)
+    cache.put("a", {"x": 1})
+
+    def worker() -> None:
+        for _ in range(500):
+            cache.get("a")
+            cache.get("b")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert cache.stats()["hits"] == 4000
+    assert cache.stats()["misses"] == 4000
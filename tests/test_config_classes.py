@@ -0,0 +1,99 @@
+from unittest import mock
+
+import pytest
+import yaml
+
+from freeds.config.file import config_classes
+from freeds.config.file.file_cache import parsed_cache
+from freeds.utils.yaml_io import load_yaml
+
+
+@pytest.fixture
+def config_dirs(tmp_path, monkeypatch):
+    configs = tmp_path / "configs"
+    locals_ = tmp_path / "locals"
+    configs.mkdir()
+    locals_.mkdir()
+    monkeypatch.setenv("FREEDS_ROOT_PATH", str(tmp_path))
+    monkeypatch.setenv("FREEDS_CONFIGS_PATH", str(configs))
+    monkeypatch.setenv("FREEDS_LOCALS_PATH", str(locals_))
+    return configs, locals_
+
+
+def write(path, data):
+    with open(path, "w") as f:
+        yaml.dump(data, f)
+
+
+def test_config_set_does_not_parse(config_dirs):
+    configs, locals_ = config_dirs
+    write(configs / "s3.yaml", {"config": {"url": "a"}})
+    write(configs / "jdbc.yml", {"config": {"user": "u"}})
+    (configs / "notes.txt").write_text("not a config")
+    with mock.patch("freeds.utils.yaml_io.load_yaml") as safe_load:
+        cfg_set = config_classes.ConfigSet(configs_path=configs, locals_path=locals_)
+        safe_load.assert_not_called()
+    assert set(cfg_set.config_set) == {"s3", "jdbc"}
+    assert not any(cfg.is_loaded for cfg in cfg_set.config_set.values())
+
+
+def test_config_parsed_once_on_first_use(config_dirs):
+    configs, locals_ = config_dirs
+    write(configs / "s3.yaml", {"config": {"url": "a"}})
+    cfg_set = config_classes.ConfigSet(configs_path=configs, locals_path=locals_)
+    cfg = cfg_set.config_set["s3"]
+    with mock.patch("freeds.utils.yaml_io.load_yaml", wraps=load_yaml) as safe_load:
+        assert cfg.get_config() == {"url": "a"}
+        assert cfg.get_config() == {"url": "a"}
+        assert safe_load.call_count == 1
+    assert cfg.is_loaded
+
+
+def test_locals_override_configs(config_dirs):
+    configs, locals_ = config_dirs
+    write(configs / "s3.yaml", {"config": {"url": "from configs"}})
+    write(locals_ / "s3.yaml", {"config": {"url": "from locals"}})
+    cfg = config_classes.get_config("s3")
+    assert cfg is not None
+    assert cfg.is_local
+    assert cfg.get_config() == {"url": "from locals"}
+
+
+def test_malformed_config_raises_on_use(config_dirs):
+    configs, locals_ = config_dirs
+    write(configs / "bad.yaml", {"notconfig": 1})
+    cfg = config_classes.get_config("bad")
+    assert cfg is not None
+    with pytest.raises(ValueError, match="no 'config' root key"):
+        cfg.get_config()
+
+
+def test_get_config_missing(config_dirs):
+    assert config_classes.get_config("missing") is None
+
+
+def test_get_configs(config_dirs):
+    configs, _ = config_dirs
+    write(configs / "a.yaml", {"config": {"x": 1}})
+    result = config_classes.get_configs(["a", "b"])
+    assert result["b"] is None
+    assert result["a"].get_config() == {"x": 1}  # type: ignore[union-attr]
+
+
+def test_unchanged_file_parsed_once_across_config_sets(config_dirs):
+    configs, _ = config_dirs
+    write(configs / "s3.yaml", {"config": {"url": "a"}})
+    with mock.patch("freeds.utils.yaml_io.load_yaml", wraps=load_yaml) as safe_load:
+        for _ in range(3):
+            assert config_classes.get_config("s3").get_config() == {"url": "a"}  # type: ignore[union-attr]
+        assert safe_load.call_count == 1
+
+
+def test_changed_file_parsed_again(config_dirs):
+    configs, _ = config_dirs
+    path = configs / "s3.yaml"
+    write(path, {"config": {"url": "a"}})
+    assert config_classes.get_config("s3").get_config() == {"url": "a"}  # type: ignore[union-attr]
+    write(path, {"config": {"url": "changed"}})
+    assert config_classes.get_config("s3").get_config() == {"url": "changed"}  # type: ignore[union-attr]
+    assert path in parsed_cache
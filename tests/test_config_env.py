@@ -0,0 +1,109 @@
+import os
+from unittest import mock
+
+import pytest
+import yaml
+
+from freeds.config import config
+
+
+@pytest.fixture
+def config_dirs(tmp_path, monkeypatch):
+    configs = tmp_path / "configs"
+    locals_ = tmp_path / "locals"
+    configs.mkdir()
+    locals_.mkdir()
+    monkeypatch.setenv("FREEDS_ROOT_PATH", str(tmp_path))
+    monkeypatch.setenv("FREEDS_CONFIGS_PATH", str(configs))
+    monkeypatch.setenv("FREEDS_LOCALS_PATH", str(locals_))
+    monkeypatch.delenv("FREEDS_CONFIG_SNAPSHOT", raising=False)
+    monkeypatch.delenv("FREEDS_ENV_FILE", raising=False)
+    write(configs / "s3.yaml", {"config": {"url": "http://minio:9000", "buckets": ["a"]}})
+    write(configs / "jdbc.yaml", {"config": {"user": "freeds"}})
+    config.clear_env_cache()
+    yield configs, locals_
+    config.clear_env_cache()
+
+
+def write(path, data):
+    with open(path, "w") as f:
+        yaml.dump(data, f)
+
+
+def bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_get_env(config_dirs, tmp_path):
+    envs = config.get_env()
+    assert envs["FREEDS_ROOT_PATH"] == str(tmp_path)
+    assert envs["FREEDS_S3_URL"] == "http://minio:9000"
+    assert envs["FREEDS_JDBC_USER"] == "freeds"
+    assert "FREEDS_S3_BUCKETS" not in envs
+
+
+def test_get_env_cached(config_dirs):
+    first = config.get_env()
+    with mock.patch("freeds.config.config._build_env") as build:
+        second = config.get_env()
+    build.assert_not_called()
+    assert first == second
+    # callers get their own copy
+    second["FREEDS_S3_URL"] = "changed"
+    assert config.get_env()["FREEDS_S3_URL"] == "http://minio:9000"
+
+
+def test_get_env_recomputed_on_change(config_dirs):
+    configs, locals_ = config_dirs
+    config.get_env()
+    write(configs / "s3.yaml", {"config": {"url": "http://other:9000"}})
+    bump_mtime(configs / "s3.yaml")
+    assert config.get_env()["FREEDS_S3_URL"] == "http://other:9000"
+
+    write(locals_ / "jdbc.yaml", {"config": {"user": "me"}})
+    assert config.get_env()["FREEDS_JDBC_USER"] == "me"
+
+    (locals_ / "jdbc.yaml").unlink()
+    assert config.get_env()["FREEDS_JDBC_USER"] == "freeds"
+
+
+def test_write_env_file(config_dirs, tmp_path):
+    path, written = config.write_env_file()
+    assert written
+    assert path == tmp_path / config.ENV_FILE_NAME
+    lines = path.read_text().splitlines()
+    assert lines[0].startswith(config.ENV_FILE_HEADER)
+    assert "FREEDS_S3_URL='http://minio:9000'" in lines
+
+
+def test_write_env_file_only_when_changed(config_dirs, tmp_path):
+    configs, _ = config_dirs
+    path, _ = config.write_env_file()
+    assert config.write_env_file() == (path, False)
+    assert config.write_env_file(force=True) == (path, True)
+
+    write(configs / "jdbc.yaml", {"config": {"user": "other"}})
+    bump_mtime(configs / "jdbc.yaml")
+    assert config.write_env_file() == (path, True)
+    assert "FREEDS_JDBC_USER='other'" in path.read_text()
+
+
+def test_write_env_file_path(config_dirs, tmp_path, monkeypatch):
+    monkeypatch.setenv("FREEDS_ENV_FILE", str(tmp_path / "compose" / "my.env"))
+    path, written = config.write_env_file()
+    assert path == tmp_path / "compose" / "my.env"
+    assert path.exists()
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("plain", "'plain'"),
+        ("$HOME is literal", "'$HOME is literal'"),
+        ("it's", '"it\'s"'),
+        ('say "hi"\nnow $x', '"say \\"hi\\"\\nnow $$x"'),
+    ],
+)
+def test_env_file_value(value, expected):
+    assert config._env_file_value(value) == expected
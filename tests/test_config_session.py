@@ -0,0 +1,56 @@
+import pytest
+
+from freeds.config.api import session as session_mod
+
+
+@pytest.fixture(autouse=True)
+def fresh_session():
+    session_mod.close_session()
+    yield
+    session_mod.close_session()
+
+
+def test_get_session_is_shared():
+    assert session_mod.get_session() is session_mod.get_session()
+
+
+def test_close_session_creates_new():
+    first = session_mod.get_session()
+    session_mod.close_session()
+    assert session_mod.get_session() is not first
+
+
+def test_session_pool_and_retries(monkeypatch):
+    monkeypatch.setenv("FREEDS_CONFIG_POOL_SIZE", "7")
+    monkeypatch.setenv("FREEDS_CONFIG_RETRIES", "4")
+    adapter = session_mod.make_session().get_adapter("http://freeds-config:8005/api/configs/")
+    assert adapter._pool_maxsize == 7  # type: ignore[attr-defined]
+    assert adapter.max_retries.total == 4  # type: ignore[attr-defined]
+    assert 503 in adapter.max_retries.status_forcelist  # type: ignore[attr-defined]
+
+
+def test_get_timeout_defaults(monkeypatch):
+    monkeypatch.delenv("FREEDS_CONFIG_CONNECT_TIMEOUT", raising=False)
+    monkeypatch.delenv("FREEDS_CONFIG_READ_TIMEOUT", raising=False)
+    assert session_mod.get_timeout() == (session_mod.DEFAULT_CONNECT_TIMEOUT, session_mod.DEFAULT_READ_TIMEOUT)
+
+
+def test_get_timeout_invalid(monkeypatch):
+    monkeypatch.setenv("FREEDS_CONFIG_READ_TIMEOUT", "soon")
+    with pytest.raises(ValueError):
+        session_mod.get_timeout()
+
+
+def test_probe_session_does_not_retry(monkeypatch):
+    monkeypatch.setenv("FREEDS_CONFIG_RETRIES", "4")
+    probe = session_mod.get_session(retry=False)
+    assert probe is not session_mod.get_session()
+    assert probe is session_mod.get_session(retry=False)
+    assert probe.get_adapter("http://freeds-config:8005/").max_retries.total == 0  # type: ignore[attr-defined]
+
+
+def test_get_timeout_legacy(monkeypatch):
+    monkeypatch.setenv("FREEDS_CONFIG_TIMEOUT", "3")
+    monkeypatch.delenv("FREEDS_CONFIG_CONNECT_TIMEOUT", raising=False)
+    monkeypatch.setenv("FREEDS_CONFIG_READ_TIMEOUT", "20")
+    assert session_mod.get_timeout() == (3.0, 20.0)
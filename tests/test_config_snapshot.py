@@ -0,0 +1,125 @@
+import os
+from unittest import mock
+
+import pytest
+import yaml
+
+from freeds.config.file import config_classes, snapshot
+
+
+@pytest.fixture
+def config_dirs(tmp_path, monkeypatch):
+    configs = tmp_path / "configs"
+    locals_ = tmp_path / "locals"
+    configs.mkdir()
+    locals_.mkdir()
+    monkeypatch.setenv("FREEDS_ROOT_PATH", str(tmp_path))
+    monkeypatch.setenv("FREEDS_CONFIGS_PATH", str(configs))
+    monkeypatch.setenv("FREEDS_LOCALS_PATH", str(locals_))
+    monkeypatch.delenv("FREEDS_CONFIG_SNAPSHOT", raising=False)
+    return configs, locals_
+
+
+def write(path, data):
+    with open(path, "w") as f:
+        yaml.dump(data, f)
+
+
+def bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def compile_set(configs, locals_):
+    cfg_set = config_classes.ConfigSet(configs_path=configs, locals_path=locals_)
+    return snapshot.compile_snapshot(cfg_set, snapshot.snapshot_path())
+
+
+def test_snapshot_path(config_dirs, tmp_path, monkeypatch):
+    assert snapshot.snapshot_path() == tmp_path / snapshot.SNAPSHOT_FILE_NAME
+    monkeypatch.setenv("FREEDS_CONFIG_SNAPSHOT", str(tmp_path / "other.pickle"))
+    assert snapshot.snapshot_path() == tmp_path / "other.pickle"
+
+
+def test_fresh_snapshot_is_used_without_parsing(config_dirs):
+    configs, locals_ = config_dirs
+    write(configs / "s3.yaml", {"config": {"url": "configs"}})
+    write(locals_ / "s3.yaml", {"config": {"url": "locals"}})
+    write(configs / "jdbc.yaml", {"config": {"user": "u"}})
+    compile_set(configs, locals_)
+
+    with mock.patch("freeds.utils.yaml_io.load_yaml") as load:
+        cfg_set = config_classes.get_current_config_set()
+        load.assert_not_called()
+    assert cfg_set.config_set["s3"].get_config() == {"url": "locals"}
+    assert cfg_set.config_set["s3"].is_local
+    assert cfg_set.config_set["jdbc"].get_config() == {"user": "u"}
+
+
+def test_no_snapshot_scans_folders(config_dirs):
+    configs, locals_ = config_dirs
+    write(configs / "s3.yaml", {"config": {"url": "configs"}})
+    cfg_set = config_classes.get_current_config_set()
+    assert cfg_set.config_set["s3"].get_config() == {"url": "configs"}
+    assert not snapshot.snapshot_path().exists()  # type: ignore[union-attr]
+
+
+def test_changed_file_rebuilds_snapshot(config_dirs):
+    configs, locals_ = config_dirs
+    write(configs / "s3.yaml", {"config": {"url": "a"}})
+    path = compile_set(configs, locals_)
+    write(configs / "s3.yaml", {"config": {"url": "b"}})
+    bump_mtime(configs / "s3.yaml")
+
+    assert snapshot.load_snapshot(configs, locals_, path) is None
+    assert config_classes.get_current_config_set().config_set["s3"].get_config() == {"url": "b"}
+    # the stale snapshot was rebuilt
+    rebuilt = snapshot.load_snapshot(configs, locals_, path)
+    assert rebuilt is not None
+    assert rebuilt.config_set["s3"].get_config() == {"url": "b"}
+
+
+def test_added_file_makes_snapshot_stale(config_dirs):
+    configs, locals_ = config_dirs
+    write(configs / "s3.yaml", {"config": {"url": "a"}})
+    path = compile_set(configs, locals_)
+    write(locals_ / "s3.yaml", {"config": {"url": "local"}})
+    bump_mtime(locals_)
+    assert snapshot.load_snapshot(configs, locals_, path) is None
+    assert config_classes.get_current_config_set().config_set["s3"].get_config() == {"url": "local"}
+
+
+def test_snapshot_for_other_folders_not_used(config_dirs, tmp_path):
+    configs, locals_ = config_dirs
+    path = compile_set(configs, locals_)
+    other = tmp_path / "other"
+    other.mkdir()
+    assert snapshot.load_snapshot(other, locals_, path) is None
+
+
+def test_unreadable_snapshot_ignored(config_dirs):
+    configs, locals_ = config_dirs
+    path = snapshot.snapshot_path()
+    path.write_bytes(b"not a pickle")  # type: ignore[union-attr]
+    assert snapshot.load_snapshot(configs, locals_, path) is None  # type: ignore[arg-type]
+
+
+def test_remove_snapshot(config_dirs):
+    configs, locals_ = config_dirs
+    assert not snapshot.remove_snapshot()
+    compile_set(configs, locals_)
+    assert snapshot.remove_snapshot()
+    assert not snapshot.snapshot_path().exists()  # type: ignore[union-attr]
+
+
+def test_compile_command(config_dirs):
+    from typer.testing import CliRunner
+
+    from freeds.cli.commands.config import config_app
+
+    configs, _ = config_dirs
+    write(configs / "s3.yaml", {"config": {"url": "a"}})
+    result = CliRunner().invoke(config_app, ["compile"])
+    assert result.exit_code == 0, result.output
+    assert "Compiled 1 configs" in result.output
+    assert snapshot.snapshot_path().exists()  # type: ignore[union-attr]
@@ -0,0 +1,133 @@
+import threading
+from pathlib import Path
+
+import pytest
+import yaml
+
+from freeds.config.cache import config_cache
+from freeds.config.file.config_classes import ConfigSet
+from freeds.config.file.file_cache import parsed_cache
+from freeds.config.file.watcher import ConfigWatcher, Inotify
+
+
+@pytest.fixture
+def config_dirs(tmp_path):
+    configs = tmp_path / "configs"
+    locals_ = tmp_path / "locals"
+    configs.mkdir()
+    locals_.mkdir()
+    return configs, locals_
+
+
+def write(path, data):
+    with open(path, "w") as f:
+        yaml.dump(data, f)
+
+
+def test_check_reports_only_changed_files(config_dirs):
+    configs, locals_ = config_dirs
+    write(configs / "a.yaml", {"config": {"x": 1}})
+    write(configs / "b.yaml", {"config": {"x": 1}})
+    watcher = ConfigWatcher(paths=[configs, locals_], use_inotify=False)
+    # the first check records the current state
+    assert watcher.check() == []
+    assert watcher.check() == []
+
+    write(configs / "b.yaml", {"config": {"x": 22}})
+    (configs / "notes.txt").write_text("ignored")
+    write(locals_ / "c.yaml", {"config": {"x": 3}})
+    assert watcher.check() == [configs / "b.yaml", locals_ / "c.yaml"]
+
+    (configs / "a.yaml").unlink()
+    assert watcher.check() == [configs / "a.yaml"]
+
+
+def test_changes_invalidate_caches_and_call_back(config_dirs):
+    configs, locals_ = config_dirs
+    path = configs / "s3.yaml"
+    write(path, {"config": {"url": "a"}})
+    watcher = ConfigWatcher(paths=[configs, locals_], use_inotify=False)
+    watcher.check()
+
+    calls = []
+    watcher.register(lambda name, p: calls.append((name, p)))
+    parsed_cache.load(path)
+    config_cache.put("s3", {"url": "a"})
+    write(path, {"config": {"url": "b", "more": "bytes"}})
+    watcher.check()
+
+    assert calls == [("s3", path)]
+    assert path not in parsed_cache
+    assert "s3" not in config_cache
+
+
+def test_failing_callback_does_not_stop_others(config_dirs):
+    configs, locals_ = config_dirs
+    watcher = ConfigWatcher(paths=[configs, locals_], use_inotify=False)
+    watcher.check()
+    calls = []
+
+    def bad(name: str, path: Path) -> None:
+        raise RuntimeError("boom")
+
+    watcher.register(bad)
+    watcher.register(lambda name, p: calls.append(name))
+    write(configs / "a.yaml", {"config": {"x": 1}})
+    watcher.check()
+    assert calls == ["a"]
+
+
+def test_config_set_updated_in_place(config_dirs):
+    configs, locals_ = config_dirs
+    write(configs / "s3.yaml", {"config": {"url": "configs"}})
+    write(configs / "jdbc.yaml", {"config": {"user": "u"}})
+    cfg_set = ConfigSet(configs_path=configs, locals_path=locals_)
+    jdbc = cfg_set.config_set["jdbc"]
+    jdbc.get_config()
+    watcher = ConfigWatcher(config_set=cfg_set, use_inotify=False)
+    watcher.check()
+
+    # a local override appears
+    write(locals_ / "s3.yaml", {"config": {"url": "locals"}})
+    watcher.check()
+    assert cfg_set.config_set["s3"].get_config() == {"url": "locals"}
+    # untouched entries keep their parsed data
+    assert cfg_set.config_set["jdbc"] is jdbc
+    assert jdbc.is_loaded
+
+    # the configs version changing doesn't replace the local override
+    write(configs / "s3.yaml", {"config": {"url": "configs 2"}})
+    watcher.check()
+    assert cfg_set.config_set["s3"].is_local
+
+    # deleting the local override falls back to the configs version
+    (locals_ / "s3.yaml").unlink()
+    watcher.check()
+    assert cfg_set.config_set["s3"].get_config() == {"url": "configs 2"}
+
+    (configs / "jdbc.yaml").unlink()
+    watcher.check()
+    assert "jdbc" not in cfg_set.config_set
+
+
+@pytest.mark.parametrize("use_inotify", [False, True])
+def test_background_watcher(config_dirs, use_inotify):
+    if use_inotify and not Inotify.is_available():
+        pytest.skip("inotify not available")
+    configs, locals_ = config_dirs
+    changed = threading.Event()
+    names = []
+
+    def on_change(name: str, path: Path) -> None:
+        names.append(name)
+        changed.set()
+
+    watcher = ConfigWatcher(paths=[configs, locals_], poll_interval=0.05, use_inotify=use_inotify)
+    watcher.register(on_change)
+    with watcher:
+        assert watcher.is_running
+        assert watcher.backend == ("inotify" if use_inotify else "polling")
+        write(locals_ / "kafka.yaml", {"config": {"x": 1}})
+        assert changed.wait(5)
+    assert not watcher.is_running
+    assert "kafka" in names
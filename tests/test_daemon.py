@@ -0,0 +1,218 @@
+import json
+import os
+import socket
+import stat
+import threading
+
+import pytest
+import yaml
+
+from freeds.cli import daemon
+from freeds.config import clear_env_cache, config_cache
+from freeds.config.file import config_classes
+
+
+def write(path, data):
+    with open(path, "w") as f:
+        yaml.dump(data, f)
+
+
+@pytest.fixture
+def config_dirs(tmp_path, monkeypatch):
+    configs = tmp_path / "configs"
+    locals_ = tmp_path / "locals"
+    configs.mkdir()
+    locals_.mkdir()
+    for name in ("FREEDS_CONFIG_SNAPSHOT", "FREEDS_DAEMON", "FREEDS_PROFILE_STARTUP"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("FREEDS_ROOT_PATH", str(tmp_path))
+    monkeypatch.setenv("FREEDS_CONFIGS_PATH", str(configs))
+    monkeypatch.setenv("FREEDS_LOCALS_PATH", str(locals_))
+    monkeypatch.setenv("FREEDS_DAEMON_SOCKET", str(tmp_path / "d.sock"))
+    write(configs / "s3.yaml", {"config": {"url": "http://minio:9000"}})
+    write(configs / "stacks.yaml", {"config": {"prod": {"plugins": ["spark", "kafka"]}}})
+    write(locals_ / "currentstack.yaml", {"config": {"current_stack": "prod"}})
+    config_cache.invalidate()
+    clear_env_cache()
+    yield configs, locals_
+    config_cache.invalidate()
+    clear_env_cache()
+
+
+@pytest.fixture
+def server(config_dirs):
+    server = daemon.make_server()
+    server.warm_up()
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+
+
+def test_is_forwarded(monkeypatch):
+    monkeypatch.delenv("FREEDS_DAEMON", raising=False)
+    assert daemon.is_forwarded(["env"])
+    assert daemon.is_forwarded(["nb", "ls", "some/prefix"])
+    assert not daemon.is_forwarded(["nb", "deploy"])
+    assert not daemon.is_forwarded(["dc", "up"])
+    assert not daemon.is_forwarded(["--profile-startup", "env"])
+    monkeypatch.setenv("FREEDS_DAEMON", "0")
+    assert not daemon.is_forwarded(["env"])
+
+
+def test_not_running(config_dirs):
+    assert not daemon.is_running()
+    assert daemon.forward(["env"]) is None
+
+
+def test_ping(server):
+    assert daemon.is_running()
+    response = daemon.request({"op": "ping"})
+    assert response["ok"]
+    assert response["requests"] >= 1
+
+
+def test_config_and_env(server):
+    environment = daemon.environment_key()
+    assert daemon.request({"op": "config", "name": "s3", "environment": environment})["config"] == {
+        "url": "http://minio:9000"
+    }
+    env = daemon.request({"op": "env", "environment": environment})["env"]
+    assert env["FREEDS_S3_URL"] == "http://minio:9000"
+
+
+def test_config_set_pinned(server):
+    assert config_classes.get_current_config_set() is server.watcher.config_set
+
+
+def test_forward(server, capsys):
+    assert daemon.forward(["stack", "ls"]) == 0
+    out = capsys.readouterr().out
+    assert "** stack: prod ** (current)" in out
+    assert "  - kafka" in out
+
+
+def test_forward_sees_config_changes(server, config_dirs, capsys):
+    configs, _ = config_dirs
+    assert daemon.forward(["env"]) == 0
+    assert 'FREEDS_S3_URL="http://minio:9000"' in capsys.readouterr().out
+    write(configs / "s3.yaml", {"config": {"url": "http://other:9000"}})
+    server.watcher.check()
+    assert daemon.forward(["env"]) == 0
+    assert 'FREEDS_S3_URL="http://other:9000"' in capsys.readouterr().out
+
+
+def test_forward_sees_config_written_just_before(server, config_dirs, capsys):
+    _, locals_ = config_dirs
+    server.watcher.stop()  # no background thread to notice the change first
+    write(config_dirs[0] / "stacks.yaml", {"config": {"prod": {"plugins": ["spark"]}, "dev": {"plugins": []}}})
+    write(locals_ / "currentstack.yaml", {"config": {"current_stack": "dev"}})
+    assert daemon.forward(["stack", "ls"]) == 0
+    assert "** stack: dev ** (current)" in capsys.readouterr().out
+
+
+def test_environment_mismatch(server, monkeypatch):
+    monkeypatch.setenv("FREEDS_ROOT_PATH", "/somewhere/else")
+    assert daemon.forward(["env"]) is None
+
+
+def test_command_not_served(server):
+    response = daemon.request({"op": "run", "argv": ["nb", "deploy"], "environment": daemon.environment_key()})
+    assert not response["ok"]
+
+
+def test_already_running(server):
+    with pytest.raises(RuntimeError):
+        daemon.make_server()
+
+
+def test_stale_socket_replaced(config_dirs, tmp_path):
+    (tmp_path / "d.sock").write_text("")
+    server = daemon.make_server()
+    try:
+        assert server.path == tmp_path / "d.sock"
+    finally:
+        server.close()
+    assert not (tmp_path / "d.sock").exists()
+
+
+def test_stop(server):
+    assert daemon.request({"op": "stop"})["ok"]
+    for _ in range(50):
+        if not daemon.is_running():
+            break
+        threading.Event().wait(0.05)
+    assert not daemon.is_running()
+
+
+def test_default_socket_in_private_dir(config_dirs, tmp_path, monkeypatch):
+    monkeypatch.delenv("FREEDS_DAEMON_SOCKET")
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "run"))
+    server = daemon.make_server()
+    try:
+        assert server.path == tmp_path / "run" / "freeds" / "daemon.sock"
+        assert stat.S_IMODE(os.stat(server.path.parent).st_mode) == 0o700
+        assert stat.S_IMODE(os.stat(server.path).st_mode) & 0o077 == 0
+    finally:
+        server.close()
+    (tmp_path / "run" / "freeds").chmod(0o755)
+    with pytest.raises(PermissionError):
+        daemon.make_server()
+
+
+def fake_listener(path):
+    """A listener that answers any request with a shell command, like one planted by another user."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(str(path))
+    sock.listen(1)
+
+    def answer():
+        try:
+            conn, _ = sock.accept()
+        except OSError:  # closed without a client connecting
+            return
+        with conn:
+            conn.recv(65536)
+            reply = {"ok": True, "stdout": "echo INJECTED\n", "stderr": "", "exit_code": 0}
+            conn.sendall(json.dumps(reply).encode() + b"\n")
+
+    threading.Thread(target=answer, daemon=True).start()
+    return sock
+
+
+def test_forward_refuses_other_users_daemon(config_dirs, tmp_path, monkeypatch, capsys):
+    sock = fake_listener(tmp_path / "d.sock")
+    try:
+        monkeypatch.setattr(daemon, "_peer_uid", lambda sock: os.getuid() + 1)
+        assert daemon.forward(["env"]) is None
+    finally:
+        sock.close()
+    assert "INJECTED" not in capsys.readouterr().out
+
+
+def test_forward_refuses_socket_not_owned(config_dirs, tmp_path, monkeypatch, capsys):
+    sock = fake_listener(tmp_path / "d.sock")
+    uid = os.getuid()
+    try:
+        monkeypatch.setattr(daemon.os, "getuid", lambda: uid + 1)
+        assert daemon.forward(["env"]) is None
+    finally:
+        sock.close()
+    assert "INJECTED" not in capsys.readouterr().out
+
+
+def test_forward_falls_back_when_daemon_hangs(config_dirs, tmp_path, monkeypatch):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(str(tmp_path / "d.sock"))
+    sock.listen(1)  # accepted by the kernel, never answered
+    monkeypatch.setenv("FREEDS_DAEMON_TIMEOUT", "0.2")
+    try:
+        assert daemon.forward(["env"]) is None
+    finally:
+        sock.close()
+
+
+def test_client_settings_not_in_environment_key(monkeypatch):
+    monkeypatch.setenv("FREEDS_DAEMON_TIMEOUT", "1")
+    assert "FREEDS_DAEMON_TIMEOUT" not in dict(daemon.environment_key())
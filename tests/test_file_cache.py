@@ -0,0 +1,63 @@
+import os
+from unittest import mock
+
+from freeds.config.file.file_cache import ParsedFileCache, stat_key
+from freeds.utils.yaml_io import load_yaml
+
+
+def test_load_parses_once(tmp_path):
+    path = tmp_path / "a.yaml"
+    path.write_text("config: {x: 1}")
+    cache = ParsedFileCache()
+    with mock.patch("freeds.utils.yaml_io.load_yaml", wraps=load_yaml) as safe_load:
+        assert cache.load(path) == {"config": {"x": 1}}
+        assert cache.load(path) == {"config": {"x": 1}}
+        assert safe_load.call_count == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_load_returns_copies(tmp_path):
+    path = tmp_path / "a.yaml"
+    path.write_text("config: {x: 1}")
+    cache = ParsedFileCache()
+    cache.load(path)["config"]["x"] = 2
+    assert cache.load(path) == {"config": {"x": 1}}
+
+
+def test_changed_mtime_reparses(tmp_path):
+    path = tmp_path / "a.yaml"
+    path.write_text("config: {x: 1}")
+    cache = ParsedFileCache()
+    cache.load(path)
+    # same size, only the mtime differs
+    path.write_text("config: {x: 2}")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert cache.load(path) == {"config": {"x": 2}}
+
+
+def test_replaced_file_reparses(tmp_path):
+    path = tmp_path / "a.yaml"
+    path.write_text("config: {x: 1}")
+    cache = ParsedFileCache()
+    cache.load(path)
+    st = os.stat(path)
+    other = tmp_path / "b.yaml"
+    other.write_text("config: {x: 9}")
+    os.utime(other, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(other, path)
+    assert stat_key(path)[2] != st.st_ino
+    assert cache.load(path) == {"config": {"x": 9}}
+
+
+def test_invalidate(tmp_path):
+    path = tmp_path / "a.yaml"
+    path.write_text("config: {x: 1}")
+    cache = ParsedFileCache()
+    cache.load(path)
+    assert path in cache
+    cache.invalidate(path)
+    assert path not in cache
+    cache.load(path)
+    cache.invalidate()
+    assert cache.stats()["size"] == 0
@@ -102,3 +102,12 @@ def test_stamp_notebook(tmp_path, monkeypatch):
     found = nb_mod.find_cell_by_tag(result, "gitinfo")
     assert found is not None
     assert "abc1234" in found["source"]
+
+
+def test_upload_notebook_failure_reported(monkeypatch, capsys):
+    def failing_open_write(bucket, key, mode):
+        raise ConnectionError("endpoint unreachable")
+
+    monkeypatch.setattr(nb_mod, "open_write", failing_open_write)
+    assert not nb_mod.upload_notebook(nbformat.v4.new_notebook(), "bucket", "repo/nb.ipynb")
+    assert "Upload failed" in capsys.readouterr().out
@@ -0,0 +1,22 @@
+from types import SimpleNamespace
+
+from freeds.selfcheck.plugin_classes import DockerComposeInfo
+
+
+def test_compose_low_port_mappings(tmp_path):
+    (tmp_path / "docker-compose.yaml").write_text(
+        "services:\n"
+        "  sftp:\n"
+        "    ports:\n"
+        "      - 22:22\n"
+        "      - 53:53/udp\n"
+        "      - 127.0.0.1:8080:80\n"
+    )
+    info = DockerComposeInfo(SimpleNamespace(path=tmp_path, name="sftp"))
+    ports = info.services["sftp"].ports
+    assert [(p.host_port, p.container_port, p.protocol) for p in ports] == [
+        (22, 22, None),
+        (53, 53, "udp"),
+        (8080, 80, None),
+    ]
+    assert ports[2].host_ip == "127.0.0.1"
@@ -0,0 +1,105 @@
+import http.server
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+import requests
+
+from freeds.utils import profiling
+
+
+@pytest.fixture
+def profiler():
+    profiler = profiling.start_profiling(write_at_exit=False)
+    yield profiler
+    profiling.stop_profiling()
+
+
+def test_profiling_requested(monkeypatch):
+    monkeypatch.delenv("FREEDS_PROFILE_STARTUP", raising=False)
+    assert not profiling.profiling_requested(["stack", "ls"])
+    assert profiling.profiling_requested(["--profile-startup", "stack", "ls"])
+    monkeypatch.setenv("FREEDS_PROFILE_STARTUP", "0")
+    assert not profiling.profiling_requested([])
+    monkeypatch.setenv("FREEDS_PROFILE_STARTUP", "1")
+    assert profiling.profiling_requested([])
+
+
+def test_import_timer(tmp_path, monkeypatch):
+    (tmp_path / "profiled_outer.py").write_text("import time\nimport profiled_inner\ntime.sleep(0.01)\n")
+    (tmp_path / "profiled_inner.py").write_text("import time\ntime.sleep(0.02)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    timer = profiling.ImportTimer()
+    timer.install()
+    try:
+        import profiled_outer  # noqa: F401
+    finally:
+        timer.uninstall()
+        sys.modules.pop("profiled_outer", None)
+        sys.modules.pop("profiled_inner", None)
+
+    timings = {i["module"]: i for i in timer.imports}
+    assert timings["profiled_inner"]["cumulative"] >= 0.02
+    assert timings["profiled_outer"]["cumulative"] >= 0.03
+    # the inner import is not counted as the outer module's own time
+    assert 0.01 <= timings["profiled_outer"]["self"] < 0.02 + 0.01
+
+
+def test_timed_config(profiler):
+    with profiling.timed_config("s3"):
+        pass
+    assert [c["config"] for c in profiler.configs] == ["s3"]
+
+
+def test_timed_config_not_profiling():
+    assert profiling.get_profiler() is None
+    with profiling.timed_config("s3"):
+        pass
+
+
+def test_network_calls(profiler):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        requests.get(f"http://127.0.0.1:{server.server_port}/api/configs/s3", timeout=5)
+    finally:
+        server.shutdown()
+    assert len(profiler.network) == 1
+    call = profiler.network[0]
+    assert call["method"] == "GET"
+    assert call["url"].endswith("/api/configs/s3")
+    assert call["status"] == 200
+
+
+def test_write_report(profiler, tmp_path, capsys):
+    profiler.record_config("s3", 0.5)
+    profiler.mark_command_start()
+    path = profiler.write_report(stream=sys.stdout, path=tmp_path / "profile.json")
+    data = json.loads(path.read_text())
+    assert data["config_seconds"] == 0.5
+    assert data["startup_seconds"] <= data["total_seconds"]
+    assert "config loads (1)" in capsys.readouterr().out
+
+
+def test_cli_profile_startup(tmp_path):
+    report = tmp_path / "profile.json"
+    env = dict(os.environ, FREEDS_PROFILE_STARTUP="1", FREEDS_PROFILE_STARTUP_FILE=str(report))
+    code = "from freeds.cli.cli import app\ntry:\n    app(['--help'])\nexcept SystemExit:\n    pass\n"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    assert "freeds startup profile" in result.stderr
+    data = json.loads(report.read_text())
+    assert "typer" in {i["module"] for i in data["imports"]}
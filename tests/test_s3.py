@@ -1,4 +1,5 @@
 import datetime as dt
+import time
 from unittest.mock import MagicMock
 
 import pytest
@@ -9,6 +10,13 @@ import freeds.s3 as s3_mod
 MOCK_CONFIG = {"access_key": "ak", "secret_key": "sk", "url": "http://localhost"}
 
 
+@pytest.fixture(autouse=True)
+def clear_client_cache():
+    s3_mod.clear_s3_client_cache()
+    yield
+    s3_mod.clear_s3_client_cache()
+
+
 @pytest.fixture
 def mock_s3_client():
     return MagicMock()
@@ -22,6 +30,48 @@ def test_get_s3_client_success(monkeypatch):
     assert result == mock_client
 
 
+def test_get_s3_client_cached(monkeypatch):
+    cfg = MOCK_CONFIG.copy()
+    client_factory = MagicMock(side_effect=lambda *a, **k: MagicMock())
+    monkeypatch.setattr("freeds.s3.s3.get_config", lambda *_: cfg)
+    monkeypatch.setattr("boto3.client", client_factory)
+    first = s3_mod.get_s3_client()
+    assert s3_mod.get_s3_client() is first
+    assert client_factory.call_count == 1
+
+    # new credentials, new client
+    cfg["secret_key"] = "rotated"
+    second = s3_mod.get_s3_client()
+    assert second is not first
+    assert client_factory.call_count == 2
+    assert client_factory.call_args.kwargs["aws_secret_access_key"] == "rotated"
+
+
+def test_get_s3_client_settings(monkeypatch):
+    cfg = dict(MOCK_CONFIG, max_pool_connections=64)
+    client_factory = MagicMock()
+    monkeypatch.setattr("freeds.s3.s3.get_config", lambda *_: cfg)
+    monkeypatch.setattr("boto3.client", client_factory)
+    monkeypatch.setenv("FREEDS_S3_MAX_POOL_CONNECTIONS", "8")
+    monkeypatch.setenv("FREEDS_S3_READ_TIMEOUT", "5")
+    s3_mod.get_s3_client()
+    config = client_factory.call_args.kwargs["config"]
+    assert config.max_pool_connections == 64
+    assert config.read_timeout == 5
+    assert config.retries == {"max_attempts": s3_mod.s3.DEFAULT_RETRIES, "mode": "standard"}
+
+    # changed settings give a new client
+    monkeypatch.setenv("FREEDS_S3_READ_TIMEOUT", "30")
+    s3_mod.get_s3_client()
+    assert client_factory.call_count == 2
+
+
+def test_get_s3_client_bad_setting(monkeypatch):
+    monkeypatch.setattr("freeds.s3.s3.get_config", lambda *_: dict(MOCK_CONFIG, retries="many"))
+    with pytest.raises(ValueError):
+        s3_mod.get_s3_client()
+
+
 def test_get_s3_client_no_config(monkeypatch):
     monkeypatch.setattr("freeds.s3.s3.get_config", lambda *_: None)
     with pytest.raises(ValueError):
@@ -48,16 +98,42 @@ def test_is_s3_service_available_false(monkeypatch):
 
 
 def test_bucket_exists_true(monkeypatch, mock_s3_client):
-    mock_s3_client.list_buckets.return_value = {"Buckets": [{"Name": "bucket1"}]}
+    mock_s3_client.head_bucket.return_value = {}
     monkeypatch.setattr("freeds.s3.s3.get_s3_client", lambda: mock_s3_client)
     assert s3_mod.bucket_exists("bucket1")
+    mock_s3_client.head_bucket.assert_called_once_with(Bucket="bucket1")
+    mock_s3_client.list_buckets.assert_not_called()
 
 
 def test_bucket_exists_false(monkeypatch, mock_s3_client):
-    mock_s3_client.list_buckets.return_value = {"Buckets": [{"Name": "bucket2"}]}
+    mock_s3_client.head_bucket.side_effect = ClientError({"Error": {"Code": "404"}}, "HeadBucket")
+    monkeypatch.setattr("freeds.s3.s3.get_s3_client", lambda: mock_s3_client)
+    assert not s3_mod.bucket_exists("bucket1")
+
+
+def test_bucket_exists_error(monkeypatch, mock_s3_client):
+    mock_s3_client.head_bucket.side_effect = ClientError({"Error": {"Code": "403"}}, "HeadBucket")
+    monkeypatch.setattr("freeds.s3.s3.get_s3_client", lambda: mock_s3_client)
+    with pytest.raises(ClientError):
+        s3_mod.bucket_exists("bucket1")
+
+
+def test_bucket_exists_cached(monkeypatch, mock_s3_client):
     monkeypatch.setattr("freeds.s3.s3.get_s3_client", lambda: mock_s3_client)
+    assert s3_mod.bucket_exists("bucket1")
+    assert s3_mod.bucket_exists("bucket1")
+    assert mock_s3_client.head_bucket.call_count == 1
+
+    # deleting through freeds.s3 forgets the bucket
+    s3_mod.delete_bucket("bucket1")
+    mock_s3_client.head_bucket.side_effect = ClientError({"Error": {"Code": "404"}}, "HeadBucket")
     assert not s3_mod.bucket_exists("bucket1")
 
+    # and creating it remembers it again
+    assert s3_mod.create_bucket("bucket1")
+    assert s3_mod.bucket_exists("bucket1")
+    assert mock_s3_client.head_bucket.call_count == 3
+
 
 def test_create_s3_bucket_exists(monkeypatch):
     monkeypatch.setattr(s3_mod, "bucket_exists", lambda b: True)
@@ -170,3 +246,146 @@ def test_list_files_for_dates(monkeypatch):
         "s3a://mybucket/prefix/2024-05-26/file2.txt",
     ]
     assert result == expected
+
+
+def test_list_files_for_dates_keeps_order(monkeypatch):
+    delays = {"prefix/2024/2024-05/25": 0.05, "prefix/2024/2024-05/26": 0.0, "prefix/2024/2024-05/27": 0.02}
+
+    def slow_list_files(prefix, bucket):
+        time.sleep(delays[prefix])
+        return [f"{prefix}/a.txt", f"{prefix}/b.txt"]
+
+    monkeypatch.setattr("freeds.s3.s3.list_files", slow_list_files)
+    dates = [dt.date(2024, 5, 25), dt.date(2024, 5, 26), dt.date(2024, 5, 27)]
+    result = s3_mod.list_files_for_dates(dates=dates, root_prefix="prefix", bucket_name="b", max_workers=3)
+    assert result == [f"{p}/{f}" for p in delays for f in ("a.txt", "b.txt")]
+
+
+def test_list_files_for_dates_collapse_months(monkeypatch):
+    listed = []
+
+    def month_list_files(prefix, bucket):
+        listed.append(prefix)
+        if prefix == "prefix/2024/2024-05/":
+            return [f"prefix/2024/2024-05/{day:02d}/f.txt" for day in range(1, 32)]
+        return [f"{prefix}/f.txt"]
+
+    monkeypatch.setattr("freeds.s3.s3.list_files", month_list_files)
+    may = [dt.date(2024, 5, 1) + dt.timedelta(days=i) for i in range(20)]
+    june = [dt.date(2024, 6, 1), dt.date(2024, 6, 2)]
+    result = s3_mod.list_files_for_dates(
+        dates=may + june, root_prefix="prefix", bucket_name="b", collapse_months=True
+    )
+    # may is mostly asked for and listed once, the two june days are listed on their own
+    assert sorted(listed) == ["prefix/2024/2024-05/", "prefix/2024/2024-06/01", "prefix/2024/2024-06/02"]
+    assert result == [f"prefix/2024/2024-05/{day:02d}/f.txt" for day in range(1, 21)] + [
+        "prefix/2024/2024-06/01/f.txt",
+        "prefix/2024/2024-06/02/f.txt",
+    ]
+
+
+def test_iter_objects(monkeypatch):
+    modified = dt.datetime(2024, 5, 25, 12, 0)
+    mock_client = MagicMock()
+    mock_paginator = MagicMock()
+    mock_paginator.paginate.return_value = [
+        {
+            "Contents": [{"Key": "p/a.txt", "Size": 10, "ETag": '"abc"', "LastModified": modified}],
+            "CommonPrefixes": [{"Prefix": "p/sub/"}],
+        },
+        {"Contents": [{"Key": "p/b.txt", "Size": 20, "ETag": '"def"', "LastModified": modified}]},
+    ]
+    mock_client.get_paginator.return_value = mock_paginator
+    monkeypatch.setattr("freeds.s3.s3.get_s3_client", lambda: mock_client)
+
+    objects = list(s3_mod.iter_objects("p/", "bucket", delimiter="/", start_after="p/0", page_size=100))
+    assert [(o.key, o.size, o.etag, o.is_prefix) for o in objects] == [
+        ("p/a.txt", 10, "abc", False),
+        ("p/sub/", 0, None, True),
+        ("p/b.txt", 20, "def", False),
+    ]
+    assert objects[0].last_modified == modified
+    mock_paginator.paginate.assert_called_once_with(
+        Bucket="bucket", Prefix="p/", Delimiter="/", StartAfter="p/0", PaginationConfig={"PageSize": 100}
+    )
+
+
+def test_iter_objects_is_lazy(monkeypatch):
+    pages_read = []
+
+    def pages(**kwargs):
+        for i in range(3):
+            pages_read.append(i)
+            yield {"Contents": [{"Key": f"p/{i}"}]}
+
+    mock_client = MagicMock()
+    mock_client.get_paginator.return_value.paginate.side_effect = pages
+    monkeypatch.setattr("freeds.s3.s3.get_s3_client", lambda: mock_client)
+    iterator = s3_mod.iter_objects("p/", "bucket")
+    assert next(iterator).key == "p/0"
+    assert pages_read == [0]
+
+
+def test_files_exist(monkeypatch):
+    mock_client = MagicMock()
+    listed_prefixes = []
+
+    def paginate(Bucket, Prefix, Delimiter):
+        listed_prefixes.append(Prefix)
+        keys = [f"in/2024/2024-05/25/part-{i}.csv" for i in (0, 1, 2, 4, 5, 6)] + ["in/2024/2024-05/25/zzz.csv"]
+        return [{"Contents": [{"Key": k} for k in keys if k.startswith(Prefix)]}]
+
+    mock_client.get_paginator.return_value.paginate.side_effect = paginate
+
+    def head_object(Bucket, Key):
+        if Key != "other/present.csv":
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {}
+
+    mock_client.head_object.side_effect = head_object
+    monkeypatch.setattr("freeds.s3.s3.get_s3_client", lambda: mock_client)
+
+    day = [f"in/2024/2024-05/25/part-{i}.csv" for i in range(5)]
+    keys = day + ["other/present.csv", "other/missing.csv"]
+    result = s3_mod.files_exist("bucket", keys)
+    assert list(result) == keys
+    assert result == {
+        "in/2024/2024-05/25/part-0.csv": True,
+        "in/2024/2024-05/25/part-1.csv": True,
+        "in/2024/2024-05/25/part-2.csv": True,
+        "in/2024/2024-05/25/part-3.csv": False,
+        "in/2024/2024-05/25/part-4.csv": True,
+        "other/present.csv": True,
+        "other/missing.csv": False,
+    }
+    # one listing narrowed to the common name prefix, heads for the small folder
+    assert listed_prefixes == ["in/2024/2024-05/25/part-"]
+    assert mock_client.head_object.call_count == 2
+
+
+def test_files_exist_sparse_keys_in_big_folder(monkeypatch):
+    mock_client = MagicMock()
+    listed = []
+
+    def paginate(Bucket, Prefix, Delimiter):
+        for page in range(1000):
+            keys = [f"big/{page:04d}-{i:04d}.csv" for i in range(1000)]
+            listed.append(page)
+            yield {"Contents": [{"Key": k} for k in keys]}
+
+    mock_client.get_paginator.return_value.paginate.side_effect = paginate
+    mock_client.head_object.return_value = {}
+    monkeypatch.setattr("freeds.s3.s3.get_s3_client", lambda: mock_client)
+
+    keys = ["big/0000-0001.csv", "big/0000-0001x.csv", "big/0500-0000.csv", "big/0999-0999.csv"]
+    result = s3_mod.files_exist("bucket", keys)
+    assert result == {
+        "big/0000-0001.csv": True,
+        "big/0000-0001x.csv": False,
+        "big/0500-0000.csv": True,
+        "big/0999-0999.csv": True,
+    }
+    # one page more than 4 keys fill, then heads for the keys not reached
+    assert len(listed) <= 3
+    headed = sorted(call.kwargs["Key"] for call in mock_client.head_object.call_args_list)
+    assert headed == ["big/0500-0000.csv", "big/0999-0999.csv"]
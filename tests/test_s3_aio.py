@@ -0,0 +1,155 @@
+import asyncio
+import datetime as dt
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+import freeds.s3 as s3_mod
+from freeds.s3 import aio
+
+
+@pytest.fixture
+def thread_pool(monkeypatch):
+    """Run the calls on the thread pool, as without aiobotocore."""
+    monkeypatch.setattr(aio, "HAS_AIOBOTOCORE", False)
+
+
+def test_list_files(thread_pool, mock_s3_client):
+    paginator = MagicMock()
+    paginator.paginate.return_value = [{"Contents": [{"Key": "prefix/a.txt"}, {"Key": "prefix/b.txt"}]}]
+    mock_s3_client.get_paginator.return_value = paginator
+    assert asyncio.run(aio.list_files("prefix", "bucket")) == ["prefix/a.txt", "prefix/b.txt"]
+
+
+def test_put_and_get_file(thread_pool, mock_s3_client, tmp_path):
+    async def transfer():
+        return await asyncio.gather(
+            aio.put_file(tmp_path / "a.txt", "bucket", "a.txt", prefix="data"),
+            aio.get_file(tmp_path / "b.txt", "bucket", "b.txt", prefix="data"),
+        )
+
+    assert asyncio.run(transfer()) == [True, True]
+    mock_s3_client.upload_file.assert_called_once_with(tmp_path / "a.txt", "bucket", "data/a.txt")
+    mock_s3_client.download_file.assert_called_once_with("bucket", "data/b.txt", tmp_path / "b.txt")
+
+
+def test_delete_prefix(thread_pool, mock_s3_client):
+    paginator = MagicMock()
+    paginator.paginate.return_value = [{"Contents": [{"Key": "old/a"}, {"Key": "old/b"}]}]
+    mock_s3_client.get_paginator.return_value = paginator
+    mock_s3_client.delete_objects.return_value = {}
+    report = asyncio.run(aio.delete_prefix("bucket", "old/"))
+    assert report.ok and report.deleted == 2
+
+
+def test_concurrency_limit(thread_pool, monkeypatch):
+    monkeypatch.setenv("FREEDS_S3_ASYNC_CONCURRENCY", "2")
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def slow_list_files(prefix, bucket):
+        with lock:
+            running.append(prefix)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(prefix)
+        return [f"{prefix}/f.txt"]
+
+    monkeypatch.setattr("freeds.s3.s3.list_files", slow_list_files)
+    dates = [dt.date(2024, 5, day) for day in range(1, 9)]
+    result = asyncio.run(aio.list_files_for_dates(dates, root_prefix="prefix", bucket_name="b"))
+    assert result == [f"prefix/2024/2024-05/{day:02d}/f.txt" for day in range(1, 9)]
+    assert max(peak) == 2
+
+
+def test_list_files_for_dates_collapse_months(thread_pool, monkeypatch):
+    listed = []
+
+    def month_list_files(prefix, bucket):
+        listed.append(prefix)
+        return [f"prefix/2024/2024-05/{day:02d}/f.txt" for day in range(1, 32)]
+
+    monkeypatch.setattr("freeds.s3.s3.list_files", month_list_files)
+    dates = [dt.date(2024, 5, day) for day in range(1, 21)]
+    result = asyncio.run(aio.list_files_for_dates(dates, "prefix", "b", collapse_months=True))
+    assert listed == ["prefix/2024/2024-05/"]
+    assert result == [f"prefix/2024/2024-05/{day:02d}/f.txt" for day in range(1, 21)]
+
+
+def test_dedicated_pool_not_capped_by_default_executor(thread_pool, monkeypatch):
+    # more calls in flight than the loop's default executor has threads (min(32, cpus + 4))
+    monkeypatch.setenv("FREEDS_S3_ASYNC_CONCURRENCY", "40")
+    barrier = threading.Barrier(40, timeout=5)
+    threads = set()
+
+    def list_files(prefix, bucket):
+        threads.add(threading.current_thread().name)
+        barrier.wait()
+        return [prefix]
+
+    monkeypatch.setattr("freeds.s3.s3.list_files", list_files)
+
+    async def run():
+        return await asyncio.gather(*(aio.list_files(f"p{i}", "b") for i in range(40)))
+
+    assert asyncio.run(run()) == [[f"p{i}"] for i in range(40)]
+    assert len(threads) == 40
+    assert all(name.startswith("freeds-s3-aio") for name in threads)
+
+
+@pytest.fixture
+def moto_s3(monkeypatch):
+    """A moto S3 server as the s3 config endpoint, with the bucket "data"."""
+    if not aio.HAS_AIOBOTOCORE:
+        pytest.skip("aiobotocore not installed")
+    moto_server = pytest.importorskip("moto.server")
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    cfg = {"url": f"http://{host}:{port}", "access_key": "test", "secret_key": "test"}
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setattr("freeds.s3.s3.get_config", lambda name: cfg)
+    monkeypatch.setattr("freeds.s3.aio.get_config", lambda name: cfg)
+    s3_mod.clear_s3_client_cache()
+    s3_mod.get_s3_client().create_bucket(Bucket="data")
+    yield s3_mod.get_s3_client()
+    s3_mod.clear_s3_client_cache()
+    server.stop()
+
+
+def test_native_against_moto(moto_s3, tmp_path, monkeypatch):
+    monkeypatch.setattr(aio, "_get_executor", lambda: pytest.fail("a call ran on the thread pool"))
+    small = tmp_path / "small.txt"
+    small.write_bytes(b"hello")
+    large = tmp_path / "large.bin"
+    large.write_bytes(bytes(range(256)) * (11 * 4096))  # 11 MB, three 5 MB parts
+    config = s3_mod.make_transfer_config(multipart_threshold=5 * 1024 * 1024, multipart_chunksize=5 * 1024 * 1024)
+
+    async def run():
+        try:
+            uploaded = await asyncio.gather(
+                aio.put_file(small, "data", "a.txt", prefix="raw/2024/2024-05/01", config=config),
+                aio.put_file(large, "data", "b.bin", prefix="raw/2024/2024-05/02", config=config),
+            )
+            etag = moto_s3.head_object(Bucket="data", Key="raw/2024/2024-05/02/b.bin")["ETag"]
+            files = await aio.list_files_for_dates([dt.date(2024, 5, 1), dt.date(2024, 5, 2)], "raw", "data")
+            downloaded = await aio.get_file(tmp_path / "copy.bin", "data", "b.bin", prefix="raw/2024/2024-05/02")
+            missing = await aio.get_file(tmp_path / "none.bin", "data", "none.bin")
+            report = await aio.delete_prefix("data", "raw/")
+            remaining = await aio.list_files("raw/", "data")
+        finally:
+            await aio.close()
+        return uploaded, etag, files, downloaded, missing, report, remaining
+
+    uploaded, etag, files, downloaded, missing, report, remaining = asyncio.run(run())
+    assert uploaded == [True, True]
+    assert etag.strip('"').endswith("-3")
+    assert files == ["raw/2024/2024-05/01/a.txt", "raw/2024/2024-05/02/b.bin"]
+    assert downloaded and (tmp_path / "copy.bin").read_bytes() == large.read_bytes()
+    assert not missing and not (tmp_path / "none.bin").exists()
+    assert report.ok and report.deleted == 2
+    assert remaining == []
@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+from botocore.exceptions import ClientError
+
+import freeds.s3 as s3_mod
+from freeds.s3 import delete
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr("freeds.s3.delete.RETRY_BACKOFF", 0)
+
+
+def deleted_keys(client):
+    return [o["Key"] for c in client.delete_objects.call_args_list for o in c.kwargs["Delete"]["Objects"]]
+
+
+def test_delete_keys_batches(mock_s3_client):
+    keys = [f"p/{i:05d}" for i in range(2500)]
+    report = s3_mod.delete_keys("bucket", iter(keys))
+    assert report.ok
+    assert report.deleted == report.listed == 2500
+    assert report.batches == 3
+    sizes = sorted(len(c.kwargs["Delete"]["Objects"]) for c in mock_s3_client.delete_objects.call_args_list)
+    assert sizes == [500, 1000, 1000]
+    assert sorted(deleted_keys(mock_s3_client)) == keys
+
+
+def test_delete_keys_pipelined(mock_s3_client):
+    # the first batch is deleted before the listing is done
+    first_deleted = threading.Event()
+    mock_s3_client.delete_objects.side_effect = lambda **kwargs: first_deleted.set() or {}
+
+    def listing():
+        yield from (f"a/{i}" for i in range(1000))
+        assert first_deleted.wait(5)
+        yield "b/0"
+
+    report = s3_mod.delete_keys("bucket", listing())
+    assert report.deleted == 1001
+
+
+def test_delete_keys_retries_throttled(mock_s3_client):
+    mock_s3_client.delete_objects.side_effect = [
+        {
+            "Errors": [
+                {"Key": "k1", "Code": "SlowDown", "Message": "slow down"},
+                {"Key": "k2", "Code": "AccessDenied", "Message": "no"},
+            ]
+        },
+        {},
+    ]
+    report = s3_mod.delete_keys("bucket", ["k1", "k2", "k3"], raise_on_error=False)
+    assert report.deleted == 2
+    assert list(report.failed) == ["k2"]
+    assert report.retries == 1
+    retried = mock_s3_client.delete_objects.call_args_list[1].kwargs["Delete"]["Objects"]
+    assert retried == [{"Key": "k1"}]
+
+
+def test_delete_keys_gives_up(mock_s3_client):
+    error = ClientError({"Error": {"Code": "ServiceUnavailable", "Message": "down"}}, "DeleteObjects")
+    mock_s3_client.delete_objects.side_effect = error
+    report = s3_mod.delete_keys("bucket", ["k1", "k2"], retries=2, raise_on_error=False)
+    assert mock_s3_client.delete_objects.call_count == 3
+    assert report.deleted == 0
+    assert set(report.failed) == {"k1", "k2"}
+    assert not report.ok
+
+
+def test_delete_keys_unexpected_error(mock_s3_client):
+    mock_s3_client.delete_objects.side_effect = RuntimeError("boom")
+    report = s3_mod.delete_keys("bucket", ["k1"], raise_on_error=False)
+    assert report.failed == {"k1": "boom"}
+
+
+def test_delete_prefix_raises_on_error(monkeypatch, mock_s3_client):
+    monkeypatch.setattr("freeds.s3.delete.iter_objects", lambda prefix, bucket: iter([s3_mod.S3Object("p/a")]))
+    mock_s3_client.delete_objects.return_value = {"Errors": [{"Key": "p/a", "Code": "AccessDenied", "Message": "no"}]}
+    with pytest.raises(s3_mod.DeleteError) as raised:
+        s3_mod.delete_prefix(bucket="bucket", prefix="p/")
+    assert raised.value.report.failed == {"p/a": "AccessDenied: no"}
+
+
+def test_delete_prefix_dry_run(monkeypatch, mock_s3_client):
+    monkeypatch.setattr(
+        "freeds.s3.delete.iter_objects", lambda prefix, bucket: iter([s3_mod.S3Object("p/a"), s3_mod.S3Object("p/b")])
+    )
+    report = s3_mod.delete_prefix("bucket", "p/", dry_run=True)
+    assert report.keys == ["p/a", "p/b"]
+    assert report.deleted == 0
+    mock_s3_client.delete_objects.assert_not_called()
+    assert "would be deleted" in str(report)
+
+
+def test_delete_prefix(monkeypatch, mock_s3_client):
+    monkeypatch.setattr("freeds.s3.delete.iter_objects", lambda prefix, bucket: iter([s3_mod.S3Object("p/a")]))
+    report = s3_mod.delete_prefix(bucket="bucket", prefix="p/")
+    assert report.deleted == 1
+    mock_s3_client.delete_objects.assert_called_once_with(
+        Bucket="bucket", Delete={"Objects": [{"Key": "p/a"}], "Quiet": True}
+    )
+
+
+def test_delete_nothing(mock_s3_client):
+    report = delete.delete_keys("bucket", [])
+    assert report.deleted == 0
+    mock_s3_client.delete_objects.assert_not_called()
@@ -0,0 +1,125 @@
+import datetime as dt
+from unittest.mock import MagicMock
+
+import pytest
+
+import freeds.s3 as s3_mod
+from freeds.s3.listing_cache import ListingCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ListingCache(path=tmp_path / "cache" / "listing.sqlite", ttl=60, settle_days=2, immutable_ttl=600)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr("freeds.s3.listing_cache.time.time", lambda: now[0])
+    return now
+
+
+def test_default_path(tmp_path, monkeypatch):
+    monkeypatch.delenv("FREEDS_S3_LISTING_CACHE", raising=False)
+    monkeypatch.setenv("FREEDS_ROOT_PATH", str(tmp_path))
+    assert ListingCache().path == tmp_path / ".cache" / "s3-listing.sqlite"
+
+
+def test_put_get(cache):
+    assert cache.get("bucket", "p/2024") is None
+    cache.put("bucket", "p/2024", ["p/2024/a", "p/2024/b"])
+    assert cache.get("bucket", "p/2024") == ["p/2024/a", "p/2024/b"]
+    assert cache.get("other", "p/2024") is None
+
+
+def test_ttl(cache, clock):
+    cache.put("bucket", "recent", ["recent/a"])
+    cache.put("bucket", "settled", ["settled/a"], immutable=True)
+    clock[0] += 61
+    assert cache.get("bucket", "recent") is None
+    assert cache.get("bucket", "settled") == ["settled/a"]
+    assert cache.stats() == {"listings": 2, "immutable": 1}
+    clock[0] += 600
+    assert cache.get("bucket", "settled") is None
+
+
+def test_is_immutable(cache):
+    today = dt.date.today()
+    assert cache.is_immutable(today - dt.timedelta(days=3))
+    assert not cache.is_immutable(today - dt.timedelta(days=2))
+    assert not cache.is_immutable(dt.datetime.now())
+
+
+def test_invalidate(cache):
+    cache.put("bucket", "p/2024/2024-05/25", [])
+    cache.put("bucket", "p/2024/2024-05/26", [])
+    cache.put("bucket", "p/2024/2024-06/01", [])
+    cache.put("other", "p/2024/2024-05/25", [])
+    assert cache.invalidate("bucket", "p/2024/2024-05/") == 2
+    assert cache.invalidate("bucket", "p/2024/2024-06/01/file.parquet") == 1
+    assert cache.stats()["listings"] == 1
+    assert cache.invalidate() == 1
+
+
+def test_list_files_for_dates_cached(cache, monkeypatch):
+    listed = []
+
+    def list_files(prefix, bucket):
+        listed.append(prefix)
+        return [f"{prefix}/f.txt"]
+
+    monkeypatch.setattr("freeds.s3.s3.list_files", list_files)
+    today = dt.date.today()
+    old, recent = today - dt.timedelta(days=10), today
+    result = s3_mod.list_files_for_dates([old, recent], root_prefix="p", bucket_name="b", cache=cache)
+    assert len(listed) == 2
+
+    listed.clear()
+    again = s3_mod.list_files_for_dates([old, recent], root_prefix="p", bucket_name="b", cache=cache)
+    assert again == result
+    assert listed == []
+    assert cache.stats() == {"listings": 2, "immutable": 1}
+
+
+def test_invalidate_keys(cache):
+    cache.put("bucket", "p/2024/2024-05/25", ["p/2024/2024-05/25/a"])
+    cache.put("bucket", "p/2024/2024-05/", ["p/2024/2024-05/25/a"])
+    cache.put("bucket", "p/2024/2024-05/26", [])
+    assert cache.invalidate_keys("bucket", ["p/2024/2024-05/25/b", "q/other"]) == 2
+    assert cache.get("bucket", "p/2024/2024-05/26") == []
+
+
+def test_empty_listing_not_immutable(cache, monkeypatch):
+    monkeypatch.setattr("freeds.s3.s3.list_files", lambda prefix, bucket: [])
+    old = dt.date.today() - dt.timedelta(days=10)
+    assert s3_mod.list_files_for_dates([old], root_prefix="p", bucket_name="b", cache=cache) == []
+    assert cache.stats() == {"listings": 1, "immutable": 0}
+
+
+def test_writes_invalidate_default_cache(tmp_path, monkeypatch):
+    path = tmp_path / "listing.sqlite"
+    monkeypatch.setenv("FREEDS_S3_LISTING_CACHE", str(path))
+    monkeypatch.setattr("freeds.s3.s3.get_s3_client", lambda: MagicMock())
+    cache = ListingCache(path)
+    cache.put("bucket", "p/2024/2024-05/25", ["p/2024/2024-05/25/a"], immutable=True)
+    assert s3_mod.put_file(tmp_path / "b", "bucket", "b", prefix="p/2024/2024-05/25")
+    assert cache.get("bucket", "p/2024/2024-05/25") is None
+
+
+def test_cache_failure_doesnt_fail_writes(tmp_path, monkeypatch):
+    path = tmp_path / "listing.sqlite"
+    monkeypatch.setenv("FREEDS_S3_LISTING_CACHE", str(path))
+    ListingCache(path).put("bucket", "p", ["p/a"])
+
+    def broken(self, bucket, keys):
+        raise OSError("read-only file system")
+
+    monkeypatch.setattr(ListingCache, "invalidate_keys", broken)
+    client = MagicMock()
+    monkeypatch.setattr("freeds.s3.s3.get_s3_client", lambda: client)
+    monkeypatch.setattr("freeds.s3.streaming.get_s3_client", lambda: client)
+    assert s3_mod.put_file(tmp_path / "b", "bucket", "b", prefix="p")
+    with s3_mod.open_write("bucket", "p/c") as f:
+        f.write(b"data")
+    client.put_object.assert_called_once()
+    client.abort_multipart_upload.assert_not_called()
@@ -0,0 +1,162 @@
+import gc
+from unittest.mock import MagicMock
+
+import pytest
+
+import freeds.s3 as s3_mod
+from freeds.s3 import streaming
+
+
+class FakeObjectClient:
+    """Serves one object with ranged GETs and records multipart uploads."""
+
+    def __init__(self, data=b""):
+        self.data = data
+        self.ranges = []
+        self.parts = []
+        self.put = None
+        self.completed = None
+        self.aborted = False
+        self.fail_part = None
+
+    def head_object(self, Bucket, Key):
+        return {"ContentLength": len(self.data), "ETag": '"abc"'}
+
+    def get_object(self, Bucket, Key, Range, IfMatch=None):
+        assert IfMatch == '"abc"'
+        start, end = Range[len("bytes=") :].split("-")
+        start, end = int(start), int(end) if end else len(self.data) - 1
+        self.ranges.append((start, end))
+        body = MagicMock()
+        body.read.return_value = self.data[start : end + 1]
+        return {"Body": body}
+
+    def put_object(self, Bucket, Key, Body):
+        self.put = Body
+
+    def create_multipart_upload(self, Bucket, Key):
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber == self.fail_part:
+            raise RuntimeError("connection reset")
+        self.parts.append(Body)
+        return {"ETag": f'"etag-{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.completed = MultipartUpload["Parts"]
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted = True
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    client = FakeObjectClient()
+    monkeypatch.setattr("freeds.s3.streaming.get_s3_client", lambda: client)
+    return client
+
+
+def test_open_read_ranged(fake_client):
+    fake_client.data = bytes(range(256)) * 100
+    with s3_mod.open_read("bucket", "data.bin", buffer_size=1000) as f:
+        assert f.read(10) == fake_client.data[:10]
+        f.seek(-6, 2)
+        assert f.read() == fake_client.data[-6:]
+    # each GET fetches at most one buffer
+    assert all(end - start < 1000 for start, end in fake_client.ranges)
+    assert fake_client.ranges[0] == (0, 999)
+
+
+def test_open_read_text(fake_client):
+    fake_client.data = "línea 1\nlínea 2\n".encode("utf-8")
+    with s3_mod.open_read("bucket", "data.txt", "r") as f:
+        assert f.readlines() == ["línea 1\n", "línea 2\n"]
+
+
+@pytest.mark.parametrize("mode", ["rb", "r"])
+def test_open_read_all_in_one_get(fake_client, mode):
+    fake_client.data = b"{}" * (1536 * 1024)
+    with s3_mod.open_read("bucket", "nb.ipynb", mode, buffer_size=8192) as f:
+        assert len(f.read()) == len(fake_client.data)
+    assert len(fake_client.ranges) <= 2
+
+
+def test_open_write_small_object_single_put(fake_client):
+    with s3_mod.open_write("bucket", "nb.ipynb", "w") as f:
+        f.write('{"cells": []}')
+    assert fake_client.put == b'{"cells": []}'
+    assert fake_client.parts == []
+
+
+def test_open_write_multipart(fake_client):
+    part_size = streaming.MIN_PART_SIZE
+    data = b"x" * (part_size * 2 + 123)
+    with s3_mod.open_write("bucket", "big.bin", part_size=part_size) as f:
+        for i in range(0, len(data), 1_000_000):
+            f.write(data[i : i + 1_000_000])
+        # never more than one part held in memory
+        assert len(f._buffer) < part_size
+    assert [len(p) for p in fake_client.parts] == [part_size, part_size, 123]
+    assert [p["PartNumber"] for p in fake_client.completed] == [1, 2, 3]
+    assert fake_client.put is None
+
+
+def test_open_write_aborts_on_error(fake_client):
+    part_size = streaming.MIN_PART_SIZE
+    with pytest.raises(ValueError):
+        with s3_mod.open_write("bucket", "big.bin", part_size=part_size) as f:
+            f.write(b"x" * part_size)
+            raise ValueError("pipeline step failed")
+    assert fake_client.aborted
+    assert fake_client.completed is None
+
+    fake_client.aborted = False
+    fake_client.fail_part = 2
+    with pytest.raises(RuntimeError):
+        with s3_mod.open_write("bucket", "big.bin", part_size=part_size) as f:
+            f.write(b"x" * part_size * 2)
+    assert fake_client.aborted
+
+
+def test_open_write_invalid_arguments(fake_client):
+    with pytest.raises(ValueError):
+        s3_mod.open_write("bucket", "key", "a")
+    with pytest.raises(ValueError):
+        s3_mod.open_write("bucket", "key", part_size=1024)
+
+
+@pytest.mark.parametrize("mode", ["wb", "w"])
+def test_open_write_dropped_unclosed_aborts(fake_client, mode):
+    data = b"x" * 10 if mode == "wb" else "x" * 10
+    f = s3_mod.open_write("bucket", "small.bin", mode)
+    f.write(data)
+    del f
+    gc.collect()
+    assert fake_client.put is None
+
+    f = s3_mod.open_write("bucket", "big.bin", mode, part_size=streaming.MIN_PART_SIZE)
+    f.write(data * streaming.MIN_PART_SIZE)
+    del f
+    gc.collect()
+    assert fake_client.aborted
+    assert fake_client.completed is None
+
+
+def test_open_write_large_write_bounded(fake_client):
+    part_size = streaming.MIN_PART_SIZE
+    writer = s3_mod.open_write("bucket", "big.bin", part_size=part_size)
+    buffered = []
+    upload_part = fake_client.upload_part
+
+    def record_upload_part(**kwargs):
+        buffered.append(len(writer._buffer))
+        return upload_part(**kwargs)
+
+    fake_client.upload_part = record_upload_part
+    with writer:
+        writer.write(b"x" * (part_size * 3 + 5))
+        assert len(writer._buffer) == 5
+    # each full part leaves the buffer before it is uploaded
+    assert buffered[:3] == [0, 0, 0]
+    assert [len(p) for p in fake_client.parts] == [part_size, part_size, part_size, 5]
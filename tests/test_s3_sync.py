@@ -0,0 +1,105 @@
+import hashlib
+from unittest.mock import MagicMock
+
+import pytest
+from typer.testing import CliRunner
+
+from freeds.cli.cli import app
+from freeds.s3 import S3Object, sync
+from freeds.s3.transfer import make_transfer_config
+
+
+def md5(data):
+    return hashlib.md5(data).hexdigest()
+
+
+def set_listing(client, objects):
+    paginator = MagicMock()
+    paginator.paginate.return_value = [
+        {"Contents": [{"Key": k, "Size": len(d), "ETag": f'"{md5(d)}"'} for k, d in objects.items()]}
+    ]
+    client.get_paginator.return_value = paginator
+
+
+@pytest.fixture
+def local_dir(tmp_path):
+    (tmp_path / "data" / "2024").mkdir(parents=True)
+    (tmp_path / "data" / "same.csv").write_bytes(b"a,b\n1,2\n")
+    (tmp_path / "data" / "2024" / "changed.csv").write_bytes(b"a,b\n3,4\n")
+    (tmp_path / "data" / "new.csv").write_bytes(b"new")
+    return tmp_path / "data"
+
+
+def test_multipart_etag(tmp_path):
+    chunk = 5 * 1024 * 1024
+    data = b"x" * chunk + b"y" * 10
+    path = tmp_path / "big.bin"
+    path.write_bytes(data)
+    etag = md5(hashlib.md5(data[:chunk]).digest() + hashlib.md5(data[chunk:]).digest()) + "-2"
+    assert sync.is_unchanged(path, S3Object("big.bin", size=len(data), etag=etag), chunk_size=chunk)
+    # the same parts count for the default part size doesn't match these parts
+    assert not sync.is_unchanged(path, S3Object("big.bin", size=len(data), etag=etag), chunk_size=3 * 1024 * 1024)
+    assert not sync.is_unchanged(path, S3Object("big.bin", size=len(data), etag=md5(data)[:-1] + "0"), chunk)
+
+
+def test_sync_to_s3(mock_s3_client, local_dir):
+    set_listing(
+        mock_s3_client,
+        {"raw/same.csv": b"a,b\n1,2\n", "raw/2024/changed.csv": b"a,b\n9,9\n", "raw/gone.csv": b"old"},
+    )
+    report = sync.sync_to_s3(local_dir, "bucket", "raw/", delete=True)
+    assert report.ok
+    assert report.skipped == 1 and report.bytes_skipped == 8
+    assert sorted(key for _, key in report.to_transfer) == ["raw/2024/changed.csv", "raw/new.csv"]
+    assert report.bytes_transferred == 11
+    uploaded = sorted(call.args[2] for call in mock_s3_client.upload_file.call_args_list)
+    assert uploaded == ["raw/2024/changed.csv", "raw/new.csv"]
+    assert report.deleted == ["raw/gone.csv"]
+    mock_s3_client.delete_objects.assert_called_once()
+
+
+def test_sync_to_s3_dry_run(mock_s3_client, local_dir):
+    set_listing(mock_s3_client, {"raw/gone.csv": b"old"})
+    report = sync.sync_to_s3(local_dir, "bucket", "raw", delete=True, dry_run=True)
+    assert len(report.to_transfer) == 3
+    assert report.extras == ["raw/gone.csv"]
+    mock_s3_client.upload_file.assert_not_called()
+    mock_s3_client.delete_objects.assert_not_called()
+
+
+def test_sync_from_s3(mock_s3_client, local_dir):
+    set_listing(mock_s3_client, {"raw/same.csv": b"a,b\n1,2\n", "raw/2024/changed.csv": b"a,b\n9,9\n"})
+
+    def download_file(bucket, key, local_path, Config):
+        with open(local_path, "wb") as f:
+            f.write(b"a,b\n9,9\n")
+
+    mock_s3_client.download_file.side_effect = download_file
+    report = sync.sync_from_s3("bucket", "raw", local_dir, delete=True, config=make_transfer_config())
+    assert report.ok
+    assert report.skipped == 1
+    assert report.to_transfer == [("raw/2024/changed.csv", local_dir / "2024" / "changed.csv")]
+    assert report.deleted == [str(local_dir / "new.csv")]
+    assert not (local_dir / "new.csv").exists()
+
+
+def test_sync_command(mock_s3_client, local_dir):
+    set_listing(mock_s3_client, {"raw/same.csv": b"a,b\n1,2\n"})
+    result = CliRunner().invoke(app, ["s3", "sync", str(local_dir), "s3://bucket/raw", "--dry-run"])
+    assert result.exit_code == 0, result.output
+    assert "raw/new.csv" in result.output
+    assert "2 files" in result.output
+    assert "1 unchanged" in result.output
+
+
+def test_sync_from_s3_rejects_keys_outside_local_dir(mock_s3_client, tmp_path):
+    local_dir = tmp_path / "a" / "b"
+    local_dir.mkdir(parents=True)
+    set_listing(
+        mock_s3_client,
+        {"data//etc/cron.d/evil": b"x", "data/../../outside.txt": b"x", "data/ok/../fine.txt": b"x", "data/in.txt": b"x"},
+    )
+    report = sync.sync_from_s3("bucket", "data", local_dir, dry_run=True)
+    assert sorted(report.rejected) == ["data/../../outside.txt", "data//etc/cron.d/evil", "data/ok/../fine.txt"]
+    assert report.to_transfer == [("data/in.txt", local_dir.resolve() / "in.txt")]
+    assert not report.ok
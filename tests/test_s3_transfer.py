@@ -0,0 +1,80 @@
+import threading
+from unittest.mock import MagicMock
+
+import freeds.s3 as s3_mod
+from freeds.s3 import transfer
+
+
+def make_files(tmp_path, sizes):
+    files = []
+    for i, size in enumerate(sizes):
+        path = tmp_path / f"part-{i}.parquet"
+        path.write_bytes(b"x" * size)
+        files.append((path, f"2024/2024-05/25/part-{i}.parquet"))
+    return files
+
+
+def test_make_transfer_config(monkeypatch):
+    monkeypatch.setenv("FREEDS_S3_MULTIPART_CHUNKSIZE", str(32 * transfer.MB))
+    config = transfer.make_transfer_config(max_concurrency=2)
+    assert config.multipart_threshold == transfer.DEFAULT_MULTIPART_THRESHOLD
+    assert config.multipart_chunksize == 32 * transfer.MB
+    assert config.max_concurrency == 2
+
+
+def test_put_files(tmp_path, mock_s3_client):
+    files = make_files(tmp_path, [10, 20, 30])
+    config = transfer.make_transfer_config()
+    report = s3_mod.put_files(files, bucket="bucket", config=config)
+    assert report.ok
+    assert report.bytes == 60
+    assert [r.key for r in report.results] == [key for _, key in files]
+    assert mock_s3_client.upload_file.call_count == 3
+    mock_s3_client.upload_file.assert_any_call(str(files[0][0]), "bucket", files[0][1], Config=config)
+    assert "3/3 files" in str(report)
+
+
+def test_put_files_in_parallel(tmp_path, mock_s3_client):
+    files = make_files(tmp_path, [1] * 4)
+    barrier = threading.Barrier(4, timeout=5)
+    # all four uploads must be running at once to pass the barrier
+    mock_s3_client.upload_file.side_effect = lambda *a, **k: barrier.wait()
+    report = s3_mod.put_files(files, bucket="bucket", max_files=4)
+    assert report.ok
+
+
+def test_put_files_failure(tmp_path, mock_s3_client):
+    files = make_files(tmp_path, [10, 20])
+    mock_s3_client.upload_file.side_effect = [None, Exception("fail")]
+    report = s3_mod.put_files(files, bucket="bucket", max_files=1)
+    assert not report.ok
+    assert len(report.failed) == 1
+    assert report.bytes == 10
+
+
+def test_put_files_missing_file(tmp_path, mock_s3_client):
+    report = s3_mod.put_files([(tmp_path / "nope", "key")], bucket="bucket")
+    assert isinstance(report.failed[0].error, FileNotFoundError)
+    mock_s3_client.upload_file.assert_not_called()
+
+
+def test_get_files(tmp_path, mock_s3_client):
+    def download(bucket, key, local_path, Config):
+        with open(local_path, "wb") as f:
+            f.write(b"y" * 5)
+
+    mock_s3_client.download_file.side_effect = download
+    files = [(f"prefix/file{i}.csv", tmp_path / "out" / f"file{i}.csv") for i in range(3)]
+    report = s3_mod.get_files(files, bucket="bucket")
+    assert report.ok
+    assert report.bytes == 15
+    assert (tmp_path / "out" / "file2.csv").read_bytes() == b"yyyyy"
+    assert report.throughput > 0
+
+
+def test_put_file_with_config(monkeypatch):
+    client = MagicMock()
+    monkeypatch.setattr("freeds.s3.s3.get_s3_client", lambda: client)
+    config = transfer.make_transfer_config()
+    assert s3_mod.put_file("local.txt", "bucket", "file.txt", prefix="prefix", config=config)
+    client.upload_file.assert_called_once_with("local.txt", "bucket", "prefix/file.txt", Config=config)
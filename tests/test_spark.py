@@ -4,12 +4,15 @@ import pytest
 
 import freeds.spark as spark_mod
 
-MOCK_CONFIG = {"access_key": "AKIA_TEST", "secret_key": "SECRET_TEST"}
+MOCK_CONFIG = {"access_key": "AKIA_TEST", "secret_key": "SECRET_TEST", "user": "USER_TEST", "password": "PW_TEST"}
 
 
 @pytest.fixture
 def patch_get_config():
-    with mock.patch("freeds.spark.spark.get_config", return_value=MOCK_CONFIG):
+    with (
+        mock.patch("freeds.spark.spark.get_config", return_value=MOCK_CONFIG),
+        mock.patch("freeds.spark.spark.get_configs", return_value={"s3": MOCK_CONFIG, "jdbc": MOCK_CONFIG}),
+    ):
         yield
 
 
@@ -0,0 +1,50 @@
+import io
+
+import pytest
+import yaml
+
+from freeds.utils import yaml_io
+
+
+def test_load_yaml_string():
+    assert yaml_io.load_yaml("config: {a: 1, b: [x, y]}") == {"config": {"a": 1, "b": ["x", "y"]}}
+
+
+def test_load_yaml_is_safe():
+    with pytest.raises(yaml.YAMLError):
+        yaml_io.load_yaml("!!python/object/apply:os.system ['true']")
+
+
+def test_load_yaml12_file(tmp_path):
+    path = tmp_path / "docker-compose.yaml"
+    path.write_text("services:\n  sshd:\n    ports:\n      - 22:22\n    enabled: yes\n")
+    assert yaml_io.load_yaml12_file(path) == {"services": {"sshd": {"ports": ["22:22"], "enabled": "yes"}}}
+    assert yaml_io.load_yaml_file(path)["services"]["sshd"] == {"ports": [1342], "enabled": True}
+
+
+def test_dump_and_load_file(tmp_path):
+    data = {"config": {"root_path": "/tmp/freeds", "ports": [8000, 8001]}}
+    path = tmp_path / "cfg.yaml"
+    yaml_io.dump_yaml_file(data, path)
+    assert yaml_io.load_yaml_file(path) == data
+    assert "{" not in path.read_text()  # block style like yaml.dump(default_flow_style=False)
+
+
+def test_dump_yaml_to_string_and_stream():
+    data = {"b": 1, "a": 2}
+    text = yaml_io.dump_yaml(data)
+    assert text == "a: 2\nb: 1\n"
+    stream = io.StringIO()
+    assert yaml_io.dump_yaml(data, stream) is None
+    assert stream.getvalue() == text
+
+
+def test_uses_libyaml_when_available():
+    assert yaml_io.HAS_LIBYAML == getattr(yaml, "__with_libyaml__", False)
+    if yaml_io.HAS_LIBYAML:
+        assert yaml_io.SafeLoader is yaml.CSafeLoader
+
+
+def test_benchmark():
+    timings = yaml_io.benchmark(plugins=5, repeat=1)
+    assert "pure python" in timings